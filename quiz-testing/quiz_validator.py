@@ -332,8 +332,12 @@ class QuizValidator:
             else:
                 return 'research'
 
-    def optimize_weights(self, iterations: int = 50) -> Dict:
-        """Optimize weights using grid search"""
+    def optimize_weights(self, iterations: int = 50, progress=None) -> Dict:
+        """Optimize weights using grid search
+
+        progress, if given, is called after every combination with
+        (examined, total_combinations, evaluated, best_accuracy).
+        """
         print("\n🔧 Optimizing weights...")
 
         best_accuracy = 0
@@ -352,14 +356,18 @@ class QuizValidator:
         print(f"Testing {total_combinations} weight combinations...")
 
         tested = 0
+        examined = 0
         for app_w in application_range:
             for mag_w in magnification_range:
                 for cam_w in camera_range:
                     for per_w in persona_range:
                         for bud_w in budget_range:
+                            examined += 1
                             # Ensure weights sum to ~1.0
                             total = app_w + mag_w + cam_w + per_w + bud_w
                             if not (0.95 <= total <= 1.05):
+                                if progress:
+                                    progress(examined, total_combinations, tested, best_accuracy)
                                 continue
 
                             weights = {
@@ -383,6 +391,8 @@ class QuizValidator:
                             tested += 1
                             if tested % 100 == 0:
                                 print(f"  Tested {tested}/{total_combinations} combinations...")
+                            if progress:
+                                progress(examined, total_combinations, tested, best_accuracy)
 
         print(f"\n✓ Optimization complete!")
         print(f"Best accuracy: {best_accuracy:.1f}%")
@@ -445,12 +455,25 @@ class QuizValidator:
 
 def main():
     """Main execution"""
+    import argparse
     import os
+    import time
+
+    parser = argparse.ArgumentParser(description="Validate and optimize the microscope quiz scoring")
+    parser.add_argument('--live', action='store_true',
+                        help="Show a live dashboard (evaluations/s, best accuracy, ETA) during the weight search")
+    parser.add_argument('--openmetrics', metavar='PATH',
+                        help="Also write accuracy/throughput gauges as OpenMetrics text")
+    parser.add_argument('--junit', metavar='PATH', help="Also write one JUnit testcase per quiz test case")
+    args = parser.parse_args()
 
     print("🔬 Microscope Quiz Validator\n")
 
     # File paths
     script_dir = os.path.dirname(os.path.abspath(__file__))
+    if args.live or args.openmetrics or args.junit:
+        # The dashboard and exporters live with the API test tooling
+        sys.path.insert(0, os.path.join(script_dir, '..', 'testsprite_tests'))
     test_cases_file = os.path.join(script_dir, 'quiz_test_cases.csv')
     products_file = os.path.join(script_dir, 'products_export.json')
 
@@ -477,7 +500,13 @@ def main():
     # Optimize if accuracy is below 90%
     if initial_results['type_accuracy'] < 90:
         print(f"\n⚠️  Accuracy below 90%, running optimization...")
-        optimization_results = validator.optimize_weights()
+        if args.live:
+            from live_view import LiveDashboard, StatsAggregator, weight_search_progress
+            stats = StatsAggregator()
+            with LiveDashboard(stats, "Weight search"):
+                optimization_results = validator.optimize_weights(progress=weight_search_progress(stats))
+        else:
+            optimization_results = validator.optimize_weights()
 
         # Run validation with optimized weights
         print("\n📊 Running validation with optimized weights...")
@@ -494,6 +523,18 @@ def main():
     else:
         print(f"\n✅ Accuracy already above 90%! No optimization needed.")
 
+    if args.openmetrics or args.junit:
+        import exporters
+        start = time.perf_counter()
+        results = validator.run_validation()
+        elapsed = time.perf_counter() - start
+        if args.openmetrics:
+            exporters.write(args.openmetrics, exporters.quiz_metrics(results, validator.engine.weights, elapsed))
+            print(f"\n✓ OpenMetrics saved to: {args.openmetrics}")
+        if args.junit:
+            exporters.write(args.junit, exporters.quiz_junit(validator.test_cases, results))
+            print(f"✓ JUnit XML saved to: {args.junit}")
+
     print("\n✓ Validation complete!")
 
 
@@ -0,0 +1,555 @@
+#!/usr/bin/env python3
+"""
+Minimal asyncio HTTP/1.1 Client for the Load and Crawl Tools
+
+requests is synchronous, so the concurrent tools use this small client
+instead. It is dependency-free and built for load generation:
+- Keep-alive connection pool with a hard cap on open connections
+- Content-Length, chunked and read-until-close bodies
+- gzip/deflate decoding (br when the brotli package is installed)
+- A cancelled request closes its connection instead of returning it to the pool
+- Optional stats sink (live_view.StatsAggregator) told about every request
+
+AsyncHTTP2Client has the same interface but multiplexes concurrent
+requests as streams over one HTTP/2 connection (TLS with ALPN, or prior
+knowledge for http://). It needs the optional h2 package; open_client()
+picks a client by protocol.
+
+TokenBucket provides the shared request-rate limit.
+"""
+
+import asyncio
+import json
+import ssl
+import time
+import zlib
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import h2.config
+    import h2.connection
+    import h2.events
+    import h2.exceptions
+except ImportError:
+    h2 = None
+
+DEFAULT_HEADERS = {"Accept": "application/json"}
+USER_AGENT = "lab-essentials-api-tools/1.0"
+
+
+class ClientError(Exception):
+    """Raised when a request fails below the HTTP layer (connect, protocol, timeout)"""
+
+
+@dataclass
+class HTTPResponse:
+    """A fully read HTTP response"""
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+    elapsed_ms: float
+    wire_bytes: int = 0
+    reused_connection: bool = False
+
+    def json(self) -> Any:
+        return json.loads(self.body)
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 400
+
+
+@dataclass
+class _Connection:
+    reader: asyncio.StreamReader
+    writer: asyncio.StreamWriter
+    requests: int = 0
+
+    def close(self) -> None:
+        try:
+            self.writer.close()
+        except (ConnectionError, RuntimeError):
+            pass
+
+
+def decode_body(body: bytes, encoding: str) -> bytes:
+    """Undo Content-Encoding"""
+    encoding = encoding.strip().lower()
+    if not encoding or encoding == 'identity':
+        return body
+    if encoding in ('gzip', 'x-gzip'):
+        return zlib.decompress(body, 16 + zlib.MAX_WBITS)
+    if encoding == 'deflate':
+        try:
+            return zlib.decompress(body)
+        except zlib.error:
+            return zlib.decompress(body, -zlib.MAX_WBITS)
+    if encoding == 'br' and brotli is not None:
+        return brotli.decompress(body)
+    raise ClientError(f"Unsupported Content-Encoding: {encoding}")
+
+
+class AsyncHTTPClient:
+    """Pooled keep-alive HTTP/1.1 client bound to one origin"""
+
+    def __init__(self, base_url: str, max_connections: int = 100, timeout: float = 30.0,
+                 headers: Optional[Dict[str, str]] = None, decompress: bool = True, stats=None):
+        parts = urlsplit(base_url)
+        self.base_url = base_url.rstrip('/')
+        self.scheme = parts.scheme or 'http'
+        self.host = parts.hostname or 'localhost'
+        self.port = parts.port or (443 if self.scheme == 'https' else 80)
+        self.timeout = timeout
+        self.decompress = decompress
+        self.stats = stats
+        self.default_headers = {**DEFAULT_HEADERS, **(headers or {})}
+        self._ssl = ssl.create_default_context() if self.scheme == 'https' else None
+        self._idle: List[_Connection] = []
+        self._slots = asyncio.Semaphore(max_connections)
+        self.connections_opened = 0
+
+    async def __aenter__(self) -> 'AsyncHTTPClient':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Close all idle connections"""
+        while self._idle:
+            self._idle.pop().close()
+
+    async def _connect(self) -> _Connection:
+        reader, writer = await asyncio.open_connection(
+            self.host, self.port, ssl=self._ssl,
+            server_hostname=self.host if self._ssl else None,
+            limit=1024 * 1024,
+        )
+        self.connections_opened += 1
+        return _Connection(reader, writer)
+
+    def _build_request(self, method: str, target: str, headers: Dict[str, str], body: bytes) -> bytes:
+        lines = [f"{method} {target} HTTP/1.1", f"Host: {self.host}:{self.port}", f"User-Agent: {USER_AGENT}"]
+        for name, value in headers.items():
+            lines.append(f"{name}: {value}")
+        if body or method in ('POST', 'PUT', 'PATCH'):
+            lines.append(f"Content-Length: {len(body)}")
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body
+
+    async def _read_response(self, conn: _Connection, method: str) -> Tuple[int, Dict[str, str], bytes, int, bool]:
+        """Read status, headers and body; returns (status, headers, body, wire bytes, keep-alive)"""
+        reader = conn.reader
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Connection closed before response")
+        try:
+            version, status_text = status_line.decode('latin-1').split(' ', 2)[:2]
+            status = int(status_text)
+        except ValueError:
+            raise ClientError(f"Malformed status line: {status_line[:80]!r}")
+
+        headers: Dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            name = name.strip().lower()
+            value = value.strip()
+            headers[name] = f"{headers[name]}, {value}" if name in headers else value
+
+        keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+
+        if method == 'HEAD' or status in (204, 304) or 100 <= status < 200:
+            body = b''
+        elif headers.get('transfer-encoding', '').lower().endswith('chunked'):
+            parts = []
+            while True:
+                size_line = await reader.readline()
+                size = int(size_line.split(b';', 1)[0].strip() or b'0', 16)
+                if size == 0:
+                    # Trailers end with an empty line
+                    while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                        pass
+                    break
+                parts.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            body = b''.join(parts)
+        elif 'content-length' in headers:
+            body = await reader.readexactly(int(headers['content-length']))
+        else:
+            body = await reader.read()
+            keep_alive = False
+
+        return status, headers, body, len(body), keep_alive
+
+    async def request(self, method: str, path: str, params: Optional[Dict[str, Any]] = None,
+                      json_body: Any = None, body: Optional[bytes] = None,
+                      headers: Optional[Dict[str, str]] = None,
+                      timeout: Optional[float] = None) -> HTTPResponse:
+        """Send one request and read the full response"""
+        method = method.upper()
+        target = path if path.startswith('/') else f"/{path}"
+        if params:
+            target = f"{target}?{urlencode(params)}"
+
+        request_headers = dict(self.default_headers)
+        if headers:
+            request_headers.update(headers)
+        payload = body or b''
+        if json_body is not None:
+            payload = json.dumps(json_body).encode()
+            request_headers.setdefault('Content-Type', 'application/json')
+        raw_request = self._build_request(method, target, request_headers, payload)
+
+        async with self._slots:
+            start = time.perf_counter()
+            if self.stats is not None:
+                self.stats.request_started()
+            outcome = 'error'
+            try:
+                response = await asyncio.wait_for(
+                    self._exchange(method, raw_request, start),
+                    timeout if timeout is not None else self.timeout,
+                )
+                outcome = str(response.status)
+                return response
+            except asyncio.TimeoutError:
+                outcome = 'timeout'
+                raise ClientError(f"Timed out after {timeout or self.timeout:.1f}s: {method} {target}")
+            finally:
+                if self.stats is not None:
+                    self.stats.request_finished(outcome, (time.perf_counter() - start) * 1000)
+
+    async def _exchange(self, method: str, raw_request: bytes, start: float) -> HTTPResponse:
+        """Run the exchange, retrying once on a stale pooled connection"""
+        for attempt in range(2):
+            reused = bool(self._idle)
+            conn = self._idle.pop() if reused else await self._connect()
+            try:
+                conn.writer.write(raw_request)
+                await conn.writer.drain()
+                status, headers, raw_body, wire_bytes, keep_alive = await self._read_response(conn, method)
+            except (ConnectionError, asyncio.IncompleteReadError) as e:
+                conn.close()
+                # Servers may drop idle keep-alive connections; a fresh one gets a second chance
+                if reused and attempt == 0:
+                    continue
+                raise ClientError(f"Connection error: {e}")
+            except BaseException:
+                # Includes cancellation: a half-read connection can never be reused
+                conn.close()
+                raise
+
+            conn.requests += 1
+            if keep_alive:
+                self._idle.append(conn)
+            else:
+                conn.close()
+
+            body = raw_body
+            if self.decompress and 'content-encoding' in headers:
+                body = decode_body(raw_body, headers['content-encoding'])
+            return HTTPResponse(status, headers, body, (time.perf_counter() - start) * 1000,
+                                wire_bytes, reused)
+        raise ClientError("Unreachable")
+
+    async def get(self, path: str, **kwargs) -> HTTPResponse:
+        return await self.request('GET', path, **kwargs)
+
+    async def post(self, path: str, **kwargs) -> HTTPResponse:
+        return await self.request('POST', path, **kwargs)
+
+    async def delete(self, path: str, **kwargs) -> HTTPResponse:
+        return await self.request('DELETE', path, **kwargs)
+
+
+PROTOCOLS = ('h1', 'h2')
+
+# Connection-level receive window, so large responses are not paced by our acknowledgements
+H2_CONNECTION_WINDOW = 16 * 1024 * 1024
+
+
+@dataclass
+class _Stream:
+    done: asyncio.Future
+    status: int = 0
+    headers: Dict[str, str] = field(default_factory=dict)
+    chunks: List[bytes] = field(default_factory=list)
+
+
+class AsyncHTTP2Client:
+    """HTTP/2 client bound to one origin: concurrent requests share one connection as streams"""
+
+    def __init__(self, base_url: str, max_streams: int = 100, timeout: float = 30.0,
+                 headers: Optional[Dict[str, str]] = None, decompress: bool = True, stats=None):
+        if h2 is None:
+            raise ClientError("HTTP/2 needs the h2 package (pip install h2)")
+        parts = urlsplit(base_url)
+        self.base_url = base_url.rstrip('/')
+        self.scheme = parts.scheme or 'http'
+        self.host = parts.hostname or 'localhost'
+        self.port = parts.port or (443 if self.scheme == 'https' else 80)
+        self.max_streams = max_streams
+        self.timeout = timeout
+        self.decompress = decompress
+        self.stats = stats
+        self.default_headers = {**DEFAULT_HEADERS, **(headers or {})}
+        self._ssl = None
+        if self.scheme == 'https':
+            self._ssl = ssl.create_default_context()
+            self._ssl.set_alpn_protocols(['h2'])
+        self._slots = asyncio.Semaphore(max_streams)
+        self._conn = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._streams: Dict[int, _Stream] = {}
+        self._connect_lock = asyncio.Lock()
+        self._changed = asyncio.Event()  # window updates, settings and finished streams
+        self.connections_opened = 0
+        self.peak_streams = 0
+
+    async def __aenter__(self) -> 'AsyncHTTP2Client':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Send GOAWAY and close the connection"""
+        if self._conn is not None and self._writer is not None:
+            try:
+                self._conn.close_connection()
+                self._writer.write(self._conn.data_to_send())
+                self._writer.close()
+            except (ConnectionError, RuntimeError, h2.exceptions.ProtocolError):
+                pass
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+        self._conn = None
+
+    async def _connect(self) -> None:
+        async with self._connect_lock:
+            if self._conn is not None:
+                return
+            reader, writer = await asyncio.open_connection(
+                self.host, self.port, ssl=self._ssl,
+                server_hostname=self.host if self._ssl else None,
+                limit=1024 * 1024,
+            )
+            if self._ssl is not None:
+                negotiated = writer.get_extra_info('ssl_object').selected_alpn_protocol()
+                if negotiated != 'h2':
+                    writer.close()
+                    raise ClientError(f"{self.host} did not negotiate HTTP/2 (ALPN: {negotiated})")
+            conn = h2.connection.H2Connection(
+                config=h2.config.H2Configuration(client_side=True, header_encoding='utf-8'))
+            conn.initiate_connection()
+            conn.increment_flow_control_window(H2_CONNECTION_WINDOW)
+            writer.write(conn.data_to_send())
+            await writer.drain()
+            self._conn, self._writer = conn, writer
+            self.connections_opened += 1
+            self._reader_task = asyncio.ensure_future(self._read_loop(reader, conn))
+
+    async def _read_loop(self, reader: asyncio.StreamReader, conn) -> None:
+        """Dispatch frames to their streams until the connection ends"""
+        error = "Connection closed"
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                for event in conn.receive_data(data):
+                    stream = self._streams.get(getattr(event, 'stream_id', 0))
+                    if isinstance(event, h2.events.ResponseReceived) and stream:
+                        stream.headers = {name.lower(): value for name, value in event.headers}
+                        stream.status = int(stream.headers.pop(':status', 0))
+                    elif isinstance(event, h2.events.DataReceived):
+                        if stream:
+                            stream.chunks.append(event.data)
+                        conn.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+                    elif isinstance(event, h2.events.StreamEnded) and stream and not stream.done.done():
+                        stream.done.set_result(None)
+                    elif isinstance(event, h2.events.StreamReset) and stream and not stream.done.done():
+                        stream.done.set_exception(ClientError(f"Stream reset by server (error {event.error_code})"))
+                    elif isinstance(event, h2.events.ConnectionTerminated):
+                        error = f"Server closed the connection (GOAWAY, error {event.error_code})"
+                        return
+                    if isinstance(event, (h2.events.WindowUpdated, h2.events.RemoteSettingsChanged,
+                                          h2.events.StreamEnded, h2.events.StreamReset)):
+                        self._changed.set()
+                pending = conn.data_to_send()
+                if pending:
+                    self._writer.write(pending)
+        except (ConnectionError, h2.exceptions.ProtocolError) as e:
+            error = f"Connection error: {e}"
+        finally:
+            if self._conn is conn:
+                self._conn = None
+            for stream in self._streams.values():
+                if not stream.done.done():
+                    stream.done.set_exception(ClientError(error))
+            self._changed.set()
+
+    async def _wait_for_change(self) -> None:
+        self._changed.clear()
+        await self._changed.wait()
+
+    def _headers(self, method: str, target: str, headers: Dict[str, str], payload: bytes) -> List[Tuple[str, str]]:
+        default_port = 443 if self.scheme == 'https' else 80
+        authority = self.host if self.port == default_port else f"{self.host}:{self.port}"
+        pairs = [(':method', method), (':authority', authority), (':scheme', self.scheme), (':path', target),
+                 ('user-agent', USER_AGENT)]
+        pairs += [(name.lower(), value) for name, value in headers.items()]
+        if payload or method in ('POST', 'PUT', 'PATCH'):
+            pairs.append(('content-length', str(len(payload))))
+        return pairs
+
+    async def request(self, method: str, path: str, params: Optional[Dict[str, Any]] = None,
+                      json_body: Any = None, body: Optional[bytes] = None,
+                      headers: Optional[Dict[str, str]] = None,
+                      timeout: Optional[float] = None) -> HTTPResponse:
+        """Send one request on a new stream and read the full response"""
+        method = method.upper()
+        target = path if path.startswith('/') else f"/{path}"
+        if params:
+            target = f"{target}?{urlencode(params)}"
+
+        request_headers = dict(self.default_headers)
+        if headers:
+            request_headers.update(headers)
+        payload = body or b''
+        if json_body is not None:
+            payload = json.dumps(json_body).encode()
+            request_headers.setdefault('Content-Type', 'application/json')
+
+        async with self._slots:
+            start = time.perf_counter()
+            if self.stats is not None:
+                self.stats.request_started()
+            outcome = 'error'
+            try:
+                response = await asyncio.wait_for(
+                    self._exchange(method, target, request_headers, payload, start),
+                    timeout if timeout is not None else self.timeout,
+                )
+                outcome = str(response.status)
+                return response
+            except asyncio.TimeoutError:
+                outcome = 'timeout'
+                raise ClientError(f"Timed out after {timeout or self.timeout:.1f}s: {method} {target}")
+            finally:
+                if self.stats is not None:
+                    self.stats.request_finished(outcome, (time.perf_counter() - start) * 1000)
+
+    async def _exchange(self, method: str, target: str, headers: Dict[str, str], payload: bytes,
+                        start: float) -> HTTPResponse:
+        reused = self._conn is not None
+        await self._connect()
+        conn = self._conn
+        # The server's SETTINGS may allow fewer concurrent streams than max_streams
+        while conn.open_outbound_streams >= conn.remote_settings.max_concurrent_streams:
+            await self._wait_for_change()
+            if self._conn is not conn:
+                raise ClientError("Connection closed")
+
+        stream_id = conn.get_next_available_stream_id()
+        stream = _Stream(asyncio.get_running_loop().create_future())
+        self._streams[stream_id] = stream
+        self.peak_streams = max(self.peak_streams, len(self._streams))
+        try:
+            try:
+                conn.send_headers(stream_id, self._headers(method, target, headers, payload),
+                                  end_stream=not payload)
+                self._writer.write(conn.data_to_send())
+                sent = 0
+                while sent < len(payload):
+                    window = min(conn.local_flow_control_window(stream_id), conn.max_outbound_frame_size)
+                    if window <= 0:
+                        await self._wait_for_change()
+                        continue
+                    chunk = payload[sent:sent + window]
+                    sent += len(chunk)
+                    conn.send_data(stream_id, chunk, end_stream=sent >= len(payload))
+                    self._writer.write(conn.data_to_send())
+                await self._writer.drain()
+            except (ConnectionError, h2.exceptions.ProtocolError) as e:
+                raise ClientError(f"Connection error: {e}")
+            await stream.done
+        except asyncio.CancelledError:
+            # A cancelled request only resets its own stream; the connection stays usable
+            if self._conn is conn:
+                try:
+                    conn.reset_stream(stream_id)
+                    self._writer.write(conn.data_to_send())
+                except h2.exceptions.ProtocolError:
+                    pass
+            raise
+        finally:
+            self._streams.pop(stream_id, None)
+            self._changed.set()
+
+        raw_body = b''.join(stream.chunks)
+        body = raw_body
+        if self.decompress and 'content-encoding' in stream.headers:
+            body = decode_body(raw_body, stream.headers['content-encoding'])
+        return HTTPResponse(stream.status, stream.headers, body, (time.perf_counter() - start) * 1000,
+                            len(raw_body), reused)
+
+    async def get(self, path: str, **kwargs) -> HTTPResponse:
+        return await self.request('GET', path, **kwargs)
+
+    async def post(self, path: str, **kwargs) -> HTTPResponse:
+        return await self.request('POST', path, **kwargs)
+
+    async def delete(self, path: str, **kwargs) -> HTTPResponse:
+        return await self.request('DELETE', path, **kwargs)
+
+
+def open_client(base_url: str, protocol: str = 'h1', concurrency: int = 100, timeout: float = 30.0, **kwargs):
+    """HTTP/1.1 pool of `concurrency` connections, or one HTTP/2 connection with `concurrency` streams"""
+    if protocol == 'h2':
+        return AsyncHTTP2Client(base_url, max_streams=concurrency, timeout=timeout, **kwargs)
+    if protocol != 'h1':
+        raise ValueError(f"Unknown protocol: {protocol}")
+    return AsyncHTTPClient(base_url, max_connections=concurrency, timeout=timeout, **kwargs)
+
+
+@dataclass
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, holding at most `burst`"""
+    rate: float
+    burst: float = 1.0
+    _tokens: float = field(init=False)
+    _updated: float = field(init=False)
+    _lock: asyncio.Lock = field(init=False, default=None)
+
+    def __post_init__(self):
+        self.burst = max(self.burst, 1.0)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        """Wait until `tokens` are available and take them"""
+        if self.rate <= 0:
+            return
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        # The lock keeps waiters in FIFO order so no task starves
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Cache TTL-Boundary and Thundering-Herd Stress for Lab Essentials E-Commerce
+
+withCache (src/lib/cache/manager.ts) does not coalesce: when a hot key is
+missing, every request that arrives before the first fetch has refilled it
+calls the fetcher too. This holds a high, constant concurrency on cached
+endpoints across an expiry and records what that costs:
+- trigger flush: clear the cache with DELETE /api/cache/health after a
+  baseline window (optionally several times)
+- trigger wait:  clear and prime the cache, sleep until the CacheTTL
+  (SHORT/MEDIUM/LONG/DAY/WEEK or seconds) is about to run out, then hold
+  the load across the natural expiry
+
+Per expiry:
+- Latency timeline in buckets by request start, the spike (peak bucket
+  p99 and slowest request against the baseline) and the recovery time:
+  until requests starting then stay within 1.5x the baseline p99
+- Probable misses: requests in the recovery window slower than 3x the
+  baseline p50; more than one per endpoint means duplicate recomputes
+- Upstream calls, exact, when --upstream is given: the tool then runs a
+  fault_proxy in front of Shopify and counts calls per GraphQL operation
+  (start the server with SHOPIFY_STORE_DOMAIN pointed at --listen, see
+  fault_proxy.py). Duplicates = calls beyond one per operation
+
+Usage:
+    python3 testsprite_tests/cache_herd.py --concurrency 200
+    python3 testsprite_tests/cache_herd.py --trigger flush --flushes 3 --before 5 --after 15
+    python3 testsprite_tests/cache_herd.py --trigger wait --ttl SHORT --concurrency 100
+    python3 testsprite_tests/cache_herd.py --upstream https://$SHOPIFY_STORE_DOMAIN --listen 127.0.0.1:8443 \\
+        --tls-cert cert.pem --tls-key key.pem
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+from aio_client import AsyncHTTPClient, ClientError
+from comprehensive_api_tests import (
+    BASE_URL, CACHE_BENCHMARK_ENDPOINTS, GREEN, RED, YELLOW, BLUE, CYAN, BOLD, RESET,
+)
+from fault_proxy import FaultProxy, parse_listen, run_in_thread, tls_context
+from perf_stats import percentile
+
+REPORT_FILE = "testsprite_tests/cache_herd_report.json"
+
+TRIGGERS = ('flush', 'wait')
+
+# CacheTTL in src/lib/cache/manager.ts, in seconds
+CACHE_TTL_S = {'SHORT': 300, 'MEDIUM': 1800, 'LONG': 7200, 'DAY': 86400, 'WEEK': 604800}
+
+BUCKET_MS = 100
+RECOVERY_FACTOR = 1.5
+RECOVERY_BUCKETS = 3
+MISS_FACTOR = 3.0
+TIMELINE_ROWS = 30
+
+# (start offset in s, latency in ms, target, status)
+Sample = Tuple[float, float, str, str]
+
+
+def default_targets() -> List[str]:
+    """The endpoints the cache benchmark times, with their query strings"""
+    return [f"{path}?{urlencode(query)}" if query else path for _, path, query in CACHE_BENCHMARK_ENDPOINTS]
+
+
+def parse_ttl(value: str) -> float:
+    """A CacheTTL name or a number of seconds"""
+    if value.upper() in CACHE_TTL_S:
+        return float(CACHE_TTL_S[value.upper()])
+    seconds = float(value)
+    if seconds <= 0:
+        raise argparse.ArgumentTypeError("TTL must be positive")
+    return seconds
+
+
+async def clear_cache(client: AsyncHTTPClient) -> None:
+    response = await client.delete('/api/cache/health')
+    if response.status != 200:
+        raise ClientError(f"Cache clear returned {response.status}")
+
+
+async def cache_stats(client: AsyncHTTPClient) -> Optional[Dict]:
+    """CacheManager.getStats() via /api/cache/health"""
+    try:
+        response = await client.get('/api/cache/health')
+    except ClientError:
+        return None
+    return response.json().get('cache') if response.status == 200 else None
+
+
+# ==================== LOAD ====================
+
+async def run_herd(base_url: str, targets: List[str], concurrency: int, trigger: str, flushes: int,
+                   before_s: float, after_s: float, ttl_s: float, timeout: float,
+                   proxy: Optional[FaultProxy]) -> Dict:
+    """Hold `concurrency` callers on the targets and expire the cache per the trigger"""
+    samples: List[Sample] = []
+    events: List[Dict] = []
+    stop = asyncio.Event()
+
+    async with AsyncHTTPClient(base_url, max_connections=concurrency + 1, timeout=timeout) as client:
+        if trigger == 'wait':
+            await clear_cache(client)
+        # Entries are created during the prime, so none expires before primed_at + ttl_s
+        primed_at = time.perf_counter()
+        await asyncio.gather(*(client.get(target) for target in targets))
+        if trigger == 'wait':
+            idle = ttl_s - before_s - (time.perf_counter() - primed_at)
+            print(f"{CYAN}Primed; entries expire in ~{ttl_s:g}s, load starts {before_s:g}s before{RESET}")
+            if idle > 0:
+                await asyncio.sleep(idle)
+        # Open every pooled connection before the clock starts so connects do not skew the baseline
+        await asyncio.gather(*(client.get(targets[i % len(targets)]) for i in range(concurrency)),
+                             return_exceptions=True)
+
+        t0 = time.perf_counter()
+
+        async def caller(offset: int) -> None:
+            i = offset
+            while not stop.is_set():
+                target = targets[i % len(targets)]
+                i += 1
+                start = time.perf_counter()
+                try:
+                    response = await client.get(target)
+                    status = str(response.status)
+                except ClientError:
+                    status = 'error'
+                samples.append((start - t0, (time.perf_counter() - start) * 1000, target, status))
+
+        def upstream_calls() -> Dict[str, int]:
+            return dict(proxy.calls) if proxy else {}
+
+        callers = [asyncio.ensure_future(caller(i)) for i in range(concurrency)]
+        try:
+            for _ in range(flushes if trigger == 'flush' else 1):
+                baseline_calls = upstream_calls()
+                if trigger == 'flush':
+                    await asyncio.sleep(before_s)
+                    stats_before = await cache_stats(client)
+                    # Snapshot first: the herd reaches the upstream before the DELETE response is back
+                    trigger_calls = upstream_calls()
+                    at = time.perf_counter() - t0
+                    await clear_cache(client)
+                    print(f"{YELLOW}Cache cleared at +{at:.1f}s{RESET}")
+                else:
+                    stats_before = await cache_stats(client)
+                    at = primed_at + ttl_s - t0
+                    await asyncio.sleep(max(at - (time.perf_counter() - t0), 0))
+                    trigger_calls = upstream_calls()
+                    print(f"{YELLOW}TTL boundary at +{at:.1f}s{RESET}")
+                await asyncio.sleep(after_s)
+                events.append({
+                    'at_s': at,
+                    'cache_before': stats_before,
+                    'cache_after': await cache_stats(client),
+                    'baseline_calls': _diff(trigger_calls, baseline_calls),
+                    'calls': _diff(upstream_calls(), trigger_calls),
+                })
+        finally:
+            stop.set()
+            await asyncio.gather(*callers, return_exceptions=True)
+
+    return {'samples': samples, 'events': events}
+
+
+def _diff(after: Dict[str, int], before: Dict[str, int]) -> Dict[str, int]:
+    return {key: n - before.get(key, 0) for key, n in after.items() if n - before.get(key, 0) > 0}
+
+
+# ==================== ANALYSIS ====================
+
+def _bucket_stats(latencies: List[float], errors: int) -> Dict:
+    return {
+        'requests': len(latencies),
+        'p50_ms': round(percentile(latencies, 50), 2) if latencies else None,
+        'p99_ms': round(percentile(latencies, 99), 2) if latencies else None,
+        'max_ms': round(max(latencies), 2) if latencies else None,
+        'errors': errors,
+    }
+
+
+def analyze_event(samples: List[Sample], event: Dict, before_s: float, after_s: float, bucket_ms: int) -> Dict:
+    """Baseline, spike, recovery and duplicate work around one expiry"""
+    at = event['at_s']
+    baseline = [ms for start, ms, _, status in samples if at - before_s <= start < at and status != 'error']
+    base_p50 = percentile(baseline, 50) if baseline else 0.0
+    base_p99 = percentile(baseline, 99) if baseline else 0.0
+
+    window = [s for s in samples if at <= s[0] < at + after_s]
+    buckets: List[Dict] = []
+    for index in range(int(after_s * 1000 // bucket_ms)):
+        lo, hi = at + index * bucket_ms / 1000, at + (index + 1) * bucket_ms / 1000
+        rows = [s for s in window if lo <= s[0] < hi]
+        buckets.append(_bucket_stats([ms for _, ms, _, status in rows if status != 'error'],
+                                     sum(1 for *_, status in rows if status == 'error')))
+
+    # Recovered once RECOVERY_BUCKETS consecutive buckets stay within the threshold
+    threshold = base_p99 * RECOVERY_FACTOR
+    recovered_index = None
+    for index in range(len(buckets) - RECOVERY_BUCKETS + 1):
+        run = buckets[index:index + RECOVERY_BUCKETS]
+        if all(b['p99_ms'] is not None and b['p99_ms'] <= threshold and not b['errors'] for b in run):
+            recovered_index = index
+            break
+    recovery_ms = recovered_index * bucket_ms if recovered_index is not None else None
+
+    settle_s = (recovery_ms if recovery_ms is not None else after_s * 1000) / 1000
+    misses: Dict[str, int] = {}
+    for start, ms, target, status in window:
+        if start < at + settle_s and status != 'error' and ms > base_p50 * MISS_FACTOR:
+            misses[target] = misses.get(target, 0) + 1
+
+    calls = event['calls']
+    peak = max((b['p99_ms'] for b in buckets if b['p99_ms'] is not None), default=None)
+    slowest = max((ms for _, ms, _, status in window if status != 'error'), default=None)
+    return {
+        'at_s': round(at, 3),
+        'baseline': {'requests': len(baseline), 'p50_ms': round(base_p50, 2), 'p99_ms': round(base_p99, 2),
+                     'upstream_calls': sum(event['baseline_calls'].values())},
+        'peak_p99_ms': peak,
+        'peak_ratio': round(peak / base_p99, 2) if peak and base_p99 else None,
+        'slowest_ms': round(slowest, 2) if slowest is not None else None,
+        'recovery_ms': recovery_ms,
+        'errors': sum(b['errors'] for b in buckets),
+        'probable_misses': misses,
+        'probable_duplicates': sum(n - 1 for n in misses.values()),
+        'upstream_calls': calls,
+        'upstream_duplicates': sum(n - 1 for n in calls.values()) if calls else None,
+        'cache_before': event['cache_before'],
+        'cache_after': event['cache_after'],
+        'buckets': buckets,
+    }
+
+
+def _verdict(result: Dict, measured: bool) -> str:
+    duplicates = result['upstream_duplicates'] if measured else result['probable_duplicates']
+    source = "upstream calls" if measured else "probable misses"
+    if measured and not result['baseline']['upstream_calls'] and not sum(result['upstream_calls'].values()):
+        return (f"{YELLOW}No upstream calls through the proxy, even after the expiry: the server is probably "
+                f"not pointed at --listen (SHOPIFY_STORE_DOMAIN), so nothing was measured{RESET}")
+    if result['baseline']['upstream_calls']:
+        return (f"{YELLOW}Upstream was called {result['baseline']['upstream_calls']} time(s) before the expiry: "
+                f"these endpoints are not (all) cached{RESET}")
+    if not duplicates:
+        if result['peak_ratio'] and result['peak_ratio'] > RECOVERY_FACTOR:
+            return f"{GREEN}One recompute per key; spike {result['peak_ratio']:.1f}x baseline p99{RESET}"
+        return f"{GREEN}No herd: latency unchanged by the expiry (nothing cached to refill?){RESET}"
+    return (f"{RED}Thundering herd: {duplicates} duplicate recompute(s) by {source}; coalescing would save them "
+            f"and cap the spike at one fetch{RESET}")
+
+
+# ==================== REPORT ====================
+
+def print_event(index: int, result: Dict, bucket_ms: int, measured: bool) -> None:
+    base = result['baseline']
+    recovery = f"{result['recovery_ms']}ms" if result['recovery_ms'] is not None else "not within the window"
+    print(f"\n{BOLD}Expiry {index + 1} at +{result['at_s']:.1f}s{RESET}")
+    print(f"  Baseline: p50 {base['p50_ms']:.0f}ms | p99 {base['p99_ms']:.0f}ms over {base['requests']} requests")
+    if result['peak_p99_ms'] is not None:
+        print(f"  Spike:    peak bucket p99 {result['peak_p99_ms']:.0f}ms ({result['peak_ratio'] or 0:.1f}x) | "
+              f"slowest {result['slowest_ms']:.0f}ms | errors {result['errors']}")
+    print(f"  Recovery: {recovery}")
+    misses = ', '.join(f"{target} {n}" for target, n in result['probable_misses'].items()) or 'none'
+    print(f"  Probable misses (> {MISS_FACTOR:g}x baseline p50): {misses}")
+    if measured:
+        calls = ', '.join(f"{call} {n}" for call, n in result['upstream_calls'].items()) or 'none'
+        print(f"  Upstream calls: {calls}")
+
+    top = max((b['max_ms'] or 0 for b in result['buckets']), default=0) or 1
+    shown = result['buckets'][:TIMELINE_ROWS]
+    print(f"\n  {'Offset':>7} {'Reqs':>5} {'p50':>7} {'p99':>7}")
+    for n, bucket in enumerate(shown):
+        if bucket['p99_ms'] is None:
+            print(f"  {n * bucket_ms / 1000:>+6.1f}s {0:>5}")
+            continue
+        bar = '#' * max(1, int(bucket['p99_ms'] / top * 40))
+        color = RED if bucket['p99_ms'] > base['p99_ms'] * RECOVERY_FACTOR else GREEN
+        print(f"  {n * bucket_ms / 1000:>+6.1f}s {bucket['requests']:>5} {bucket['p50_ms']:>5.0f}ms "
+              f"{bucket['p99_ms']:>5.0f}ms {color}{bar}{RESET}")
+    if len(result['buckets']) > len(shown):
+        print(f"  ... {len(result['buckets']) - len(shown)} more bucket(s) in the report")
+    print(f"\n  {_verdict(result, measured)}")
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Hold load on cached endpoints across a cache expiry")
+    parser.add_argument('--base-url', default=BASE_URL)
+    parser.add_argument('--paths', help="Comma-separated paths with query (default: the cache benchmark endpoints)")
+    parser.add_argument('--concurrency', type=int, default=100, help="Concurrent callers held throughout")
+    parser.add_argument('--trigger', choices=TRIGGERS, default='flush')
+    parser.add_argument('--flushes', type=int, default=1, help="Expiries to force (flush trigger)")
+    parser.add_argument('--ttl', type=parse_ttl, default=CACHE_TTL_S['SHORT'],
+                        help="Entry TTL for the wait trigger: SHORT, MEDIUM, LONG, DAY, WEEK or seconds")
+    parser.add_argument('--before', type=float, default=5.0, help="Baseline seconds before each expiry")
+    parser.add_argument('--after', type=float, default=10.0, help="Seconds observed after each expiry")
+    parser.add_argument('--bucket-ms', type=int, default=BUCKET_MS)
+    parser.add_argument('--timeout', type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument('--upstream', help="Count upstream calls: proxy this origin (e.g. https://shop.myshopify.com)")
+    parser.add_argument('--listen', default='127.0.0.1:8443', help="Proxy HOST:PORT (with --upstream)")
+    parser.add_argument('--tls-cert', help="Proxy TLS certificate (needed to stand in for Shopify)")
+    parser.add_argument('--tls-key')
+    parser.add_argument('--output', default=REPORT_FILE)
+    args = parser.parse_args()
+
+    targets = [p.strip() for p in args.paths.split(',') if p.strip()] if args.paths else default_targets()
+    if args.concurrency < 1 or args.bucket_ms < 1:
+        parser.error("--concurrency and --bucket-ms must be positive")
+    if args.after * 1000 < args.bucket_ms * RECOVERY_BUCKETS:
+        parser.error(f"--after must cover at least {RECOVERY_BUCKETS} buckets")
+
+    print(f"\n{BLUE}{BOLD}{'='*80}")
+    print("Lab Essentials E-Commerce - Cache Expiry / Thundering-Herd Stress")
+    print(f"Testing against: {args.base_url}")
+    trigger = f"flush x{args.flushes}" if args.trigger == 'flush' else f"wait for TTL {args.ttl:g}s"
+    print(f"Concurrency: {args.concurrency} | Trigger: {trigger} | Window: -{args.before:g}s/+{args.after:g}s | "
+          f"Endpoints: {len(targets)}")
+    print(f"{'='*80}{RESET}\n")
+    for target in targets:
+        print(f"  {target}")
+
+    proxy = None
+    try:
+        if args.upstream:
+            host, port = parse_listen(args.listen)
+            proxy = FaultProxy(args.upstream, [], 'http', host, port, tls_context(args.tls_cert, args.tls_key))
+            run_in_thread(proxy)
+            print(f"\n{CYAN}Counting upstream calls through {proxy.url} -> {args.upstream}{RESET}")
+        print()
+        run = asyncio.run(run_herd(args.base_url, targets, args.concurrency, args.trigger, args.flushes,
+                                   args.before, args.after, args.ttl, args.timeout, proxy))
+    except KeyboardInterrupt:
+        print(f"\n{YELLOW}Stress interrupted by user{RESET}")
+        sys.exit(1)
+    except (ClientError, OSError, ValueError) as e:
+        print(f"{RED}Error: {e}{RESET}")
+        sys.exit(1)
+
+    results = [analyze_event(run['samples'], event, args.before, args.after, args.bucket_ms)
+               for event in run['events']]
+    for index, result in enumerate(results):
+        print_event(index, result, args.bucket_ms, proxy is not None)
+
+    report = {'timestamp': datetime.now().isoformat(), 'base_url': args.base_url, 'targets': targets,
+              'settings': {k: v for k, v in vars(args).items() if k != 'output'},
+              'requests': len(run['samples']), 'expiries': results,
+              'proxy': proxy.summary() if proxy else None}
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n{BLUE}JSON report saved to: {args.output}{RESET}\n")
+    sys.exit(1 if any(result['errors'] for result in results) else 0)
+
+
+if __name__ == "__main__":
+    main()
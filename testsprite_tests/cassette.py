@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Record/Replay HTTP Cassettes for the API Test Runners
+
+A cassette is a gzip-compressed JSON file of request/response pairs
+(status, headers, body and the recorded latency). It is plugged into a
+requests.Session as a transport adapter:
+- record: requests go to the network and every exchange is saved
+- replay: responses are served from memory with zero network I/O
+- verify: requests go to the network and latency is compared with the cassette
+
+Exchanges are matched on method, path and a normalized query (parameters
+sorted, blank values kept). Repeated requests for the same key are replayed
+in recorded order, cycling when the recording runs out.
+
+Usage (from the runners):
+    python3 testsprite_tests/comprehensive_api_tests.py --cassette api.cassette.json.gz --cassette-mode record
+    python3 testsprite_tests/comprehensive_api_tests.py --cassette api.cassette.json.gz --cassette-mode replay
+    python3 testsprite_tests/cassette.py show api.cassette.json.gz
+"""
+
+import argparse
+import base64
+import gzip
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from perf_stats import percentile
+
+# Color codes for terminal output
+GREEN = '\033[92m'
+RED = '\033[91m'
+YELLOW = '\033[93m'
+BLUE = '\033[94m'
+BOLD = '\033[1m'
+RESET = '\033[0m'
+
+MODES = ('record', 'replay', 'verify')
+
+# Headers describing the wire encoding; bodies are stored decoded
+_WIRE_HEADERS = ('content-encoding', 'transfer-encoding', 'content-length', 'connection', 'keep-alive')
+
+# Request headers worth keeping for debugging (everything else is dropped)
+_RECORDED_REQUEST_HEADERS = ('accept', 'accept-encoding', 'content-type')
+
+MatchKey = Tuple[str, str, str]
+
+
+class CassetteMiss(requests.RequestException):
+    """
+    Raised in replay mode when no recorded exchange matches a request.
+
+    Not a ConnectionError: a miss is final, so ResilientSession must not
+    retry it or count it against the endpoint's circuit breaker.
+    """
+
+
+def normalize_query(query: str) -> str:
+    """Canonical query string: parameters sorted, blank values kept"""
+    return '&'.join(f"{k}={v}" for k, v in sorted(parse_qsl(query, keep_blank_values=True)))
+
+
+def match_key(method: str, url: str) -> MatchKey:
+    """Key used to match a request against recorded exchanges"""
+    parts = urlsplit(url)
+    return method.upper(), parts.path or '/', normalize_query(parts.query)
+
+
+class Cassette:
+    """In-memory collection of recorded exchanges"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: List[Dict] = []
+        self._index: Dict[MatchKey, List[Dict]] = {}
+        self._cursor: Dict[MatchKey, int] = {}
+
+    @classmethod
+    def load(cls, path: str) -> 'Cassette':
+        """Read a cassette file"""
+        cassette = cls(path)
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            doc = json.load(f)
+        for entry in doc.get('interactions', []):
+            cassette._add(entry)
+        return cassette
+
+    def save(self) -> None:
+        """Write the cassette (compact JSON, gzip-compressed)"""
+        doc = {
+            'version': 1,
+            'recorded_at': datetime.now().isoformat(),
+            'interactions': self.entries,
+        }
+        with gzip.open(self.path, 'wt', encoding='utf-8') as f:
+            json.dump(doc, f, separators=(',', ':'))
+
+    def _add(self, entry: Dict) -> None:
+        self.entries.append(entry)
+        key = (entry['method'], entry['path'], entry['query'])
+        self._index.setdefault(key, []).append(entry)
+
+    def record(self, request: requests.PreparedRequest, response: requests.Response, elapsed_ms: float) -> None:
+        """Store one exchange"""
+        method, path, query = match_key(request.method, request.url)
+        body = response.content
+        try:
+            stored_body, body_encoding = body.decode('utf-8'), 'utf-8'
+        except UnicodeDecodeError:
+            stored_body, body_encoding = base64.b64encode(body).decode('ascii'), 'base64'
+
+        self._add({
+            'method': method,
+            'path': path,
+            'query': query,
+            'request_headers': {k.lower(): v for k, v in request.headers.items()
+                                if k.lower() in _RECORDED_REQUEST_HEADERS},
+            'status': response.status_code,
+            'reason': response.reason,
+            'headers': {k.lower(): v for k, v in response.headers.items() if k.lower() not in _WIRE_HEADERS},
+            'body': stored_body,
+            'body_encoding': body_encoding,
+            'elapsed_ms': round(elapsed_ms, 3),
+        })
+
+    def next_match(self, key: MatchKey) -> Optional[Dict]:
+        """Return the next recorded exchange for a key (cycling), or None"""
+        candidates = self._index.get(key)
+        if not candidates:
+            return None
+        position = self._cursor.get(key, 0)
+        self._cursor[key] = position + 1
+        return candidates[position % len(candidates)]
+
+    def recorded_latencies(self) -> Dict[MatchKey, List[float]]:
+        """Recorded elapsed_ms samples per key"""
+        return {key: [e['elapsed_ms'] for e in entries] for key, entries in self._index.items()}
+
+
+class CassetteAdapter(BaseAdapter):
+    """requests transport adapter implementing record, replay and verify modes"""
+
+    def __init__(self, cassette: Cassette, mode: str):
+        super().__init__()
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.cassette = cassette
+        self.mode = mode
+        self.live = HTTPAdapter() if mode != 'replay' else None
+        self.live_latencies: Dict[MatchKey, List[float]] = {}
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        key = match_key(request.method, request.url)
+
+        if self.mode == 'replay':
+            entry = self.cassette.next_match(key)
+            if entry is None:
+                raise CassetteMiss(f"No recorded response for {key[0]} {key[1]}?{key[2]}", request=request)
+            return self._build_response(request, entry)
+
+        start = time.perf_counter()
+        response = self.live.send(request, stream=False, timeout=timeout, verify=verify,
+                                  cert=cert, proxies=proxies)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        if self.mode == 'record':
+            self.cassette.record(request, response, elapsed_ms)
+        else:
+            self.live_latencies.setdefault(key, []).append(elapsed_ms)
+        return response
+
+    def _build_response(self, request: requests.PreparedRequest, entry: Dict) -> requests.Response:
+        """Materialize a recorded exchange as a requests.Response"""
+        if entry.get('body_encoding') == 'base64':
+            content = base64.b64decode(entry['body'])
+        else:
+            content = entry['body'].encode('utf-8')
+
+        response = requests.Response()
+        response.status_code = entry['status']
+        response.reason = entry.get('reason', '')
+        response.headers = CaseInsensitiveDict(entry.get('headers', {}))
+        response.headers['Content-Length'] = str(len(content))
+        response._content = content
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.elapsed = timedelta(milliseconds=entry.get('elapsed_ms', 0))
+        response.connection = self
+        return response
+
+    def close(self):
+        if self.live is not None:
+            self.live.close()
+
+    def latency_drift(self) -> List[Dict]:
+        """Compare live latencies (verify mode) with the recorded ones, per key"""
+        recorded = self.cassette.recorded_latencies()
+        rows = []
+        for key, live in sorted(self.live_latencies.items()):
+            base = recorded.get(key, [])
+            rows.append({
+                'key': key,
+                'recorded_p50': percentile(base, 50) if base else None,
+                'live_p50': percentile(live, 50),
+                'change_pct': ((percentile(live, 50) - percentile(base, 50)) / percentile(base, 50) * 100)
+                if base and percentile(base, 50) > 0 else None,
+            })
+        return rows
+
+
+def install(session: requests.Session, path: str, mode: str) -> CassetteAdapter:
+    """Mount a cassette adapter on a session for http:// and https://"""
+    if mode == 'replay' or (mode == 'verify' and os.path.exists(path)):
+        cassette = Cassette.load(path)
+    elif mode == 'verify':
+        raise FileNotFoundError(f"Cassette not found: {path}")
+    else:
+        cassette = Cassette(path)
+
+    adapter = CassetteAdapter(cassette, mode)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return adapter
+
+
+def finish(adapter: CassetteAdapter) -> None:
+    """Save a recording or print the verify-mode latency comparison"""
+    if adapter.mode == 'record':
+        adapter.cassette.save()
+        size = os.path.getsize(adapter.cassette.path)
+        print(f"{BLUE}Cassette saved: {adapter.cassette.path} "
+              f"({len(adapter.cassette.entries)} exchanges, {size} bytes){RESET}\n")
+    elif adapter.mode == 'verify':
+        print_drift(adapter.latency_drift())
+
+
+def print_drift(rows: List[Dict]) -> None:
+    """Print live vs recorded median latency per request key"""
+    print(f"\n{BLUE}{BOLD}Live vs recorded latency (p50){RESET}")
+    print(f"{'Request':<60} {'Recorded':>9} {'Live':>9} {'Change':>8}")
+    for row in rows:
+        method, path, query = row['key']
+        label = f"{method} {path}" + (f"?{query}" if query else "")
+        if row['recorded_p50'] is None:
+            print(f"{label[:60]:<60} {'-':>9} {row['live_p50']:>7.0f}ms {YELLOW}{'new':>8}{RESET}")
+            continue
+        change = row['change_pct'] or 0.0
+        color = RED if change > 20 else GREEN
+        print(f"{label[:60]:<60} {row['recorded_p50']:>7.0f}ms {row['live_p50']:>7.0f}ms "
+              f"{color}{change:>+7.1f}%{RESET}")
+    print()
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the shared --cassette/--cassette-mode options to a runner's parser"""
+    parser.add_argument('--cassette', help="Cassette file (gzip JSON) to record to or replay from")
+    parser.add_argument('--cassette-mode', choices=MODES, default='replay',
+                        help="record: hit the network and save; replay: serve from the cassette; "
+                             "verify: hit the network and compare latency with the cassette")
+
+
+def main():
+    """Show the contents of a cassette"""
+    parser = argparse.ArgumentParser(description="Inspect an API cassette")
+    parser.add_argument('command', choices=['show'])
+    parser.add_argument('path')
+    args = parser.parse_args()
+
+    try:
+        cassette = Cassette.load(args.path)
+    except (OSError, ValueError) as e:
+        print(f"{RED}Error: {e}{RESET}")
+        sys.exit(1)
+
+    print(f"{BOLD}{args.path}: {len(cassette.entries)} exchanges{RESET}")
+    for entry in cassette.entries:
+        label = f"{entry['method']} {entry['path']}" + (f"?{entry['query']}" if entry['query'] else "")
+        print(f"  {label:<60} {entry['status']:>4} {len(entry['body']):>8}B {entry['elapsed_ms']:>8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+"""
+Realtime Analytics Dashboard Polling Simulation
+
+The admin dashboard polls /api/analytics/realtime and the /api/analytics
+routes, and during campaigns several staff keep it open at once. Every
+realtime poll runs three GA4 reports, so dashboards are not free: they
+compete with shopper traffic for the same server. This runs N dashboard
+clients, each polling every endpoint at its own interval with jitter, in
+steps of increasing N (e.g. 1,5,10,25), for as long as asked, and reports:
+- Poll latency per step and per endpoint, and how it grows per added
+  dashboard (ms of p50/p99 per client)
+- Latency stability over time: p50/p99 per window and endpoint, drift (ms per minute)
+  and the coefficient of variation of the window p50s
+- Overlapping polls: a poll fired while the previous one to the same
+  endpoint was still in flight (setInterval does not wait)
+- Shopper impact: a probe requesting a shopper endpoint once a second,
+  measured with no dashboards (baseline) and in every step
+- Server-side growth seen through the health endpoints: every numeric
+  field they return is sampled over the whole run and its change per hour
+  reported (today that is the cache occupancy; memory fields such as
+  memory.heapUsed are picked up as soon as a health route exposes them)
+
+Each dashboard is its own browser: a pool of 6 connections. Clients start
+at a random phase within each interval, as staff open the dashboard at
+different moments.
+
+Usage:
+    python3 testsprite_tests/dashboard_polling.py
+    python3 testsprite_tests/dashboard_polling.py --clients 1,5,10,25 --duration 600 --jitter 0.2
+    python3 testsprite_tests/dashboard_polling.py --poll /api/analytics/realtime=5 --poll '/api/analytics?type=dashboard=15'
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import statistics
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from aio_client import AsyncHTTPClient, ClientError
+from comprehensive_api_tests import BASE_URL, GREEN, RED, YELLOW, BLUE, CYAN, BOLD, RESET
+from metrics_probe import BROWSER_CONNECTIONS
+from perf_stats import percentile, slope, summarize
+
+REPORT_FILE = "testsprite_tests/dashboard_polling_report.json"
+
+# (path, poll interval in seconds) for one open dashboard
+DEFAULT_POLLS: List[Tuple[str, float]] = [
+    ('/api/analytics/realtime', 10.0),
+    ('/api/analytics?type=real-time', 10.0),
+    ('/api/analytics?type=dashboard&timeRange=7d', 30.0),
+    ('/api/analytics/enhanced?timeRange=7d', 60.0),
+    ('/api/analytics/shopify?timeRange=7d', 60.0),
+]
+DEFAULT_HEALTH = ['/api/cache/health', '/api/health-check']
+SHOPPER_PATH = '/api/products'
+
+MEMORY_FIELD = re.compile(r'heap|rss|memory', re.IGNORECASE)
+
+
+@dataclass
+class PollSample:
+    """One completed poll (or shopper probe request)"""
+    t: float  # seconds since the step started
+    path: str
+    latency_ms: float
+    status: str
+    overlapped: bool = False
+
+
+def parse_poll(text: str) -> Tuple[str, float]:
+    """argparse type for PATH=SECONDS (the last '=' separates the interval)"""
+    path, sep, seconds = text.rpartition('=')
+    try:
+        interval = float(seconds)
+    except ValueError:
+        interval = 0.0
+    if not sep or not path.startswith('/') or interval <= 0:
+        raise argparse.ArgumentTypeError(f"expected PATH=SECONDS, got {text!r}")
+    return path, interval
+
+
+def numeric_fields(data, prefix: str = '') -> Dict[str, float]:
+    """Numeric leaves of a JSON object as dotted paths (lists are skipped)"""
+    fields: Dict[str, float] = {}
+    if isinstance(data, dict):
+        for key, value in data.items():
+            fields.update(numeric_fields(value, f"{prefix}{key}."))
+    elif isinstance(data, (int, float)) and not isinstance(data, bool):
+        fields[prefix[:-1]] = float(data)
+    return fields
+
+
+def _stats(latencies: List[float]) -> Dict[str, Optional[float]]:
+    return {
+        'p50_ms': round(percentile(latencies, 50), 2) if latencies else None,
+        'p99_ms': round(percentile(latencies, 99), 2) if latencies else None,
+    }
+
+
+# ==================== CLIENTS ====================
+
+async def _timed_get(client: AsyncHTTPClient, path: str) -> Tuple[float, str]:
+    start = time.perf_counter()
+    try:
+        response = await client.get(path)
+        status = str(response.status)
+    except ClientError:
+        status = 'error'
+    return (time.perf_counter() - start) * 1000, status
+
+
+async def dashboard(base_url: str, polls: List[Tuple[str, float]], rng: random.Random, jitter: float,
+                    duration_s: float, t0: float, samples: List[PollSample], timeout: float) -> None:
+    """One open dashboard: every endpoint on its own jittered fixed-rate timer"""
+    async with AsyncHTTPClient(base_url, max_connections=BROWSER_CONNECTIONS, timeout=timeout) as client:
+        async def poll(path: str, overlapped: bool) -> None:
+            latency, status = await _timed_get(client, path)
+            samples.append(PollSample(time.perf_counter() - t0, path, latency, status, overlapped))
+
+        async def timer(path: str, interval: float) -> None:
+            fired: List[asyncio.Task] = []
+            next_at = rng.uniform(0, interval)
+            while next_at < duration_s:
+                await asyncio.sleep(max(next_at - (time.perf_counter() - t0), 0))
+                overlapped = bool(fired) and not fired[-1].done()
+                fired.append(asyncio.ensure_future(poll(path, overlapped)))
+                next_at += interval * rng.uniform(1 - jitter, 1 + jitter)
+            await asyncio.gather(*fired)
+
+        await asyncio.gather(*(timer(path, interval) for path, interval in polls))
+
+
+async def shopper_probe(base_url: str, path: str, interval_s: float, duration_s: float, t0: float,
+                        samples: List[PollSample], timeout: float) -> None:
+    """A shopper request every interval_s, to see what the dashboards cost shoppers"""
+    async with AsyncHTTPClient(base_url, max_connections=1, timeout=timeout) as client:
+        next_at = 0.0
+        while next_at < duration_s:
+            await asyncio.sleep(max(next_at - (time.perf_counter() - t0), 0))
+            latency, status = await _timed_get(client, path)
+            samples.append(PollSample(time.perf_counter() - t0, path, latency, status))
+            next_at += interval_s
+
+
+async def health_sampler(base_url: str, paths: List[str], interval_s: float, run_t0: float,
+                         series: Dict[str, List[Tuple[float, float]]], stop: asyncio.Event, timeout: float) -> None:
+    """Sample every numeric field of the health endpoints until stopped"""
+    async with AsyncHTTPClient(base_url, max_connections=1, timeout=timeout) as client:
+        while not stop.is_set():
+            for path in paths:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    data = response.json() if response.status == 200 else {}
+                except (ClientError, ValueError):
+                    continue
+                now = time.perf_counter() - run_t0
+                series.setdefault(f"{path} response_ms", []).append((now, (time.perf_counter() - start) * 1000))
+                for name, value in numeric_fields(data).items():
+                    series.setdefault(f"{path} {name}", []).append((now, value))
+            try:
+                await asyncio.wait_for(stop.wait(), interval_s)
+            except asyncio.TimeoutError:
+                pass
+
+
+# ==================== STEPS ====================
+
+async def run_step(base_url: str, clients: int, polls: List[Tuple[str, float]], duration_s: float, jitter: float,
+                   shopper_path: Optional[str], window_s: float, seed: int, timeout: float) -> Dict:
+    """Hold `clients` dashboards (plus the shopper probe) for duration_s"""
+    samples: List[PollSample] = []
+    shopper: List[PollSample] = []
+    t0 = time.perf_counter()
+    tasks = [dashboard(base_url, polls, random.Random(seed * 1000 + i), jitter, duration_s, t0, samples, timeout)
+             for i in range(clients)]
+    if shopper_path:
+        tasks.append(shopper_probe(base_url, shopper_path, 1.0, duration_s, t0, shopper, timeout))
+
+    async def progress() -> None:
+        start = 0.0
+        while start + window_s <= duration_s:
+            await asyncio.sleep(max(start + window_s - (time.perf_counter() - t0), 0))
+            window = [s.latency_ms for s in samples if start <= s.t < start + window_s and s.status != 'error']
+            stats = _stats(window)
+            if window:
+                print(f"  +{start + window_s:>5.0f}s  {len(window):>5} polls  p50 {stats['p50_ms']:>6.0f}ms  "
+                      f"p99 {stats['p99_ms']:>6.0f}ms")
+            start += window_s
+
+    reporter = asyncio.ensure_future(progress()) if clients else None
+    await asyncio.gather(*tasks)
+    if reporter:
+        reporter.cancel()
+    return summarize_step(clients, duration_s, samples, shopper, window_s)
+
+
+def stability(samples: List[PollSample], duration_s: float, window_s: float) -> Dict:
+    """p50/p99 per full window, drift of the window p50 (ms per minute) and its coefficient of variation"""
+    windows = []
+    start = 0.0
+    while start + window_s <= duration_s:
+        latencies = [s.latency_ms for s in samples if start <= s.t < start + window_s and s.status != 'error']
+        if latencies:
+            windows.append({'start_s': start, 'polls': len(latencies), **_stats(latencies)})
+        start += window_s
+    p50s = [w['p50_ms'] for w in windows]
+    return {
+        'windows': windows,
+        'drift_ms_per_min': round(slope([w['start_s'] / 60 for w in windows], p50s), 2) if len(windows) > 1 else None,
+        'window_p50_cv': (round(statistics.pstdev(p50s) / statistics.mean(p50s), 3)
+                          if len(windows) > 1 and statistics.mean(p50s) > 0 else None),
+    }
+
+
+def summarize_step(clients: int, duration_s: float, samples: List[PollSample], shopper: List[PollSample],
+                   window_s: float) -> Dict:
+    ok = [s for s in samples if s.status != 'error']
+    per_path = {}
+    for path in sorted({s.path for s in samples}):
+        group = [s for s in samples if s.path == path]
+        per_path[path] = {
+            'polls': len(group),
+            **_stats([s.latency_ms for s in group if s.status != 'error']),
+            'overlapped': sum(1 for s in group if s.overlapped),
+            'errors': sum(1 for s in group if s.status == 'error'),
+            **stability(group, duration_s, window_s),
+        }
+    # endpoints differ by an order of magnitude, so stability is tracked on the most-polled one
+    primary = max(per_path, key=lambda path: per_path[path]['polls'], default=None)
+    shopper_ok = [s.latency_ms for s in shopper if s.status != 'error']
+    return {
+        'clients': clients,
+        'duration_s': duration_s,
+        'polls': len(samples),
+        'poll_rate_rps': round(len(samples) / duration_s, 3) if duration_s > 0 else 0.0,
+        'latency_ms': {k: round(v, 2) for k, v in summarize([s.latency_ms for s in ok]).items()},
+        'errors': len(samples) - len(ok),
+        'overlapped': sum(1 for s in samples if s.overlapped),
+        'per_path': per_path,
+        'stability_path': primary,
+        'drift_ms_per_min': per_path[primary]['drift_ms_per_min'] if primary else None,
+        'window_p50_cv': per_path[primary]['window_p50_cv'] if primary else None,
+        'shopper': {'requests': len(shopper), 'errors': len(shopper) - len(shopper_ok), **_stats(shopper_ok),
+                    **stability(shopper, duration_s, window_s)},
+    }
+
+
+def summarize_health(series: Dict[str, List[Tuple[float, float]]]) -> Dict[str, Dict]:
+    """First/last value and change per hour of every sampled health field"""
+    fields = {}
+    for name, points in sorted(series.items()):
+        times, values = [t for t, _ in points], [v for _, v in points]
+        fields[name] = {
+            'samples': len(points),
+            'first': values[0],
+            'last': values[-1],
+            'min': min(values),
+            'max': max(values),
+            'per_hour': round(slope(times, values) * 3600, 3) if len(points) > 1 else None,
+        }
+    return fields
+
+
+async def run_simulation(base_url: str, steps: List[int], polls: List[Tuple[str, float]], duration_s: float,
+                         baseline_s: float, jitter: float, shopper_path: Optional[str], health_paths: List[str],
+                         health_interval_s: float, window_s: float, seed: int, timeout: float) -> Dict:
+    """Baseline (shopper probe only), then every step, with the health sampler running throughout"""
+    series: Dict[str, List[Tuple[float, float]]] = {}
+    stop = asyncio.Event()
+    run_t0 = time.perf_counter()
+    sampler = asyncio.ensure_future(health_sampler(base_url, health_paths, health_interval_s, run_t0, series, stop,
+                                                   timeout)) if health_paths else None
+    results = []
+    marks = []
+    try:
+        if baseline_s > 0 and shopper_path:
+            print(f"{CYAN}Baseline: shopper probe only for {baseline_s:g}s{RESET}")
+            results.append(await run_step(base_url, 0, polls, baseline_s, jitter, shopper_path, window_s, seed,
+                                          timeout))
+        for clients in steps:
+            marks.append({'clients': clients, 'start_s': round(time.perf_counter() - run_t0, 1)})
+            print(f"{CYAN}{clients} dashboard(s) for {duration_s:g}s{RESET}")
+            results.append(await run_step(base_url, clients, polls, duration_s, jitter, shopper_path, window_s,
+                                          seed, timeout))
+    finally:
+        stop.set()
+        if sampler:
+            await sampler
+    return {'steps': results, 'step_marks': marks, 'health': summarize_health(series)}
+
+
+# ==================== REPORT ====================
+
+def scaling(steps: List[Dict]) -> Dict:
+    """Growth of poll and shopper latency per added dashboard"""
+    polled = [s for s in steps if s['clients'] and s['latency_ms']['count']]
+    shopped = [s for s in steps if s['shopper']['p50_ms'] is not None]
+    result = {'poll_p50_ms_per_client': None, 'poll_p99_ms_per_client': None, 'shopper_p50_ms_per_client': None}
+    if len(polled) > 1:
+        clients = [s['clients'] for s in polled]
+        result['poll_p50_ms_per_client'] = round(slope(clients, [s['latency_ms']['p50'] for s in polled]), 3)
+        result['poll_p99_ms_per_client'] = round(slope(clients, [s['latency_ms']['p99'] for s in polled]), 3)
+    if len(shopped) > 1:
+        result['shopper_p50_ms_per_client'] = round(
+            slope([s['clients'] for s in shopped], [s['shopper']['p50_ms'] for s in shopped]), 3)
+    return result
+
+
+def _ms(value: Optional[float]) -> str:
+    return f"{value:>6.0f}ms" if value is not None else f"{'-':>8}"
+
+
+def _drift(row: Dict) -> str:
+    return f"{row['drift_ms_per_min']:>+8.1f}ms" if row['drift_ms_per_min'] is not None else f"{'-':>10}"
+
+
+def _cv(row: Dict) -> str:
+    return f"{row['window_p50_cv']:>6.2f}" if row['window_p50_cv'] is not None else f"{'-':>6}"
+
+
+def print_report(result: Dict, growth: Dict) -> None:
+    steps = result['steps']
+    print(f"\n{CYAN}{BOLD}{'Clients':>7} {'Polls':>7} {'Req/s':>7} {'p50':>8} {'p99':>8} {'Drift/min':>10} "
+          f"{'CV':>6} {'Overlap':>8} {'Errors':>7} {'Shop p50':>9} {'Shop p99':>9}{RESET}")
+    for step in steps:
+        latency = step['latency_ms'] if step['latency_ms']['count'] else {}
+        errors = f"{RED}{step['errors']:>7}{RESET}" if step['errors'] else f"{0:>7}"
+        print(f"{step['clients']:>7} {step['polls']:>7} {step['poll_rate_rps']:>7.2f} {_ms(latency.get('p50'))} "
+              f"{_ms(latency.get('p99'))} {_drift(step)} {_cv(step)} {step['overlapped']:>8} {errors} "
+              f" {_ms(step['shopper']['p50_ms'])} {_ms(step['shopper']['p99_ms'])}")
+
+    primary = next((s['stability_path'] for s in steps if s['stability_path']), None)
+    if primary:
+        print(f"\nDrift/CV: window p50 of {primary} (per endpoint below)")
+    if growth['poll_p50_ms_per_client'] is not None:
+        print(f"Poll latency grows {growth['poll_p50_ms_per_client']:+.1f}ms p50 / "
+              f"{growth['poll_p99_ms_per_client']:+.1f}ms p99 per added dashboard")
+    if growth['shopper_p50_ms_per_client'] is not None:
+        color = RED if growth['shopper_p50_ms_per_client'] > 1 else GREEN
+        print(f"{color}Shopper p50 changes {growth['shopper_p50_ms_per_client']:+.2f}ms per added dashboard{RESET}")
+
+    largest = max((s for s in steps if s['clients']), key=lambda s: s['clients'], default=None)
+    if largest:
+        print(f"\n{BOLD}Per endpoint at {largest['clients']} dashboard(s){RESET}")
+        print(f"  {'Path':<46} {'Polls':>6} {'p50':>8} {'p99':>8} {'Drift/min':>10} {'CV':>6} {'Overlap':>8} "
+              f"{'Errors':>7}")
+        for path, row in largest['per_path'].items():
+            print(f"  {path:<46} {row['polls']:>6} {_ms(row['p50_ms'])} {_ms(row['p99_ms'])} {_drift(row)} "
+                  f"{_cv(row)} {row['overlapped']:>8} {row['errors']:>7}")
+
+    health = result['health']
+    if health:
+        print(f"\n{BOLD}Health endpoint fields over the run{RESET}")
+        print(f"  {'Field':<52} {'First':>10} {'Last':>10} {'Per hour':>10}")
+        for name, row in health.items():
+            per_hour = f"{row['per_hour']:>+10.1f}" if row['per_hour'] is not None else f"{'-':>10}"
+            print(f"  {name:<52} {row['first']:>10.1f} {row['last']:>10.1f} {per_hour}")
+        if not any(MEMORY_FIELD.search(name) for name in health):
+            print(f"  {YELLOW}No memory figures in the health responses; growth above is what they expose{RESET}")
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Simulate concurrent admin dashboards polling the analytics routes")
+    parser.add_argument('--base-url', default=BASE_URL)
+    parser.add_argument('--clients', default='1,5,10', help="Comma-separated dashboard counts, one step each")
+    parser.add_argument('--duration', type=float, default=120.0, help="Seconds per step")
+    parser.add_argument('--poll', type=parse_poll, action='append', metavar='PATH=SECONDS',
+                        help="Endpoint and poll interval (repeatable; replaces the defaults)")
+    parser.add_argument('--jitter', type=float, default=0.1, help="Interval jitter as a fraction (0.1 = +/-10%%)")
+    parser.add_argument('--baseline', type=float, default=15.0,
+                        help="Seconds of shopper probe with no dashboards first (0 to skip)")
+    parser.add_argument('--shopper-path', default=SHOPPER_PATH, help="Shopper endpoint probed once a second ('' off)")
+    parser.add_argument('--health', default=','.join(DEFAULT_HEALTH), help="Comma-separated health endpoints")
+    parser.add_argument('--health-interval', type=float, default=15.0, help="Seconds between health samples")
+    parser.add_argument('--window', type=float, default=30.0, help="Stability window in seconds")
+    parser.add_argument('--seed', type=int, default=11)
+    parser.add_argument('--timeout', type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument('--output', default=REPORT_FILE)
+    args = parser.parse_args()
+
+    try:
+        steps = [int(v) for v in args.clients.split(',') if v.strip()]
+    except ValueError:
+        parser.error("--clients must be comma-separated integers")
+    if not steps or min(steps) < 1:
+        parser.error("--clients needs at least one positive count")
+    if not 0 <= args.jitter < 1:
+        parser.error("--jitter must be in [0, 1)")
+    polls = args.poll or DEFAULT_POLLS
+    health_paths = [p.strip() for p in args.health.split(',') if p.strip()]
+
+    print(f"\n{BLUE}{BOLD}{'='*80}")
+    print("Lab Essentials E-Commerce - Analytics Dashboard Polling Simulation")
+    print(f"Testing against: {args.base_url}")
+    print(f"Dashboards: {args.clients} | {args.duration:g}s per step | Jitter: {args.jitter:.0%} | "
+          f"Shopper probe: {args.shopper_path or 'off'}")
+    print(f"{'='*80}{RESET}\n")
+    for path, interval in polls:
+        print(f"  every {interval:>5g}s  {path}")
+    print()
+
+    try:
+        result = asyncio.run(run_simulation(args.base_url, steps, polls, args.duration, args.baseline, args.jitter,
+                                            args.shopper_path or None, health_paths, args.health_interval,
+                                            args.window, args.seed, args.timeout))
+    except KeyboardInterrupt:
+        print(f"\n{YELLOW}Simulation interrupted by user{RESET}")
+        sys.exit(1)
+    except (ClientError, OSError, ValueError) as e:
+        print(f"{RED}Error: {e}{RESET}")
+        sys.exit(1)
+
+    growth = scaling(result['steps'])
+    print_report(result, growth)
+    report = {'timestamp': datetime.now().isoformat(), 'base_url': args.base_url,
+              'settings': {**{k: v for k, v in vars(args).items() if k not in ('output', 'poll')},
+                           'polls': [{'path': path, 'interval_s': interval} for path, interval in polls]},
+              'scaling': growth, **result}
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n{BLUE}JSON report saved to: {args.output}{RESET}\n")
+    sys.exit(1 if any(step['errors'] or step['shopper']['errors'] for step in result['steps']) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Multi-Process Distributed Load Generator for the Storefront API
+
+A single Python process tops out long before a production Next.js
+deployment does (GIL, per-request parsing). The coordinator splits a
+target request rate across N local worker processes and, optionally,
+remote worker agents, starts them at the same moment, and merges their
+results:
+- Every worker sends an open-loop arrival schedule (latency is measured
+  from the scheduled send time, so a slow server cannot slow the load)
+- Latencies go into LatencyHistogram buckets that merge exactly by adding
+  counts, so the combined p95/p99 are those of one big histogram rather
+  than an average of per-worker percentiles
+- Each worker reports its CPU use and dropped arrivals, showing whether
+  the client side was the bottleneck
+
+Remote agents speak newline-delimited JSON over TCP: the coordinator sends
+one {"type": "run", "spec": {...}} line and the agent answers with one
+{"type": "result", ...} line (or {"type": "error", ...}). An agent fans its
+share out over its own worker processes before replying. Agents run
+whatever spec they receive, so they listen on 127.0.0.1 unless --host says
+otherwise; only expose them on trusted networks.
+
+Usage:
+    python3 testsprite_tests/distributed_load.py run --rate 400 --duration 30 --workers 4
+    python3 testsprite_tests/distributed_load.py serve --host 0.0.0.0 --port 7700 --workers 8
+    python3 testsprite_tests/distributed_load.py run --rate 2000 --workers 4 --remote 10.0.0.5:7700,10.0.0.6:7700
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from aio_client import AsyncHTTPClient, ClientError
+from comprehensive_api_tests import BASE_URL, GREEN, RED, YELLOW, BLUE, CYAN, BOLD, RESET
+from perf_stats import LatencyHistogram
+
+REPORT_FILE = "testsprite_tests/distributed_load_report.json"
+
+# Read-only storefront scenarios: (name, path, query, weight)
+SCENARIOS: List[Tuple[str, str, Dict[str, str], int]] = [
+    ("products", "/api/products", {"limit": "20"}, 4),
+    ("featured-products", "/api/featured-products", {}, 3),
+    ("collections", "/api/collections", {}, 2),
+    ("menu", "/api/menu", {}, 2),
+    ("collection-products", "/api/collection-products", {"handle": "microscopes"}, 2),
+    ("product-by-handle", "/api/product-by-handle", {"handle": "revelation-series"}, 3),
+    ("health-check", "/api/health-check", {}, 1),
+]
+
+DEFAULT_AGENT_PORT = 7700
+
+# Seconds between handing out specs and the common start, so every worker begins together
+START_DELAY_S = 1.0
+
+# A worker using more CPU than this was close to being the bottleneck itself
+CLIENT_CPU_LIMIT = 0.8
+
+
+@dataclass
+class WorkerStats:
+    """What one worker observed; histograms are keyed by scenario name"""
+    worker: str
+    target_rate: float
+    sent: int = 0
+    dropped: int = 0
+    errors: int = 0
+    statuses: Dict[str, int] = field(default_factory=dict)
+    histograms: Dict[str, LatencyHistogram] = field(default_factory=dict)
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            'worker': self.worker, 'target_rate': self.target_rate, 'sent': self.sent,
+            'dropped': self.dropped, 'errors': self.errors, 'statuses': self.statuses,
+            'histograms': {name: h.to_dict() for name, h in self.histograms.items()},
+            'wall_s': self.wall_s, 'cpu_s': self.cpu_s,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'WorkerStats':
+        stats = cls(data['worker'], data['target_rate'], data['sent'], data['dropped'], data['errors'],
+                    data['statuses'], wall_s=data['wall_s'], cpu_s=data['cpu_s'])
+        stats.histograms = {name: LatencyHistogram.from_dict(h) for name, h in data['histograms'].items()}
+        return stats
+
+
+# ==================== WORKER ====================
+
+async def _send(client: AsyncHTTPClient, scenario: Tuple, scheduled: float, stats: WorkerStats,
+                in_flight: List[int]) -> None:
+    name, path, query, _ = scenario
+    try:
+        response = await client.get(path, params=query)
+        key = str(response.status)
+        if not response.ok:
+            stats.errors += 1
+    except ClientError as e:
+        key = type(e).__name__
+        stats.errors += 1
+    finally:
+        in_flight[0] -= 1
+    stats.statuses[key] = stats.statuses.get(key, 0) + 1
+    stats.histograms.setdefault(name, LatencyHistogram()).record((time.perf_counter() - scheduled) * 1000)
+
+
+async def _generate(spec: Dict, stats: WorkerStats) -> None:
+    """Open-loop arrivals at spec['rate'] for spec['duration'] seconds"""
+    rng = random.Random(spec['seed'])
+    weights = [s[3] for s in SCENARIOS]
+    in_flight = [0]
+    tasks = []
+    interval = 1.0 / spec['rate']
+    total = int(spec['rate'] * spec['duration'])
+
+    async with AsyncHTTPClient(spec['base_url'], max_connections=spec['connections'],
+                               timeout=spec['timeout']) as client:
+        # Stagger the workers' schedules so their arrivals interleave instead of coinciding
+        start = time.perf_counter() + interval * spec.get('phase', 0.0)
+        for index in range(total):
+            scheduled = start + index * interval
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if in_flight[0] >= spec['max_in_flight']:
+                stats.dropped += 1
+                continue
+            scenario = rng.choices(SCENARIOS, weights)[0]
+            in_flight[0] += 1
+            stats.sent += 1
+            tasks.append(asyncio.ensure_future(_send(client, scenario, scheduled, stats, in_flight)))
+        await asyncio.gather(*tasks)
+
+
+def run_worker(spec: Dict) -> Dict:
+    """Process entry point: wait for the common start time, generate load, return serialized stats"""
+    stats = WorkerStats(spec['worker'], spec['rate'])
+    if spec['rate'] <= 0:
+        return stats.to_dict()
+    delay = spec['start_at'] - time.time()
+    if delay > 0:
+        time.sleep(delay)
+
+    wall, cpu = time.perf_counter(), time.process_time()
+    asyncio.run(_generate(spec, stats))
+    stats.wall_s = time.perf_counter() - wall
+    stats.cpu_s = time.process_time() - cpu
+    return stats.to_dict()
+
+
+def run_local(spec: Dict, workers: int) -> List[Dict]:
+    """Split a spec's rate over local worker processes and collect their stats"""
+    share = spec['rate'] / workers
+    specs = [{**spec, 'worker': f"{spec['worker']}/{i}", 'rate': share,
+              'seed': spec['seed'] * 1000 + i, 'phase': (spec.get('phase', 0.0) + i) / workers}
+             for i in range(workers)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(run_worker, specs))
+
+
+# ==================== REMOTE AGENTS ====================
+
+def serve(host: str, port: int, workers: int) -> None:
+    """Run as a remote agent: accept one run request per connection, reply with the results"""
+    with socket.create_server((host, port)) as server:
+        print(f"{CYAN}Agent listening on {host}:{port} with {workers} worker process(es){RESET}")
+        while True:
+            conn, address = server.accept()
+            with conn, conn.makefile('rwb') as stream:
+                try:
+                    message = json.loads(stream.readline())
+                    if not isinstance(message, dict) or message.get('type') != 'run':
+                        raise ValueError("expected a JSON object with type 'run'")
+                    spec = message['spec']
+                    print(f"  {address[0]}: {spec['rate']:.1f} req/s for {spec['duration']:.0f}s "
+                          f"against {spec['base_url']}")
+                    reply = {'type': 'result', 'workers': run_local(spec, workers)}
+                except Exception as e:
+                    # A malformed request fails that run only, never the agent
+                    print(f"  {RED}{address[0]}: rejected run: {type(e).__name__}: {e}{RESET}")
+                    reply = {'type': 'error', 'error': f"{type(e).__name__}: {e}"}
+                try:
+                    stream.write((json.dumps(reply) + "\n").encode('utf-8'))
+                    stream.flush()
+                except OSError:
+                    pass
+
+
+async def run_remote(address: str, spec: Dict) -> List[Dict]:
+    """Send a spec to a remote agent and wait for its merged-per-worker stats"""
+    host, _, port = address.rpartition(':')
+    reader, writer = await asyncio.open_connection(host, int(port or DEFAULT_AGENT_PORT), limit=2 ** 26)
+    try:
+        writer.write((json.dumps({'type': 'run', 'spec': spec}) + "\n").encode('utf-8'))
+        await writer.drain()
+        reply = json.loads(await reader.readline() or b'{}')
+    finally:
+        writer.close()
+    if reply.get('type') != 'result':
+        raise ValueError(f"agent {address} failed: {reply.get('error', 'no reply')}")
+    return reply['workers']
+
+
+# ==================== COORDINATOR ====================
+
+async def coordinate(args) -> List[WorkerStats]:
+    """Hand every slot its share of the rate and gather all worker stats"""
+    remotes = [r for r in (args.remote or '').split(',') if r]
+    slots = args.workers + len(remotes)
+    share = args.rate / slots
+    base = {
+        'base_url': args.base_url, 'duration': args.duration, 'timeout': args.timeout,
+        'connections': args.connections, 'max_in_flight': args.max_in_flight,
+        'start_at': time.time() + START_DELAY_S + (2.0 if remotes else 0.0),
+    }
+
+    loop = asyncio.get_running_loop()
+    jobs = []
+    if args.workers:
+        local = {**base, 'worker': 'local', 'rate': share * args.workers, 'seed': args.seed}
+        jobs.append(loop.run_in_executor(None, run_local, local, args.workers))
+    for i, address in enumerate(remotes):
+        remote = {**base, 'worker': address, 'rate': share, 'seed': args.seed + i + 1,
+                  'phase': (args.workers + i) / slots}
+        jobs.append(run_remote(address, remote))
+
+    results = []
+    for batch in await asyncio.gather(*jobs):
+        results.extend(WorkerStats.from_dict(w) for w in batch)
+    return results
+
+
+def _combined(histograms) -> LatencyHistogram:
+    combined = LatencyHistogram()
+    for histogram in histograms:
+        combined.merge(histogram)
+    return combined
+
+
+def merge(workers: List[WorkerStats]) -> Dict:
+    """Combine all workers: counters add up, histograms merge bucket by bucket"""
+    overall = _combined(h for w in workers for h in w.histograms.values())
+    scenarios: Dict[str, LatencyHistogram] = {}
+    statuses: Dict[str, int] = {}
+    for worker in workers:
+        for name, histogram in worker.histograms.items():
+            scenarios.setdefault(name, LatencyHistogram()).merge(histogram)
+        for key, n in worker.statuses.items():
+            statuses[key] = statuses.get(key, 0) + n
+
+    wall = max((w.wall_s for w in workers), default=0.0)
+    sent = sum(w.sent for w in workers)
+    return {
+        'target_rate': sum(w.target_rate for w in workers),
+        'achieved_rate': round(sent / wall, 2) if wall else 0.0,
+        'sent': sent,
+        'dropped': sum(w.dropped for w in workers),
+        'errors': sum(w.errors for w in workers),
+        'statuses': statuses,
+        'latency_ms': {k: round(v, 2) for k, v in overall.summary().items()},
+        'scenarios': {name: {k: round(v, 2) for k, v in h.summary().items()} for name, h in sorted(scenarios.items())},
+        'workers': [{
+            'worker': w.worker,
+            'target_rate': round(w.target_rate, 2),
+            'achieved_rate': round(w.sent / w.wall_s, 2) if w.wall_s else 0.0,
+            'dropped': w.dropped,
+            'errors': w.errors,
+            'cpu_utilization': round(w.cpu_s / w.wall_s, 3) if w.wall_s else 0.0,
+            'p95_ms': round(_combined(w.histograms.values()).percentile(95), 2),
+        } for w in workers],
+    }
+
+
+def print_report(merged: Dict) -> None:
+    """Print the merged latency table, per-worker load and client saturation warnings"""
+    print(f"{'Scenario':<22} {'Count':>7} {'p50':>9} {'p95':>9} {'p99':>9} {'Max':>9}")
+    for name, lat in list(merged['scenarios'].items()) + [('all', merged['latency_ms'])]:
+        label = f"{BOLD}{name:<22}{RESET}" if name == 'all' else f"{name:<22}"
+        print(f"{label} {lat['count']:>7} {lat['p50']:>7.0f}ms {lat['p95']:>7.0f}ms "
+              f"{lat['p99']:>7.0f}ms {lat['max']:>7.0f}ms")
+
+    print(f"\n{'Worker':<28} {'Target':>8} {'Achieved':>9} {'Dropped':>8} {'CPU':>6} {'p95':>9}")
+    saturated = []
+    for w in merged['workers']:
+        busy = w['cpu_utilization'] >= CLIENT_CPU_LIMIT or w['dropped'] > 0
+        if busy:
+            saturated.append(w['worker'])
+        color = YELLOW if busy else ''
+        print(f"{color}{w['worker']:<28} {w['target_rate']:>6.1f}/s {w['achieved_rate']:>7.1f}/s "
+              f"{w['dropped']:>8} {w['cpu_utilization']:>6.0%} {w['p95_ms']:>7.0f}ms{RESET if busy else ''}")
+
+    statuses = ', '.join(f"{k}: {v}" for k, v in sorted(merged['statuses'].items()))
+    color = GREEN if not merged['errors'] else RED
+    print(f"\nTarget {merged['target_rate']:.1f}/s | achieved {merged['achieved_rate']:.1f}/s | "
+          f"{color}errors {merged['errors']}{RESET} | dropped {merged['dropped']}")
+    print(f"Statuses: {statuses}")
+    if saturated:
+        print(f"{YELLOW}Client-side saturation on {len(saturated)} worker(s) (CPU >= {CLIENT_CPU_LIMIT:.0%} "
+              f"or dropped arrivals): add --workers or remote agents before trusting the latencies{RESET}")
+    print()
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Distributed multi-process load generator")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help="Coordinate a load run")
+    run_parser.add_argument('--base-url', default=BASE_URL)
+    run_parser.add_argument('--rate', type=float, default=200.0, help="Total requests per second")
+    run_parser.add_argument('--duration', type=float, default=20.0, help="Seconds of load")
+    run_parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Local worker processes")
+    run_parser.add_argument('--remote', help="Comma-separated host:port list of remote agents")
+    run_parser.add_argument('--connections', type=int, default=64, help="Connection pool size per worker")
+    run_parser.add_argument('--max-in-flight', type=int, default=512, help="Per-worker cap before arrivals drop")
+    run_parser.add_argument('--timeout', type=float, default=30.0, help="Per-request timeout in seconds")
+    run_parser.add_argument('--seed', type=int, default=42)
+    run_parser.add_argument('--output', default=REPORT_FILE)
+
+    serve_parser = subparsers.add_parser('serve', help="Run as a remote worker agent")
+    serve_parser.add_argument('--host', default='127.0.0.1',
+                              help="Interface to listen on (agents run any spec they receive)")
+    serve_parser.add_argument('--port', type=int, default=DEFAULT_AGENT_PORT)
+    serve_parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Worker processes")
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        try:
+            serve(args.host, args.port, args.workers)
+        except KeyboardInterrupt:
+            print(f"\n{YELLOW}Agent stopped{RESET}")
+        return
+
+    if args.workers < 0 or (args.workers == 0 and not args.remote):
+        parser.error("need at least one local worker or remote agent")
+
+    print(f"\n{BLUE}{BOLD}{'='*80}")
+    print("Lab Essentials E-Commerce - Distributed Load Run")
+    print(f"Testing against: {args.base_url}")
+    print(f"Rate: {args.rate:g} req/s for {args.duration:g}s | Local workers: {args.workers} | "
+          f"Remote agents: {args.remote or 'none'}")
+    print(f"{'='*80}{RESET}\n")
+
+    try:
+        workers = asyncio.run(coordinate(args))
+    except KeyboardInterrupt:
+        print(f"\n{YELLOW}Load run interrupted by user{RESET}")
+        sys.exit(1)
+    except (OSError, ValueError) as e:
+        print(f"{RED}Error: {e}{RESET}")
+        sys.exit(1)
+
+    merged = merge(workers)
+    print_report(merged)
+
+    report = {'timestamp': datetime.now().isoformat(), 'base_url': args.base_url,
+              'settings': {k: v for k, v in vars(args).items() if k not in ('output', 'command')},
+              **merged}
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"{BLUE}JSON report saved to: {args.output}{RESET}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+OpenMetrics and JUnit Exporters for the API Suite and the Quiz Validator
+
+Monitoring and CI cannot read the custom JSON/text reports, so the same
+results can also be written as:
+- OpenMetrics text (Prometheus-compatible): per-endpoint latency
+  histograms, pass/fail counters, budget headroom, quiz accuracy and
+  throughput gauges
+- JUnit XML with one testcase per test and its timing
+
+MetricsServer serves OpenMetrics from a callable on a local port, so a
+Prometheus scraper can watch a load run live (fed by a
+live_view.StatsAggregator).
+"""
+
+import math
+import threading
+import xml.etree.ElementTree as ET
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+OPENMETRICS_CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+# Latency histogram bucket bounds in seconds
+LATENCY_BUCKETS_S = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Sample = Tuple[str, Dict[str, str], float]
+
+
+# ==================== OPENMETRICS ====================
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class OpenMetricsWriter:
+    """Collects metric families and renders the exposition text"""
+
+    def __init__(self):
+        self._families: List[Tuple[str, str, str, Optional[str], List[Sample]]] = []
+
+    def add(self, name: str, metric_type: str, help_text: str, samples: Iterable[Sample],
+            unit: Optional[str] = None) -> None:
+        """Add a family; sample names are suffixes ('' for gauges, '_total' for counters, ...)"""
+        self._families.append((name, metric_type, help_text, unit, list(samples)))
+
+    def add_histogram(self, name: str, help_text: str, series: Iterable[Tuple[Dict[str, str], Sequence[float]]],
+                      buckets: Sequence[float] = LATENCY_BUCKETS_S) -> None:
+        """Histogram family from raw observations (in seconds), one series per label set"""
+        samples: List[Sample] = []
+        for labels, values in series:
+            ordered = sorted(values)
+            index = 0
+            for bound in buckets:
+                while index < len(ordered) and ordered[index] <= bound:
+                    index += 1
+                samples.append(('_bucket', {**labels, 'le': repr(float(bound))}, index))
+            samples.append(('_bucket', {**labels, 'le': '+Inf'}, len(ordered)))
+            samples.append(('_count', labels, len(ordered)))
+            samples.append(('_sum', labels, sum(ordered)))
+        self.add(name, 'histogram', help_text, samples, unit='seconds')
+
+    def text(self) -> str:
+        lines = []
+        for name, metric_type, help_text, unit, samples in self._families:
+            lines.append(f"# TYPE {name} {metric_type}")
+            if unit:
+                lines.append(f"# UNIT {name} {unit}")
+            lines.append(f"# HELP {name} {_escape(help_text)}")
+            for suffix, labels, value in samples:
+                label_text = ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+                lines.append(f"{name}{suffix}{{{label_text}}} {_format_value(value)}" if label_text
+                             else f"{name}{suffix} {_format_value(value)}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+def suite_metrics(results, base_url: str) -> str:
+    """OpenMetrics for comprehensive_api_tests results (TestResult objects)"""
+    writer = OpenMetricsWriter()
+    target = {'base_url': base_url}
+
+    writer.add_histogram(
+        'api_test_duration_seconds', "Response time of each API test run",
+        (({**target, 'test': r.test_name, 'endpoint': r.endpoint or ''},
+          [ms / 1000 for ms in (r.samples or ([r.response_time] if r.response_time is not None else []))])
+         for r in results))
+
+    passed = sum(1 for r in results if r.success)
+    writer.add('api_tests', 'counter', "API tests by outcome",
+               [('_total', {**target, 'result': 'passed'}, passed),
+                ('_total', {**target, 'result': 'failed'}, len(results) - passed)])
+    writer.add('api_test_success', 'gauge', "1 if the test passed, 0 if it failed",
+               [('', {**target, 'test': r.test_name, 'endpoint': r.endpoint or ''}, int(r.success))
+                for r in results])
+    writer.add('api_test_budget_headroom_ratio', 'gauge',
+               "Share of the performance budget left (negative when over budget)",
+               [('', {**target, 'test': r.test_name, 'metric': check.metric}, round(check.headroom_pct / 100, 4))
+                for r in results for check in r.budget_checks if check.measured is not None])
+    return writer.text()
+
+
+def quiz_metrics(results: Dict, weights: Dict[str, float], elapsed_s: float) -> str:
+    """OpenMetrics for a QuizValidator.run_validation() result"""
+    writer = OpenMetricsWriter()
+    writer.add('quiz_type_accuracy_percent', 'gauge', "Share of test cases with the expected microscope type",
+               [('', {}, round(results['type_accuracy'], 3))])
+    writer.add('quiz_category_accuracy_percent', 'gauge', "Share of test cases with the expected category",
+               [('', {}, round(results['category_accuracy'], 3))])
+    writer.add('quiz_test_cases', 'gauge', "Test cases evaluated", [('', {}, results['total'])])
+    writer.add('quiz_mismatches', 'gauge', "Test cases with the wrong type", [('', {}, len(results['mismatches']))])
+    writer.add('quiz_validation_throughput', 'gauge', "Test cases scored per second",
+               [('', {}, round(results['total'] / elapsed_s, 3) if elapsed_s > 0 else 0)])
+    writer.add('quiz_weight', 'gauge', "Scoring weight in use",
+               [('', {'factor': name}, value) for name, value in weights.items()])
+    return writer.text()
+
+
+def aggregator_metrics(aggregator, job: str) -> str:
+    """Live OpenMetrics from a live_view.StatsAggregator (cumulative since the job started)"""
+    snap = aggregator.cumulative()
+    labels = {'job_name': job}
+    writer = OpenMetricsWriter()
+    writer.add('load_requests', 'counter', "Completed requests by status",
+               [('_total', {**labels, 'status': status}, n) for status, n in sorted(snap['statuses'].items())])
+    writer.add('load_requests_in_flight', 'gauge', "Requests sent and not yet answered",
+               [('', labels, snap['in_flight'])])
+    writer.add('load_progress_done', 'gauge', "Units of work finished", [('', labels, snap['done'])])
+    if snap['total']:
+        writer.add('load_progress_total', 'gauge', "Units of work planned", [('', labels, snap['total'])])
+
+    histogram = snap['latency']
+    samples: List[Sample] = []
+    for bound in LATENCY_BUCKETS_S:
+        samples.append(('_bucket', {**labels, 'le': repr(float(bound))}, histogram.count_at_or_below(bound * 1000)))
+    samples.append(('_bucket', {**labels, 'le': '+Inf'}, histogram.count))
+    samples.append(('_count', labels, histogram.count))
+    samples.append(('_sum', labels, round(histogram.total_ms / 1000, 6)))
+    writer.add('load_request_duration_seconds', 'histogram', "Request latency", samples, unit='seconds')
+    return writer.text()
+
+
+# ==================== JUNIT ====================
+
+def junit_xml(suite_name: str, cases: Iterable[Dict], properties: Optional[Dict[str, str]] = None) -> str:
+    """
+    JUnit XML for cases shaped {'name', 'classname', 'time_s', 'failure' (message or None),
+    'system_out' (optional)}
+    """
+    cases = list(cases)
+    failures = sum(1 for case in cases if case.get('failure'))
+    suite = ET.Element('testsuite', {
+        'name': suite_name,
+        'tests': str(len(cases)),
+        'failures': str(failures),
+        'errors': '0',
+        'time': f"{sum(case.get('time_s', 0.0) for case in cases):.3f}",
+    })
+    if properties:
+        props = ET.SubElement(suite, 'properties')
+        for key, value in properties.items():
+            ET.SubElement(props, 'property', {'name': key, 'value': str(value)})
+    for case in cases:
+        element = ET.SubElement(suite, 'testcase', {
+            'name': case['name'],
+            'classname': case.get('classname', suite_name),
+            'time': f"{case.get('time_s', 0.0):.3f}",
+        })
+        if case.get('failure'):
+            failure = ET.SubElement(element, 'failure', {'message': case['failure']})
+            failure.text = case['failure']
+        if case.get('system_out'):
+            ET.SubElement(element, 'system-out').text = case['system_out']
+    ET.indent(suite)
+    return '<?xml version="1.0" encoding="UTF-8"?>\n' + ET.tostring(suite, encoding='unicode') + "\n"
+
+
+def suite_junit(results, base_url: str) -> str:
+    """JUnit XML for comprehensive_api_tests results; time is the median sample"""
+    return junit_xml('comprehensive_api_tests', ({
+        'name': r.test_name,
+        'classname': (r.endpoint or 'api').strip('/').replace('/', '.').replace('-', '_'),
+        'time_s': (r.response_time or 0.0) / 1000,
+        'failure': None if r.success else r.message,
+        'system_out': f"samples_ms={[round(s, 2) for s in r.samples]}" if r.samples else None,
+    } for r in results), {'base_url': base_url})
+
+
+def quiz_junit(test_cases: List[Dict], results: Dict) -> str:
+    """JUnit XML with one testcase per quiz test case; a type mismatch is a failure"""
+    mismatches = {m['test_id']: m for m in results['mismatches']}
+    cases = []
+    for case in test_cases:
+        mismatch = mismatches.get(case['test_id'])
+        failure = None
+        if mismatch:
+            failure = (f"expected {mismatch['expected_type']} ({mismatch['expected_category']}), "
+                       f"got {mismatch['predicted_type']} ({mismatch['predicted_category']}): {mismatch['product']}")
+        cases.append({'name': f"case {case['test_id']}: {case['sample_type']}", 'classname': 'quiz.validation',
+                      'failure': failure})
+    return junit_xml('quiz_validator', cases)
+
+
+def write(path: str, text: str) -> None:
+    with open(path, 'w') as f:
+        f.write(text)
+
+
+# ==================== SCRAPE ENDPOINT ====================
+
+class MetricsServer:
+    """Serve OpenMetrics text at /metrics from a background thread"""
+
+    def __init__(self, render: Callable[[], str], host: str = '127.0.0.1', port: int = 9464):
+        def handler_factory(*args):
+            return _MetricsHandler(render, *args)
+        self.httpd = ThreadingHTTPServer((host, port), handler_factory)
+        self.httpd.daemon_threads = True
+        self.url = f"http://{host}:{self.httpd.server_address[1]}/metrics"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='metrics-server', daemon=True)
+
+    def start(self) -> 'MetricsServer':
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def __init__(self, render: Callable[[], str], *args):
+        self._render = render
+        super().__init__(*args)
+
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = self._render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', OPENMETRICS_CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
@@ -0,0 +1,588 @@
+#!/usr/bin/env python3
+"""
+Fault-Injection Proxy for the API's Upstreams (Shopify, Redis)
+
+Sits between the Next.js server and an upstream and degrades the traffic
+on purpose, so we can see whether caching and timeouts contain a slow or
+flaky Shopify or Redis:
+- http mode: an HTTP/1.1 reverse proxy. Rules match the request path,
+  with the GraphQL operation appended for Storefront API calls
+  (e.g. '/api/*/graphql.json#getProducts' or '*#getCollections')
+- tcp mode: a byte relay for Redis (or anything else); the first rule
+  matching 'tcp' applies to every connection
+
+Per rule (the first matching pattern wins; flags for the same pattern merge):
+- --latency PATTERN=MODEL:PARAMS  delay before forwarding (http) or before
+  each upstream reply chunk (tcp); models as in standin_server
+- --bandwidth PATTERN=KBPS        cap on response bytes per second
+- --reset-rate PATTERN=RATE       abort the connection with a TCP reset
+- --error-rate PATTERN=RATE[:STATUS]  answer with a 5xx without calling
+  the upstream (http only)
+
+Pointing the server at the proxy:
+- Shopify: the Storefront endpoint is https://$SHOPIFY_STORE_DOMAIN/..., so
+  serve TLS (--tls-cert/--tls-key) and start the server with
+  SHOPIFY_STORE_DOMAIN=127.0.0.1:8443 NODE_EXTRA_CA_CERTS=cert.pem
+- Redis: REDIS_URL=redis://127.0.0.1:6380 with --mode tcp
+
+The sweep command adds an increasing upstream delay on top of the rules,
+loads our API at each step and plots how its p50/p99 respond.
+
+Usage:
+    python3 testsprite_tests/fault_proxy.py serve --upstream https://shop.myshopify.com --listen 127.0.0.1:8443 \\
+        --tls-cert cert.pem --tls-key key.pem --latency '*=lognormal:120,0.6' --error-rate '*#getProducts=0.05:503'
+    python3 testsprite_tests/fault_proxy.py serve --mode tcp --upstream redis://localhost:6379 \\
+        --listen 127.0.0.1:6380 --reset-rate '*=0.02'
+    python3 testsprite_tests/fault_proxy.py sweep --upstream https://shop.myshopify.com --listen 127.0.0.1:8443 \\
+        --tls-cert cert.pem --tls-key key.pem --delays 0,100,250,500,1000,2000
+"""
+
+import argparse
+import asyncio
+import fnmatch
+import json
+import random
+import re
+import socket
+import ssl
+import struct
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from aio_client import AsyncHTTPClient, ClientError
+from comprehensive_api_tests import BASE_URL, GREEN, RED, YELLOW, BLUE, CYAN, BOLD, RESET
+from perf_stats import percentile, slope
+from standin_server import MAX_HEADER_BYTES, REASONS, LatencyModel
+
+REPORT_FILE = "testsprite_tests/fault_proxy_report.json"
+
+MODES = ('http', 'tcp')
+
+# Request/response headers that describe one hop and are not forwarded
+HOP_HEADERS = ('connection', 'keep-alive', 'proxy-connection', 'transfer-encoding', 'te', 'trailer',
+               'upgrade', 'host', 'content-length')
+
+# Writes are split into slices this long when a bandwidth cap applies
+BANDWIDTH_SLICE_S = 0.05
+
+DEFAULT_SWEEP_PATHS = ['/api/products', '/api/featured-products', '/api/collections', '/api/menu']
+
+_OPERATION = re.compile(r'^\s*(?:query|mutation)\s+(\w+)')
+
+
+# ==================== FAULT RULES ====================
+
+@dataclass
+class FaultRule:
+    """Faults for requests whose target matches pattern"""
+    pattern: str
+    latency: Optional[LatencyModel] = None
+    bandwidth_kbps: Optional[float] = None
+    reset_rate: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 503
+    matched: int = 0
+    resets: int = 0
+    errors: int = 0
+    delay_ms: float = 0.0
+
+    def stats(self) -> Dict:
+        return {'pattern': self.pattern, 'matched': self.matched, 'resets': self.resets, 'errors': self.errors,
+                'avg_delay_ms': round(self.delay_ms / self.matched, 2) if self.matched else 0.0}
+
+
+def parse_rules(latencies: List[str], bandwidths: List[str], reset_rates: List[str],
+                error_rates: List[str]) -> List[FaultRule]:
+    """Build rules from PATTERN=SPEC flags, keeping the order patterns were first given"""
+    rules: Dict[str, FaultRule] = {}
+
+    def rule(item: str) -> Tuple[FaultRule, str]:
+        pattern, sep, spec = item.partition('=')
+        if not sep or not pattern:
+            raise ValueError(f"expected PATTERN=VALUE, got {item!r}")
+        return rules.setdefault(pattern, FaultRule(pattern)), spec
+
+    for item in latencies:
+        target, spec = rule(item)
+        target.latency = LatencyModel.parse(spec)
+    for item in bandwidths:
+        target, spec = rule(item)
+        target.bandwidth_kbps = float(spec)
+    for item in reset_rates:
+        target, spec = rule(item)
+        target.reset_rate = float(spec)
+    for item in error_rates:
+        target, spec = rule(item)
+        rate, _, status = spec.partition(':')
+        target.error_rate = float(rate)
+        if status:
+            target.error_status = int(status)
+    return list(rules.values())
+
+
+def graphql_operation(body: bytes) -> Optional[str]:
+    """Operation name of a GraphQL POST body, if it is one"""
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return None
+    if not isinstance(payload, dict):
+        return None
+    if payload.get('operationName'):
+        return payload['operationName']
+    match = _OPERATION.match(payload.get('query') or '')
+    return match.group(1) if match else None
+
+
+def _reset(writer: asyncio.StreamWriter) -> None:
+    """Abort the connection with a TCP RST instead of a clean FIN"""
+    sock = writer.get_extra_info('socket')
+    if sock is not None:
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+        except OSError:
+            pass
+    writer.transport.abort()
+
+
+async def _write_throttled(writer: asyncio.StreamWriter, data: bytes, bandwidth_kbps: Optional[float]) -> None:
+    """Write data, pacing it to bandwidth_kbps when a cap is set"""
+    if not bandwidth_kbps:
+        writer.write(data)
+        await writer.drain()
+        return
+    step = max(int(bandwidth_kbps * 1024 * BANDWIDTH_SLICE_S), 1)
+    for offset in range(0, len(data), step):
+        writer.write(data[offset:offset + step])
+        await writer.drain()
+        await asyncio.sleep(BANDWIDTH_SLICE_S)
+
+
+# ==================== PROXY ====================
+
+class FaultProxy:
+    """asyncio proxy applying fault rules to http or tcp traffic"""
+
+    def __init__(self, upstream: str, rules: List[FaultRule], mode: str = 'http', host: str = '127.0.0.1',
+                 port: int = 0, tls: Optional[ssl.SSLContext] = None, upstream_timeout: float = 60.0,
+                 seed: int = 42, quiet: bool = True):
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode: {mode}")
+        parts = urlsplit(upstream)
+        if not parts.hostname:
+            raise ValueError(f"Upstream needs a scheme and host, got {upstream!r}")
+        self.upstream = upstream.rstrip('/')
+        self.upstream_host = parts.hostname
+        self.upstream_port = parts.port or {'https': 443, 'redis': 6379}.get(parts.scheme, 80)
+        self.rules = rules
+        self.mode = mode
+        self.host = host
+        self.port = port
+        self.tls = tls
+        self.upstream_timeout = upstream_timeout
+        self.rng = random.Random(seed)
+        self.quiet = quiet
+        self.added_delay_ms = 0.0  # set by the sweep on top of the rules
+        self.counters = {'requests': 0, 'connections': 0, 'upstream_errors': 0}
+        self.calls: Dict[str, int] = {}  # http requests per 'path#operation'
+        self._client: Optional[AsyncHTTPClient] = None
+        self._server: Optional[asyncio.base_events.Server] = None
+
+    @property
+    def url(self) -> str:
+        scheme = {'tcp': 'tcp', 'http': 'https' if self.tls else 'http'}[self.mode]
+        return f"{scheme}://{self.host}:{self.port}"
+
+    def match(self, target: str) -> Optional[FaultRule]:
+        for rule in self.rules:
+            if fnmatch.fnmatchcase(target, rule.pattern):
+                return rule
+        return None
+
+    def _delay_s(self, rule: Optional[FaultRule]) -> float:
+        delay = rule.latency.sample(self.rng) if rule and rule.latency else 0.0
+        delay += self.added_delay_ms / 1000
+        if rule:
+            rule.delay_ms += delay * 1000
+        return delay
+
+    async def start(self) -> None:
+        """Bind the listening socket (port 0 picks a free port)"""
+        handler = self._handle_http if self.mode == 'http' else self._handle_tcp
+        self._server = await asyncio.start_server(handler, self.host, self.port, ssl=self.tls)
+        self.port = self._server.sockets[0].getsockname()[1]
+        if self.mode == 'http':
+            self._client = AsyncHTTPClient(self.upstream, max_connections=256, timeout=self.upstream_timeout,
+                                           decompress=False)
+            # Forward the caller's headers only
+            self._client.default_headers = {}
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    # ---------- http ----------
+
+    async def _handle_http(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Proxy requests on one keep-alive client connection"""
+        self.counters['connections'] += 1
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                if len(head) > MAX_HEADER_BYTES:
+                    break
+                lines = head.decode('latin-1').split('\r\n')
+                try:
+                    method, target, version = lines[0].split(' ', 2)
+                except ValueError:
+                    break
+                headers: Dict[str, str] = {}
+                for line in lines[1:]:
+                    if ':' in line:
+                        name, _, value = line.partition(':')
+                        headers[name.strip().lower()] = value.strip()
+                length = int(headers.get('content-length', 0) or 0)
+                body = await reader.readexactly(length) if length else b''
+                keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+
+                self.counters['requests'] += 1
+                path = urlsplit(target).path
+                operation = graphql_operation(body) if body else None
+                call = f"{path}#{operation}" if operation else path
+                self.calls[call] = self.calls.get(call, 0) + 1
+                rule = self.match(call)
+                if rule:
+                    rule.matched += 1
+
+                if rule and rule.reset_rate and self.rng.random() < rule.reset_rate:
+                    rule.resets += 1
+                    _reset(writer)
+                    return
+                delay = self._delay_s(rule)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+                if rule and rule.error_rate and self.rng.random() < rule.error_rate:
+                    rule.errors += 1
+                    status, response_headers = rule.error_status, {'content-type': 'application/json'}
+                    response_body = json.dumps({'error': 'Injected upstream failure'}).encode()
+                else:
+                    status, response_headers, response_body = await self._forward(method, target, headers, body)
+
+                if not self.quiet:
+                    color = GREEN if status < 400 else RED
+                    print(f"{color}{method} {path}{' #' + operation if operation else ''}{RESET} -> {status} "
+                          f"(+{delay * 1000:.0f}ms{', rule ' + rule.pattern if rule else ''})")
+                await _write_throttled(writer, self._serialize(status, response_headers, response_body, keep_alive),
+                                       rule.bandwidth_kbps if rule else None)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            if not writer.transport.is_closing():
+                writer.close()
+
+    async def _forward(self, method: str, target: str, headers: Dict[str, str],
+                       body: bytes) -> Tuple[int, Dict[str, str], bytes]:
+        forwarded = {name: value for name, value in headers.items() if name not in HOP_HEADERS}
+        try:
+            response = await self._client.request(method, target, body=body, headers=forwarded)
+        except ClientError as e:
+            self.counters['upstream_errors'] += 1
+            return 502, {'content-type': 'application/json'}, json.dumps({'error': f"Upstream: {e}"}).encode()
+        return response.status, response.headers, response.body
+
+    @staticmethod
+    def _serialize(status: int, headers: Dict[str, str], body: bytes, keep_alive: bool) -> bytes:
+        lines = [f"HTTP/1.1 {status} {REASONS.get(status, 'Unknown')}"]
+        for name, value in headers.items():
+            if name.lower() not in HOP_HEADERS:
+                lines.append(f"{name}: {value}")
+        lines.append(f"Content-Length: {len(body)}")
+        lines.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body
+
+    # ---------- tcp ----------
+
+    async def _handle_tcp(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Relay one connection; faults apply to the upstream's replies"""
+        self.counters['connections'] += 1
+        rule = self.match('tcp')
+        if rule:
+            rule.matched += 1
+        if rule and rule.reset_rate and self.rng.random() < rule.reset_rate:
+            rule.resets += 1
+            _reset(writer)
+            return
+        try:
+            upstream_reader, upstream_writer = await asyncio.wait_for(
+                asyncio.open_connection(self.upstream_host, self.upstream_port), self.upstream_timeout)
+        except (OSError, asyncio.TimeoutError):
+            self.counters['upstream_errors'] += 1
+            _reset(writer)
+            return
+
+        async def client_to_upstream() -> None:
+            while data := await reader.read(65536):
+                self.counters['requests'] += 1
+                upstream_writer.write(data)
+                await upstream_writer.drain()
+            upstream_writer.write_eof()
+
+        async def upstream_to_client() -> None:
+            while data := await upstream_reader.read(65536):
+                delay = self._delay_s(rule)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                await _write_throttled(writer, data, rule.bandwidth_kbps if rule else None)
+
+        tasks = [asyncio.ensure_future(client_to_upstream()), asyncio.ensure_future(upstream_to_client())]
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            for task in tasks:
+                task.cancel()
+            upstream_writer.close()
+            writer.close()
+
+    def summary(self) -> Dict:
+        return {**self.counters, 'calls': dict(self.calls), 'rules': [rule.stats() for rule in self.rules]}
+
+
+def run_in_thread(proxy: FaultProxy) -> threading.Thread:
+    """Start the proxy on a background event loop thread (for the sweep)"""
+    started = threading.Event()
+    failure: List[BaseException] = []
+
+    def run() -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(proxy.start())
+        except BaseException as e:
+            failure.append(e)
+            started.set()
+            return
+        started.set()
+        loop.run_until_complete(proxy.serve_forever())
+
+    thread = threading.Thread(target=run, name='fault-proxy', daemon=True)
+    thread.start()
+    started.wait()
+    if failure:
+        raise failure[0]
+    return thread
+
+
+# ==================== LATENCY SWEEP ====================
+
+async def _load_step(base_url: str, paths: List[str], requests_per_path: int, concurrency: int,
+                     timeout: float) -> Dict[str, Dict]:
+    """Request each path requests_per_path times with bounded concurrency"""
+    results: Dict[str, Dict] = {path: {'latencies': [], 'statuses': {}} for path in paths}
+    queue = [path for path in paths for _ in range(requests_per_path)]
+
+    async with AsyncHTTPClient(base_url, max_connections=concurrency, timeout=timeout) as client:
+        async def worker() -> None:
+            while queue:
+                path = queue.pop()
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    status = str(response.status)
+                except ClientError:
+                    status = 'error'
+                entry = results[path]
+                entry['latencies'].append((time.perf_counter() - start) * 1000)
+                entry['statuses'][status] = entry['statuses'].get(status, 0) + 1
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return results
+
+
+def run_sweep(proxy: FaultProxy, base_url: str, delays: List[float], paths: List[str], requests_per_path: int,
+              concurrency: int, timeout: float) -> Dict:
+    """Step the added upstream delay and measure our API's latency at each step"""
+    steps = []
+    for delay in delays:
+        proxy.added_delay_ms = delay
+        before = proxy.counters['requests']
+        print(f"{CYAN}Injected upstream delay: {delay:g}ms{RESET}")
+        results = asyncio.run(_load_step(base_url, paths, requests_per_path, concurrency, timeout))
+        upstream_calls = proxy.counters['requests'] - before
+        step = {'delay_ms': delay, 'upstream_calls': upstream_calls, 'paths': {}}
+        for path, entry in results.items():
+            latencies = entry['latencies']
+            step['paths'][path] = {
+                'p50_ms': round(percentile(latencies, 50), 2),
+                'p99_ms': round(percentile(latencies, 99), 2),
+                'statuses': entry['statuses'],
+            }
+            print(f"  {path:<28} p50 {percentile(latencies, 50):>7.0f}ms | p99 {percentile(latencies, 99):>7.0f}ms")
+        print(f"  Upstream calls through the proxy: {upstream_calls}")
+        steps.append(step)
+    proxy.added_delay_ms = 0.0
+
+    verdicts = {}
+    for path in paths:
+        p99s = [step['paths'][path]['p99_ms'] for step in steps]
+        verdicts[path] = {
+            'p99_growth_ms_per_ms': round(slope(delays, p99s), 3) if len(delays) > 1 else None,
+            'verdict': _verdict(delays, p99s, sum(step['upstream_calls'] for step in steps[1:])),
+        }
+    return {'steps': steps, 'paths': verdicts}
+
+
+def _verdict(delays: List[float], p99s: List[float], upstream_calls: int) -> str:
+    if len(delays) < 2:
+        return 'single step'
+    if upstream_calls == 0:
+        return 'no upstream calls (cached, or the server is not pointed at the proxy)'
+    growth = slope(delays, p99s)
+    if growth < 0.1:
+        return 'contained'
+    added = p99s[-1] - p99s[0]
+    span = delays[-1] - delays[0]
+    if span > 0 and added < 0.5 * span:
+        return 'capped (timeout or fallback cuts the wait)'
+    return f"exposed ({growth:.2f}ms of p99 per ms of upstream delay)"
+
+
+def print_plot(sweep: Dict, width: int = 40) -> None:
+    """Horizontal bar chart of p50 (=) and p99 (#) per injected delay"""
+    steps = sweep['steps']
+    top = max((step['paths'][path]['p99_ms'] for step in steps for path in step['paths']), default=0) or 1
+    for path, verdict in sweep['paths'].items():
+        text = verdict['verdict']
+        color = GREEN if text.startswith(('contained', 'capped')) else YELLOW if text.startswith('no ') else RED
+        print(f"\n{BOLD}{path}{RESET} - {color}{text}{RESET}")
+        for step in steps:
+            stats = step['paths'][path]
+            p50 = int(stats['p50_ms'] / top * width)
+            p99 = int(stats['p99_ms'] / top * width)
+            bar = '=' * p50 + '#' * max(p99 - p50, 0)
+            print(f"  +{step['delay_ms']:>6.0f}ms |{bar:<{width}}| p50 {stats['p50_ms']:>6.0f}ms  "
+                  f"p99 {stats['p99_ms']:>6.0f}ms")
+    print(f"\n(= up to p50, # up to p99; full width = {top:.0f}ms)\n")
+
+
+# ==================== CLI ====================
+
+def tls_context(cert: Optional[str], key: Optional[str]) -> Optional[ssl.SSLContext]:
+    if not cert:
+        return None
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(cert, key)
+    return context
+
+
+def parse_listen(value: str) -> Tuple[str, int]:
+    host, _, port = value.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+
+def build_proxy(args) -> FaultProxy:
+    rules = parse_rules(args.latency, args.bandwidth, args.reset_rate, args.error_rate)
+    host, port = parse_listen(args.listen)
+    return FaultProxy(args.upstream, rules, args.mode, host, port, tls_context(args.tls_cert, args.tls_key),
+                      args.upstream_timeout, args.seed, quiet=not args.verbose)
+
+
+def print_rules(proxy: FaultProxy) -> None:
+    if not proxy.rules:
+        print("  No rules: pass-through")
+    for rule in proxy.rules:
+        parts = []
+        if rule.latency:
+            parts.append(f"latency {rule.latency.shorthand()}")
+        if rule.bandwidth_kbps:
+            parts.append(f"bandwidth {rule.bandwidth_kbps:g} KB/s")
+        if rule.reset_rate:
+            parts.append(f"resets {rule.reset_rate:.1%}")
+        if rule.error_rate:
+            parts.append(f"errors {rule.error_rate:.1%} ({rule.error_status})")
+        print(f"  {rule.pattern}: {', '.join(parts) or 'pass-through'}")
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Inject upstream latency, bandwidth caps, resets and 5xx")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    for name, help_text in (('serve', "Run the proxy until interrupted"),
+                            ('sweep', "Step an added upstream delay and plot our API's p50/p99")):
+        sub = subparsers.add_parser(name, help=help_text)
+        sub.add_argument('--upstream', required=True, help="Upstream origin, e.g. https://shop.myshopify.com")
+        sub.add_argument('--mode', choices=MODES, default='http')
+        sub.add_argument('--listen', default='127.0.0.1:8443', help="HOST:PORT to listen on")
+        sub.add_argument('--tls-cert', help="Serve TLS with this certificate (needed to stand in for Shopify)")
+        sub.add_argument('--tls-key')
+        sub.add_argument('--latency', action='append', default=[], metavar='PATTERN=MODEL:PARAMS')
+        sub.add_argument('--bandwidth', action='append', default=[], metavar='PATTERN=KBPS')
+        sub.add_argument('--reset-rate', action='append', default=[], metavar='PATTERN=RATE')
+        sub.add_argument('--error-rate', action='append', default=[], metavar='PATTERN=RATE[:STATUS]')
+        sub.add_argument('--upstream-timeout', type=float, default=60.0)
+        sub.add_argument('--seed', type=int, default=42)
+        sub.add_argument('--verbose', action='store_true', help="Log every proxied request")
+    sweep = subparsers.choices['sweep']
+    sweep.add_argument('--base-url', default=BASE_URL, help="Our API (already pointed at the proxy)")
+    sweep.add_argument('--delays', default='0,100,250,500,1000,2000', help="Comma-separated added delays (ms)")
+    sweep.add_argument('--paths', default=','.join(DEFAULT_SWEEP_PATHS), help="Comma-separated API paths to load")
+    sweep.add_argument('--requests', type=int, default=20, help="Requests per path per step")
+    sweep.add_argument('--concurrency', type=int, default=4)
+    sweep.add_argument('--timeout', type=float, default=60.0, help="Client timeout per API request (s)")
+    sweep.add_argument('--output', default=REPORT_FILE)
+    args = parser.parse_args()
+
+    try:
+        proxy = build_proxy(args)
+        print(f"\n{BLUE}{BOLD}{'='*80}")
+        print("Lab Essentials E-Commerce - Upstream Fault-Injection Proxy")
+        print(f"Proxy: {args.listen} ({args.mode}{', TLS' if args.tls_cert else ''}) -> {args.upstream}")
+        if args.command == 'sweep':
+            print(f"Testing against: {args.base_url}")
+        print(f"{'='*80}{RESET}\n")
+        print_rules(proxy)
+
+        if args.command == 'serve':
+            print(f"{CYAN}Listening; press Ctrl+C to stop{RESET}\n")
+            try:
+                asyncio.run(proxy.serve_forever())
+            except KeyboardInterrupt:
+                print(f"\n{YELLOW}Stopped{RESET}")
+            print(json.dumps(proxy.summary(), indent=2))
+            return
+
+        run_in_thread(proxy)
+        print(f"{CYAN}Proxy listening on {proxy.url}{RESET}\n")
+        delays = [float(v) for v in args.delays.split(',') if v.strip()]
+        paths = [p.strip() for p in args.paths.split(',') if p.strip()]
+        result = run_sweep(proxy, args.base_url, delays, paths, args.requests, args.concurrency, args.timeout)
+        print_plot(result)
+    except KeyboardInterrupt:
+        print(f"\n{YELLOW}Sweep interrupted by user{RESET}")
+        sys.exit(1)
+    except (OSError, ValueError) as e:
+        print(f"{RED}Error: {e}{RESET}")
+        sys.exit(1)
+
+    report = {'timestamp': datetime.now().isoformat(), 'base_url': args.base_url, 'upstream': args.upstream,
+              'mode': args.mode, 'sweep': result, 'proxy': proxy.summary()}
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"{BLUE}JSON report saved to: {args.output}{RESET}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Concurrent Product-Handle Crawler for Lab Essentials E-Commerce
+
+Fetches /api/product-by-handle for every product in the catalog, concurrently
+and under a token-bucket rate limit, and validates each response with the
+suite's schemas. Meant to run after a catalog sync:
+- Handles come from quiz-testing/products_export.json or from /api/products
+  (cursor pages are followed when the response carries pageInfo)
+- Each response must be 200, match PRODUCT_DETAIL_SCHEMA and echo its handle
+- Reports per-handle latency, the slowest N handles and every failure
+
+Usage:
+    python3 testsprite_tests/handle_crawler.py
+    python3 testsprite_tests/handle_crawler.py --source api --concurrency 32 --rate 50 --slowest 15
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import exporters
+import schema_validator
+from aio_client import AsyncHTTPClient, ClientError, TokenBucket
+from comprehensive_api_tests import (
+    BASE_URL, GREEN, RED, YELLOW, BLUE, CYAN, BOLD, RESET,
+    PRODUCTS_SCHEMA, PRODUCT_BY_HANDLE_SCHEMA, PRODUCT_DETAIL_SCHEMA,
+)
+from live_view import LiveDashboard, StatsAggregator
+from perf_stats import summarize
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PRODUCTS_EXPORT = os.path.join(SCRIPT_DIR, '..', 'quiz-testing', 'products_export.json')
+REPORT_FILE = "testsprite_tests/handle_crawl_report.json"
+
+# Upper bound on /api/products pages followed, in case a cursor never ends
+MAX_LISTING_PAGES = 200
+
+
+@dataclass
+class CrawlResult:
+    """Outcome of fetching one handle"""
+    handle: str
+    success: bool
+    message: str
+    latency_ms: Optional[float] = None
+    status_code: Optional[int] = None
+    size_bytes: int = 0
+
+
+# ==================== HANDLE SOURCES ====================
+
+def handles_from_export(path: str = PRODUCTS_EXPORT) -> List[str]:
+    """Read product handles from the products export"""
+    with open(path, 'r', encoding='utf-8') as f:
+        products = json.load(f)
+    return _dedupe(p['handle'] for p in products if p.get('handle'))
+
+
+async def handles_from_api(client: AsyncHTTPClient, page_size: int = 250) -> List[str]:
+    """Collect handles from /api/products, following cursor pages when offered"""
+    handles: List[str] = []
+    params: Dict[str, str] = {"limit": str(page_size)}
+    for _ in range(MAX_LISTING_PAGES):
+        response = await client.get("/api/products", params=params)
+        if response.status != 200:
+            raise ClientError(f"/api/products returned {response.status}")
+        data = response.json()
+        is_valid, error = schema_validator.validate(data, PRODUCTS_SCHEMA)
+        if not is_valid:
+            raise ClientError(f"/api/products schema validation failed: {error}")
+        handles.extend(p['handle'] for p in data['products'])
+
+        page_info = data.get('pageInfo') or {}
+        if not page_info.get('hasNextPage') or not page_info.get('endCursor'):
+            break
+        params = {"limit": str(page_size), "after": page_info['endCursor']}
+    return _dedupe(handles)
+
+
+def _dedupe(handles) -> List[str]:
+    """Drop duplicate handles, keeping first-seen order"""
+    return list(dict.fromkeys(handles))
+
+
+# ==================== CRAWL ====================
+
+async def fetch_handle(client: AsyncHTTPClient, bucket: TokenBucket, handle: str) -> CrawlResult:
+    """Fetch and validate one product"""
+    await bucket.acquire()
+    try:
+        response = await client.get("/api/product-by-handle", params={"handle": handle})
+    except ClientError as e:
+        return CrawlResult(handle, False, str(e))
+
+    result = CrawlResult(handle, False, "", response.elapsed_ms, response.status, len(response.body))
+    if response.status != 200:
+        result.message = f"Expected status 200, got {response.status}"
+        return result
+    try:
+        data = response.json()
+    except ValueError as e:
+        result.message = f"Invalid JSON: {e}"
+        return result
+
+    is_valid, error = schema_validator.validate(data, PRODUCT_BY_HANDLE_SCHEMA)
+    if is_valid:
+        is_valid, error = schema_validator.validate(data['product'], PRODUCT_DETAIL_SCHEMA)
+    if not is_valid:
+        result.message = f"Schema validation failed: {error}"
+        return result
+    if data['product']['handle'] != handle:
+        result.message = f"Returned handle '{data['product']['handle']}'"
+        return result
+
+    result.success = True
+    result.message = "Valid"
+    return result
+
+
+async def crawl(base_url: str, source: str, concurrency: int, rate: float, burst: float,
+                timeout: float, limit: Optional[int] = None, stats: Optional[StatsAggregator] = None) -> Dict:
+    """Crawl every handle and return the report"""
+    async with AsyncHTTPClient(base_url, max_connections=concurrency, timeout=timeout, stats=stats) as client:
+        if source == 'api':
+            handles = await handles_from_api(client)
+        else:
+            handles = handles_from_export()
+        if limit:
+            handles = handles[:limit]
+        if stats is not None:
+            stats.total = len(handles)
+
+        bucket = TokenBucket(rate, burst)
+        queue: asyncio.Queue = asyncio.Queue()
+        for handle in handles:
+            queue.put_nowait(handle)
+        results: List[CrawlResult] = []
+        invalid = [0]
+
+        async def worker():
+            while True:
+                try:
+                    handle = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                result = await fetch_handle(client, bucket, handle)
+                results.append(result)
+                if stats is not None:
+                    stats.advance()
+                    if not result.success:
+                        invalid[0] += 1
+                        stats.gauge('Invalid handles', "{}", invalid[0])
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(min(concurrency, len(handles)) or 1)))
+        wall_s = time.perf_counter() - start
+        connections = client.connections_opened
+
+    latencies = [r.latency_ms for r in results if r.latency_ms is not None]
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'base_url': base_url,
+        'source': source,
+        'settings': {'concurrency': concurrency, 'rate': rate, 'burst': burst, 'timeout': timeout},
+        'summary': {
+            'handles': len(handles),
+            'passed': sum(1 for r in results if r.success),
+            'failed': sum(1 for r in results if not r.success),
+            'wall_time_s': round(wall_s, 3),
+            'throughput_rps': round(len(results) / wall_s, 2) if wall_s > 0 else 0.0,
+            'serial_estimate_s': round(sum(latencies) / 1000, 3),
+            'connections_opened': connections,
+            'latency_ms': {k: round(v, 2) for k, v in summarize(latencies).items()},
+        },
+        'results': [asdict(r) for r in sorted(results, key=lambda r: r.handle)],
+    }
+
+
+# ==================== REPORTING ====================
+
+def print_report(report: Dict, slowest: int) -> None:
+    """Print slowest handles, failures and the summary"""
+    summary = report['summary']
+    results = report['results']
+    timed = sorted((r for r in results if r['latency_ms'] is not None),
+                   key=lambda r: r['latency_ms'], reverse=True)
+
+    print(f"{CYAN}{BOLD}Slowest {min(slowest, len(timed))} handles{RESET}")
+    for r in timed[:slowest]:
+        icon = f"{GREEN}✓{RESET}" if r['success'] else f"{RED}✗{RESET}"
+        print(f"  {icon} {r['handle'][:60]:<60} {r['latency_ms']:>8.0f}ms {r['size_bytes']:>8}B")
+
+    failures = [r for r in results if not r['success']]
+    if failures:
+        print(f"\n{RED}{BOLD}Failures ({len(failures)}){RESET}")
+        for r in failures:
+            status = r['status_code'] if r['status_code'] is not None else '-'
+            print(f"  {RED}✗{RESET} {r['handle']} [{status}]: {r['message']}")
+
+    latency = summary['latency_ms']
+    print(f"\n{BOLD}Summary{RESET}")
+    print(f"Handles:        {summary['handles']}")
+    print(f"{GREEN}Passed:         {summary['passed']}{RESET}")
+    print(f"{RED}Failed:         {summary['failed']}{RESET}")
+    print(f"Latency:        p50 {latency['p50']:.0f}ms | p95 {latency['p95']:.0f}ms | "
+          f"p99 {latency['p99']:.0f}ms | max {latency['max']:.0f}ms")
+    print(f"Wall time:      {summary['wall_time_s']:.2f}s "
+          f"(serial estimate {summary['serial_estimate_s']:.2f}s)")
+    print(f"Throughput:     {summary['throughput_rps']:.1f} req/s over "
+          f"{summary['connections_opened']} connections\n")
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Crawl /api/product-by-handle for every catalog product")
+    parser.add_argument('--base-url', default=BASE_URL)
+    parser.add_argument('--source', choices=['export', 'api'], default='export',
+                        help="Read handles from products_export.json or from /api/products")
+    parser.add_argument('--concurrency', type=int, default=16, help="Maximum requests in flight")
+    parser.add_argument('--rate', type=float, default=20.0, help="Requests per second (0 = unlimited)")
+    parser.add_argument('--burst', type=float, default=5.0, help="Token bucket size")
+    parser.add_argument('--timeout', type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument('--slowest', type=int, default=10, help="How many of the slowest handles to list")
+    parser.add_argument('--limit', type=int, help="Only crawl the first N handles")
+    parser.add_argument('--live', action='store_true', help="Show a live dashboard while crawling")
+    parser.add_argument('--metrics-port', type=int,
+                        help="Serve live OpenMetrics at http://127.0.0.1:PORT/metrics during crawling")
+    parser.add_argument('--output', default=REPORT_FILE)
+    args = parser.parse_args()
+
+    print(f"\n{BLUE}{BOLD}{'='*80}")
+    print("Lab Essentials E-Commerce - Product Handle Crawl")
+    print(f"Testing against: {args.base_url}")
+    print(f"Source: {args.source} | Concurrency: {args.concurrency} | "
+          f"Rate: {args.rate or 'unlimited'} req/s (burst {args.burst:g})")
+    print(f"{'='*80}{RESET}\n")
+
+    stats = StatsAggregator() if args.live or args.metrics_port else None
+    dashboard = LiveDashboard(stats, "Handle crawl").start() if args.live else None
+    metrics = None
+    if args.metrics_port:
+        metrics = exporters.MetricsServer(lambda: exporters.aggregator_metrics(stats, 'handle_crawler'),
+                                          port=args.metrics_port).start()
+        print(f"{CYAN}Live metrics: {metrics.url}{RESET}\n")
+    try:
+        report = asyncio.run(crawl(args.base_url, args.source, args.concurrency, args.rate,
+                                   args.burst, args.timeout, args.limit, stats))
+    except KeyboardInterrupt:
+        print(f"\n{YELLOW}Crawl interrupted by user{RESET}")
+        sys.exit(1)
+    except (ClientError, OSError, ValueError) as e:
+        print(f"{RED}Error: {e}{RESET}")
+        sys.exit(1)
+    finally:
+        if dashboard:
+            dashboard.stop()
+        if metrics:
+            metrics.stop()
+
+    print_report(report, args.slowest)
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"{BLUE}JSON report saved to: {args.output}{RESET}\n")
+
+    sys.exit(0 if report['summary']['failed'] == 0 else 1)
+
+
+if __name__ == "__main__":
+    main()
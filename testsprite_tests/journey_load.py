@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+Shopper Journey Load Scenarios for Lab Essentials E-Commerce
+
+Each virtual user is an asyncio task that walks a scripted journey with
+think times between steps and carries its own data forward (the product it
+opens is picked from the listing it just received, the cart it checks out
+is the one it just created). Thousands of users share one connection pool
+in a single process.
+
+Journeys:
+- browse:   menu -> collections -> products -> product-by-handle
+- purchase: browse, then cart -> checkout
+
+Reports end-to-end journey latency (wall time, including think time) and
+active time (time spent waiting on the API), plus per-step percentiles.
+
+Usage:
+    python3 testsprite_tests/journey_load.py
+    python3 testsprite_tests/journey_load.py --users 2000 --ramp-up 30 --mix browse=3,purchase=1 --think-time 1.5
+    python3 testsprite_tests/journey_load.py --protocol h2 --connections 100
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import exporters
+import schema_validator
+from aio_client import PROTOCOLS, AsyncHTTPClient, ClientError, open_client
+from comprehensive_api_tests import (
+    BASE_URL, GREEN, RED, YELLOW, BLUE, CYAN, BOLD, RESET,
+    MENU_SCHEMA, COLLECTIONS_SCHEMA, PRODUCTS_SCHEMA, PRODUCT_BY_HANDLE_SCHEMA, PRODUCT_DETAIL_SCHEMA,
+)
+from live_view import LiveDashboard, StatsAggregator
+from perf_stats import summarize
+
+REPORT_FILE = "testsprite_tests/journey_load_report.json"
+
+
+@dataclass
+class VirtualUser:
+    """One simulated shopper and the data it carries between steps"""
+    user_id: int
+    client: AsyncHTTPClient
+    rng: random.Random
+    variant_id: str
+    state: Dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class JourneyResult:
+    """Outcome of one journey run by one user"""
+    journey: str
+    success: bool
+    wall_ms: float
+    active_ms: float
+    steps: List[Tuple[str, float, Optional[int], bool]]
+    failed_step: Optional[str] = None
+    message: str = ""
+
+
+# A step returns (status code, error message or None)
+StepFunc = Callable[[VirtualUser], Awaitable[Tuple[int, Optional[str]]]]
+
+
+# ==================== STEPS ====================
+
+async def _get_json(user: VirtualUser, path: str, schema: Dict,
+                    params: Optional[Dict[str, str]] = None) -> Tuple[int, Optional[Dict], Optional[str]]:
+    """GET a JSON endpoint and validate it (status, data, error)"""
+    response = await user.client.get(path, params=params)
+    if response.status != 200:
+        return response.status, None, f"Expected status 200, got {response.status}"
+    data = response.json()
+    is_valid, error = schema_validator.validate(data, schema)
+    return response.status, data, None if is_valid else error
+
+
+async def step_menu(user: VirtualUser) -> Tuple[int, Optional[str]]:
+    status, _, error = await _get_json(user, "/api/menu", MENU_SCHEMA)
+    return status, error
+
+
+async def step_collections(user: VirtualUser) -> Tuple[int, Optional[str]]:
+    status, data, error = await _get_json(user, "/api/collections", COLLECTIONS_SCHEMA)
+    if error is None and data['collections']:
+        user.state['collection'] = user.rng.choice(data['collections'])['handle']
+    return status, error
+
+
+async def step_products(user: VirtualUser) -> Tuple[int, Optional[str]]:
+    status, data, error = await _get_json(user, "/api/products", PRODUCTS_SCHEMA, {"limit": "10"})
+    if error is None:
+        if not data['products']:
+            return status, "No products to open"
+        user.state['handle'] = user.rng.choice(data['products'])['handle']
+    return status, error
+
+
+async def step_product(user: VirtualUser) -> Tuple[int, Optional[str]]:
+    status, data, error = await _get_json(user, "/api/product-by-handle", PRODUCT_BY_HANDLE_SCHEMA,
+                                          {"handle": user.state['handle']})
+    if error is None:
+        is_valid, error = schema_validator.validate(data['product'], PRODUCT_DETAIL_SCHEMA)
+        error = None if is_valid else error
+    return status, error
+
+
+async def step_cart(user: VirtualUser) -> Tuple[int, Optional[str]]:
+    payload = {"lines": [{"merchandiseId": user.variant_id, "quantity": user.rng.randint(1, 3)}]}
+    response = await user.client.post("/api/cart", json_body=payload)
+    if response.status != 200:
+        return response.status, f"Expected status 200, got {response.status}"
+    cart = response.json().get('cart') or {}
+    if not cart.get('id'):
+        return response.status, "Response missing cart id"
+    user.state['cart_id'] = cart['id']
+    return response.status, None
+
+
+async def step_checkout(user: VirtualUser) -> Tuple[int, Optional[str]]:
+    response = await user.client.post("/api/checkout", json_body={"cartId": user.state['cart_id']})
+    if response.status != 200:
+        return response.status, f"Expected status 200, got {response.status}"
+    checkout_url = response.json().get('checkoutUrl', '')
+    if not checkout_url.startswith('https://'):
+        return response.status, f"Invalid checkoutUrl: {checkout_url}"
+    return response.status, None
+
+
+BROWSE_STEPS: List[Tuple[str, StepFunc]] = [
+    ("menu", step_menu),
+    ("collections", step_collections),
+    ("products", step_products),
+    ("product", step_product),
+]
+
+JOURNEYS: Dict[str, List[Tuple[str, StepFunc]]] = {
+    'browse': BROWSE_STEPS,
+    'purchase': BROWSE_STEPS + [("cart", step_cart), ("checkout", step_checkout)],
+}
+
+
+# ==================== ENGINE ====================
+
+def parse_mix(text: str) -> List[Tuple[str, float]]:
+    """Parse 'browse=3,purchase=1' into (journey, weight) pairs"""
+    mix = []
+    for item in text.split(','):
+        name, _, weight = item.partition('=')
+        name = name.strip()
+        if name not in JOURNEYS:
+            raise ValueError(f"Unknown journey: {name} (choose from {', '.join(JOURNEYS)})")
+        mix.append((name, float(weight or 1)))
+    return mix
+
+
+async def run_journey(user: VirtualUser, name: str, think_time: float) -> JourneyResult:
+    """Walk one journey, stopping at the first failed step"""
+    steps = []
+    active_ms = 0.0
+    start = time.perf_counter()
+    for index, (step_name, step) in enumerate(JOURNEYS[name]):
+        if index and think_time > 0:
+            await asyncio.sleep(user.rng.expovariate(1.0 / think_time))
+
+        step_start = time.perf_counter()
+        try:
+            status, error = await step(user)
+        except (ClientError, ValueError) as e:
+            status, error = None, str(e)
+        elapsed = (time.perf_counter() - step_start) * 1000
+        active_ms += elapsed
+        steps.append((step_name, elapsed, status, error is None))
+
+        if error is not None:
+            return JourneyResult(name, False, (time.perf_counter() - start) * 1000, active_ms, steps,
+                                 step_name, error)
+    return JourneyResult(name, True, (time.perf_counter() - start) * 1000, active_ms, steps)
+
+
+async def resolve_variant(client: AsyncHTTPClient) -> str:
+    """Ask the dev-only endpoint for a purchasable variant"""
+    response = await client.get("/api/dev-first-variant")
+    variant_id = response.json().get('variantId') if response.status == 200 else None
+    if not variant_id:
+        raise ClientError("No variant available from /api/dev-first-variant; pass --variant-id")
+    return variant_id
+
+
+async def run_load(base_url: str, users: int, ramp_up: float, iterations: int, mix: List[Tuple[str, float]],
+                   think_time: float, connections: int, seed: int, timeout: float,
+                   variant_id: Optional[str], stats: Optional[StatsAggregator] = None,
+                   protocol: str = 'h1') -> Tuple[List[JourneyResult], float, int]:
+    """Start the virtual users and wait for all journeys (results, wall seconds, requests)"""
+    async with open_client(base_url, protocol, connections, timeout, stats=stats) as client:
+        if variant_id is None and any(name == 'purchase' for name, _ in mix):
+            variant_id = await resolve_variant(client)
+
+        names = [name for name, _ in mix]
+        weights = [weight for _, weight in mix]
+        results: List[JourneyResult] = []
+        failed = [0]
+
+        async def virtual_user(user_id: int):
+            rng = random.Random(seed * 1_000_003 + user_id)
+            if ramp_up > 0:
+                await asyncio.sleep(ramp_up * user_id / users)
+            user = VirtualUser(user_id, client, rng, variant_id or '')
+            for _ in range(iterations):
+                user.state.clear()
+                journey = rng.choices(names, weights)[0]
+                result = await run_journey(user, journey, think_time)
+                results.append(result)
+                if stats is not None:
+                    stats.advance()
+                    failed[0] += not result.success
+                    stats.gauge('Journeys', "{} completed, {} failed", len(results) - failed[0], failed[0])
+
+        if stats is not None:
+            stats.total = users * iterations
+        start = time.perf_counter()
+        await asyncio.gather(*(virtual_user(i) for i in range(users)))
+        wall_s = time.perf_counter() - start
+
+    requests_sent = sum(len(r.steps) for r in results)
+    return results, wall_s, requests_sent
+
+
+# ==================== REPORTING ====================
+
+def build_report(results: List[JourneyResult], wall_s: float, requests_sent: int, settings: Dict) -> Dict:
+    """Aggregate journey and step statistics"""
+    journeys = {}
+    for name in sorted({r.journey for r in results}):
+        runs = [r for r in results if r.journey == name]
+        completed = [r for r in runs if r.success]
+        failed_at: Dict[str, int] = {}
+        for r in runs:
+            if not r.success:
+                failed_at[r.failed_step] = failed_at.get(r.failed_step, 0) + 1
+        journeys[name] = {
+            'runs': len(runs),
+            'completed': len(completed),
+            'failed_at': failed_at,
+            'wall_ms': summarize([r.wall_ms for r in completed]),
+            'active_ms': summarize([r.active_ms for r in completed]),
+        }
+
+    step_samples: Dict[str, List[float]] = {}
+    step_errors: Dict[str, int] = {}
+    for r in results:
+        for step_name, elapsed, _, ok in r.steps:
+            step_samples.setdefault(step_name, []).append(elapsed)
+            if not ok:
+                step_errors[step_name] = step_errors.get(step_name, 0) + 1
+
+    order = [name for name, _ in JOURNEYS['purchase']]
+    steps = {name: {'latency_ms': summarize(step_samples[name]), 'errors': step_errors.get(name, 0)}
+             for name in sorted(step_samples, key=order.index)}
+
+    failures: Dict[str, int] = {}
+    for r in results:
+        if not r.success:
+            key = f"{r.failed_step}: {r.message}"
+            failures[key] = failures.get(key, 0) + 1
+
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'settings': settings,
+        'summary': {
+            'journeys': len(results),
+            'completed': sum(1 for r in results if r.success),
+            'requests': requests_sent,
+            'wall_time_s': round(wall_s, 3),
+            'requests_per_second': round(requests_sent / wall_s, 2) if wall_s > 0 else 0.0,
+        },
+        'journeys': journeys,
+        'steps': steps,
+        'failures': failures,
+    }
+
+
+def print_report(report: Dict) -> None:
+    """Print journey and step percentiles"""
+    print(f"{CYAN}{BOLD}Journeys{RESET}")
+    print(f"{'Journey':<12} {'Runs':>6} {'Done':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'Active p95':>11}")
+    for name, stats in report['journeys'].items():
+        wall = stats['wall_ms']
+        color = GREEN if stats['completed'] == stats['runs'] else RED
+        print(f"{name:<12} {stats['runs']:>6} {color}{stats['completed']:>6}{RESET} "
+              f"{wall['p50']:>7.0f}ms {wall['p95']:>7.0f}ms {wall['p99']:>7.0f}ms "
+              f"{stats['active_ms']['p95']:>9.0f}ms")
+
+    print(f"\n{CYAN}{BOLD}Steps{RESET}")
+    print(f"{'Step':<12} {'Count':>6} {'Errors':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'Max':>9}")
+    for name, stats in report['steps'].items():
+        lat = stats['latency_ms']
+        color = RED if stats['errors'] else GREEN
+        label = f"{BOLD}{name:<12}{RESET}" if name == 'checkout' else f"{name:<12}"
+        print(f"{label} {lat['count']:>6} {color}{stats['errors']:>6}{RESET} {lat['p50']:>7.0f}ms "
+              f"{lat['p95']:>7.0f}ms {lat['p99']:>7.0f}ms {lat['max']:>7.0f}ms")
+
+    if report['failures']:
+        print(f"\n{RED}{BOLD}Failures{RESET}")
+        for message, count in sorted(report['failures'].items(), key=lambda item: -item[1]):
+            print(f"  {RED}✗{RESET} {count:>5} x {message}")
+
+    summary = report['summary']
+    print(f"\n{BOLD}Summary{RESET}")
+    print(f"Journeys:       {summary['journeys']} ({summary['completed']} completed)")
+    print(f"Requests:       {summary['requests']} in {summary['wall_time_s']:.2f}s "
+          f"({summary['requests_per_second']:.1f} req/s)\n")
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Run shopper journeys with asyncio virtual users")
+    parser.add_argument('--base-url', default=BASE_URL)
+    parser.add_argument('--users', type=int, default=100, help="Number of virtual users")
+    parser.add_argument('--ramp-up', type=float, default=10.0, help="Seconds over which users start")
+    parser.add_argument('--iterations', type=int, default=1, help="Journeys per user")
+    parser.add_argument('--mix', default='browse=3,purchase=1', help="Journey weights, e.g. browse=3,purchase=1")
+    parser.add_argument('--think-time', type=float, default=1.0,
+                        help="Mean think time between steps in seconds (exponential, 0 disables)")
+    parser.add_argument('--connections', type=int, default=100,
+                        help="Connection pool size (HTTP/2: concurrent streams on one connection)")
+    parser.add_argument('--protocol', choices=PROTOCOLS, default='h1',
+                        help="h1: HTTP/1.1 connection pool; h2: multiplexed HTTP/2 (needs the h2 package)")
+    parser.add_argument('--timeout', type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument('--seed', type=int, default=42, help="Seed for per-user choices and think times")
+    parser.add_argument('--variant-id', help="Variant added to carts (default: ask /api/dev-first-variant)")
+    parser.add_argument('--live', action='store_true', help="Show a live dashboard during the run")
+    parser.add_argument('--metrics-port', type=int,
+                        help="Serve live OpenMetrics at http://127.0.0.1:PORT/metrics during the run")
+    parser.add_argument('--output', default=REPORT_FILE)
+    args = parser.parse_args()
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        print(f"{RED}Error: {e}{RESET}")
+        sys.exit(2)
+
+    print(f"\n{BLUE}{BOLD}{'='*80}")
+    print("Lab Essentials E-Commerce - Shopper Journey Load")
+    print(f"Testing against: {args.base_url}")
+    print(f"Users: {args.users} | Ramp-up: {args.ramp_up:g}s | Iterations: {args.iterations} | "
+          f"Mix: {args.mix} | Think time: {args.think_time:g}s | Protocol: {args.protocol}")
+    print(f"{'='*80}{RESET}\n")
+
+    settings = {k: v for k, v in vars(args).items() if k != 'output'}
+    stats = StatsAggregator() if args.live or args.metrics_port else None
+    dashboard = LiveDashboard(stats, "Shopper journeys").start() if args.live else None
+    metrics = None
+    if args.metrics_port:
+        metrics = exporters.MetricsServer(lambda: exporters.aggregator_metrics(stats, 'journey_load'),
+                                          port=args.metrics_port).start()
+        print(f"{CYAN}Live metrics: {metrics.url}{RESET}\n")
+    try:
+        results, wall_s, requests_sent = asyncio.run(run_load(
+            args.base_url, args.users, args.ramp_up, args.iterations, mix, args.think_time,
+            args.connections, args.seed, args.timeout, args.variant_id, stats, args.protocol))
+    except KeyboardInterrupt:
+        print(f"\n{YELLOW}Load run interrupted by user{RESET}")
+        sys.exit(1)
+    except (ClientError, OSError, ValueError) as e:
+        print(f"{RED}Error: {e}{RESET}")
+        sys.exit(1)
+    finally:
+        if dashboard:
+            dashboard.stop()
+        if metrics:
+            metrics.stop()
+
+    report = build_report(results, wall_s, requests_sent, settings)
+    print_report(report)
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"{BLUE}JSON report saved to: {args.output}{RESET}\n")
+
+    sys.exit(0 if report['summary']['completed'] == report['summary']['journeys'] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Live Terminal Dashboard for Long-Running Test, Load and Crawl Jobs
+
+Two pieces:
+- StatsAggregator: cheap counters the job updates per request (in flight,
+  status counts, a latency histogram per one-second bucket) and per unit
+  of work (progress, custom gauges). Nothing is formatted on this path.
+- LiveDashboard: a background thread that snapshots the aggregator a few
+  times per second and redraws a block of lines in place at the bottom of
+  the terminal. Regular print() output keeps working: it scrolls above the
+  block. When stdout is not a terminal a plain status line is printed
+  every few seconds instead.
+
+AsyncHTTPClient(stats=aggregator) feeds request stats automatically;
+other jobs call request_started()/request_finished() or advance().
+weight_search_progress() adapts QuizValidator.optimize_weights progress.
+"""
+
+import sys
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from comprehensive_api_tests import GREEN, RED, YELLOW, CYAN, BOLD, RESET
+from perf_stats import LatencyHistogram
+
+# Seconds of history behind the rolling throughput and percentiles
+WINDOW_S = 10
+
+
+class StatsAggregator:
+    """Thread-safe, low-overhead counters sampled by LiveDashboard"""
+
+    def __init__(self, total: Optional[int] = None, window_s: int = WINDOW_S):
+        self.total = total
+        self.window_s = window_s
+        self.started = time.monotonic()
+        self.done = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.statuses: Dict[str, int] = {}
+        self.gauges: Dict[str, Tuple[str, tuple]] = {}
+        self._buckets: Deque[List] = deque()  # [second, completions, LatencyHistogram]
+        self._progress: Deque[List] = deque()  # [second, units done]
+        self._latency = LatencyHistogram()  # since start, for exporters
+        self._lock = threading.Lock()
+
+    def request_started(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+
+    def request_finished(self, status: str, elapsed_ms: float) -> None:
+        second = int(time.monotonic())
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+            if not self._buckets or self._buckets[-1][0] != second:
+                self._buckets.append([second, 0, LatencyHistogram()])
+                while self._buckets[0][0] <= second - self.window_s:
+                    self._buckets.popleft()
+            bucket = self._buckets[-1]
+            bucket[1] += 1
+            bucket[2].record(elapsed_ms)
+            self._latency.record(elapsed_ms)
+
+    def advance(self, units: int = 1) -> None:
+        """Count finished units of work (tests, journeys, handles, weight evaluations)"""
+        second = int(time.monotonic())
+        with self._lock:
+            self.done += units
+            if not self._progress or self._progress[-1][0] != second:
+                self._progress.append([second, 0])
+                while self._progress[0][0] <= second - self.window_s:
+                    self._progress.popleft()
+            self._progress[-1][1] += units
+
+    def gauge(self, name: str, fmt: str, *values) -> None:
+        """Show a value (e.g. best accuracy so far); fmt is only applied when the dashboard draws"""
+        with self._lock:
+            self.gauges[name] = (fmt, values)
+
+    def snapshot(self) -> Dict:
+        """Consistent copy of the current numbers, with rolling rates and percentiles"""
+        now = time.monotonic()
+        with self._lock:
+            recent = [b for b in self._buckets if b[0] > int(now) - self.window_s]
+            window = LatencyHistogram()
+            for bucket in recent:
+                window.merge(bucket[2])
+            progress_recent = sum(n for second, n in self._progress if second > int(now) - self.window_s)
+            snap = {
+                'elapsed_s': now - self.started,
+                'done': self.done,
+                'total': self.total,
+                'in_flight': self.in_flight,
+                'completed': self.completed,
+                'statuses': dict(self.statuses),
+                'gauges': dict(self.gauges),
+            }
+        span = min(self.window_s, max(snap['elapsed_s'], 1e-9))
+        snap['throughput'] = sum(b[1] for b in recent) / span
+        snap['progress_rate'] = progress_recent / span
+        snap['window'] = window.summary()
+        return snap
+
+    def cumulative(self) -> Dict:
+        """Totals since the start, including a copy of the latency histogram"""
+        with self._lock:
+            return {
+                'done': self.done,
+                'total': self.total,
+                'in_flight': self.in_flight,
+                'statuses': dict(self.statuses),
+                'latency': LatencyHistogram().merge(self._latency),
+            }
+
+
+def _clock(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+
+def render(title: str, snap: Dict, color: bool = True) -> List[str]:
+    """Dashboard lines for one snapshot"""
+    c = (lambda code: code) if color else (lambda code: '')
+    lines = [f"{c(BOLD)}{c(CYAN)}{title}{c(RESET)} | elapsed {_clock(snap['elapsed_s'])}"]
+
+    if snap['total']:
+        fraction = min(snap['done'] / snap['total'], 1.0)
+        bar = '#' * int(fraction * 30)
+        rate = snap['progress_rate']
+        eta = _clock((snap['total'] - snap['done']) / rate) if rate > 0 else '--'
+        lines.append(f"[{bar:<30}] {snap['done']}/{snap['total']} ({fraction:.0%}) | "
+                     f"{rate:.1f}/s | ETA {eta}")
+    elif snap['done']:
+        lines.append(f"Done: {snap['done']} | {snap['progress_rate']:.1f}/s")
+
+    if snap['completed'] or snap['in_flight']:
+        window = snap['window']
+        lines.append(f"Requests: {snap['throughput']:.1f}/s | in flight {snap['in_flight']} | "
+                     f"completed {snap['completed']}")
+        lines.append(f"Latency ({WINDOW_S}s): p50 {window['p50']:.0f}ms | p99 {window['p99']:.0f}ms | "
+                     f"max {window['max']:.0f}ms")
+        parts = []
+        for status, n in sorted(snap['statuses'].items()):
+            code = GREEN if status.startswith(('2', '3')) else YELLOW if status.startswith('4') else RED
+            parts.append(f"{c(code)}{status}: {n}{c(RESET)}")
+        lines.append(f"Statuses: {', '.join(parts)}")
+
+    for name, (fmt, values) in snap['gauges'].items():
+        lines.append(f"{name}: {fmt.format(*values)}")
+    return lines
+
+
+def weight_search_progress(aggregator: StatsAggregator) -> Callable:
+    """Progress callback for QuizValidator.optimize_weights that feeds the dashboard"""
+    started = time.monotonic()
+
+    def progress(examined: int, total: int, evaluated: int, best_accuracy: float) -> None:
+        aggregator.total = total
+        aggregator.advance()
+        elapsed = max(time.monotonic() - started, 1e-9)
+        aggregator.gauge('Evaluations', "{} ({:.1f}/s)", evaluated, evaluated / elapsed)
+        aggregator.gauge('Best accuracy', "{:.1f}%", best_accuracy)
+
+    return progress
+
+
+class _Passthrough:
+    """stdout wrapper that lifts the dashboard block out of the way of regular output"""
+
+    def __init__(self, dashboard: 'LiveDashboard', stream):
+        self._dashboard = dashboard
+        self._stream = stream
+
+    def write(self, text: str) -> int:
+        with self._dashboard._draw_lock:
+            self._dashboard._erase()
+            return self._stream.write(text)
+
+    def flush(self) -> None:
+        self._stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+class LiveDashboard:
+    """Redraw the aggregator's numbers in place from a background thread"""
+
+    def __init__(self, aggregator: StatsAggregator, title: str, interval: float = 0.5,
+                 plain_interval: float = 10.0, stream=None):
+        self.aggregator = aggregator
+        self.title = title
+        self.stream = stream or sys.stdout
+        self.interactive = self.stream.isatty()
+        self.interval = interval if self.interactive else plain_interval
+        self._drawn = 0
+        self._draw_lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._saved_stdout = None
+
+    def _erase(self) -> None:
+        if self._drawn:
+            self.stream.write(f"\033[{self._drawn}F\033[J")
+            self._drawn = 0
+
+    def _draw(self) -> None:
+        snap = self.aggregator.snapshot()
+        with self._draw_lock:
+            if self.interactive:
+                lines = render(self.title, snap)
+                self._erase()
+                self.stream.write(''.join(f"{line}\033[K\n" for line in lines))
+                self._drawn = len(lines)
+            else:
+                self.stream.write(' | '.join(render(self.title, snap, color=False)) + "\n")
+            self.stream.flush()
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._draw()
+
+    def start(self) -> 'LiveDashboard':
+        if self.interactive and self.stream is sys.stdout:
+            self._saved_stdout = sys.stdout
+            sys.stdout = _Passthrough(self, self.stream)
+        self._thread = threading.Thread(target=self._loop, name='live-dashboard', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop refreshing and leave the final numbers on screen"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        if self._saved_stdout is not None:
+            sys.stdout = self._saved_stdout
+        self._draw()
+        with self._draw_lock:
+            self._drawn = 0
+        self.stream.write("\n")
+
+    def __enter__(self) -> 'LiveDashboard':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
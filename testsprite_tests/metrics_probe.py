@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Parallel Fan-Out Latency Probe for the Admin Metrics Endpoints
+
+The admin dashboard loads /api/metrics/{ga4,clarity,impact,reddit,shopify,
+taboola} at the same time. This probe does the same, over a browser-sized
+connection pool, and for each simulated dashboard load measures:
+- Each route's latency
+- Time until every card has loaded, compared with the sum and the maximum
+  of the individual latencies
+
+The serialization index is (total - max) / (sum - max): 0 means the routes
+really ran in parallel, 1 means the dashboard waited for them one by one.
+
+--sweep runs against an in-process stand-in server instead and adds an
+injected upstream delay to every metrics route, showing how each route's
+latency (and the dashboard total) grows with the delay.
+
+Usage:
+    python3 testsprite_tests/metrics_probe.py --rounds 10
+    python3 testsprite_tests/metrics_probe.py --sweep 0,100,250,500,1000
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from aio_client import AsyncHTTPClient, ClientError
+from comprehensive_api_tests import BASE_URL, GREEN, RED, YELLOW, BLUE, CYAN, BOLD, RESET
+from perf_stats import percentile, slope, summarize
+
+REPORT_FILE = "testsprite_tests/metrics_probe_report.json"
+
+METRICS_ROUTES = ['ga4', 'clarity', 'impact', 'reddit', 'shopify', 'taboola']
+
+# Browsers open at most six HTTP/1.1 connections per host
+BROWSER_CONNECTIONS = 6
+
+
+def route_params(route: str, days: int) -> Dict[str, str]:
+    """Query parameters the dashboard sends (the default 7-day range)"""
+    if route == 'impact':
+        return {}
+    end = date.today()
+    return {'start': (end - timedelta(days=days)).isoformat(), 'end': end.isoformat()}
+
+
+def serialization_index(latencies: List[float], total: float) -> float:
+    """0 = fully parallel, 1 = fully serial"""
+    longest = max(latencies)
+    spread = sum(latencies) - longest
+    if spread <= 0:
+        return 0.0
+    return min(max((total - longest) / spread, 0.0), 1.0)
+
+
+async def load_dashboard(client: AsyncHTTPClient, days: int) -> Dict:
+    """Fetch every metrics route concurrently, as the dashboard does"""
+    async def fetch(route: str) -> Tuple[str, Optional[int], float, Optional[str]]:
+        start = time.perf_counter()
+        try:
+            response = await client.get(f"/api/metrics/{route}", params=route_params(route, days))
+        except ClientError as e:
+            return route, None, (time.perf_counter() - start) * 1000, str(e)
+        # elapsed_ms excludes time spent waiting for a pooled connection
+        return route, response.status, response.elapsed_ms, None
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(fetch(route) for route in METRICS_ROUTES))
+    total = (time.perf_counter() - start) * 1000
+
+    latencies = [latency for _, _, latency, _ in results]
+    return {
+        'total_ms': total,
+        'sum_ms': sum(latencies),
+        'max_ms': max(latencies),
+        'serialization': serialization_index(latencies, total),
+        'routes': {route: {'status': status, 'latency_ms': latency, 'error': error}
+                   for route, status, latency, error in results},
+    }
+
+
+async def probe(base_url: str, rounds: int, connections: int, days: int, timeout: float) -> List[Dict]:
+    """Simulate several dashboard loads, one after another"""
+    loads = []
+    async with AsyncHTTPClient(base_url, max_connections=connections, timeout=timeout) as client:
+        for _ in range(rounds):
+            loads.append(await load_dashboard(client, days))
+    return loads
+
+
+def summarize_loads(loads: List[Dict]) -> Dict:
+    """Per-route and dashboard-level statistics over several loads"""
+    routes = {}
+    for route in METRICS_ROUTES:
+        samples = [load['routes'][route] for load in loads]
+        statuses: Dict[str, int] = {}
+        for sample in samples:
+            key = str(sample['status']) if sample['status'] is not None else 'error'
+            statuses[key] = statuses.get(key, 0) + 1
+        routes[route] = {
+            'latency_ms': {k: round(v, 2) for k, v in summarize([s['latency_ms'] for s in samples]).items()},
+            'statuses': statuses,
+        }
+    return {
+        'rounds': len(loads),
+        'total_ms': {k: round(v, 2) for k, v in summarize([load['total_ms'] for load in loads]).items()},
+        'sum_ms_p50': round(percentile([load['sum_ms'] for load in loads], 50), 2),
+        'max_ms_p50': round(percentile([load['max_ms'] for load in loads], 50), 2),
+        'serialization_p50': round(percentile([load['serialization'] for load in loads], 50), 3),
+        'routes': routes,
+    }
+
+
+def print_summary(summary: Dict) -> None:
+    """Print per-route latency and the dashboard total"""
+    print(f"{'Route':<10} {'p50':>9} {'p95':>9} {'Max':>9}  Statuses")
+    for route, stats in summary['routes'].items():
+        lat = stats['latency_ms']
+        ok = all(status.startswith('2') for status in stats['statuses'])
+        color = GREEN if ok else YELLOW
+        statuses = ', '.join(f"{status}: {n}" for status, n in sorted(stats['statuses'].items()))
+        print(f"{route:<10} {lat['p50']:>7.0f}ms {lat['p95']:>7.0f}ms {lat['max']:>7.0f}ms  "
+              f"{color}{statuses}{RESET}")
+
+    total = summary['total_ms']
+    index = summary['serialization_p50']
+    color = GREEN if index < 0.2 else YELLOW if index < 0.5 else RED
+    print(f"\nTime to all loaded:   p50 {total['p50']:.0f}ms | p95 {total['p95']:.0f}ms")
+    print(f"Slowest route (p50):  {summary['max_ms_p50']:.0f}ms")
+    print(f"Sum of routes (p50):  {summary['sum_ms_p50']:.0f}ms")
+    print(f"{color}Serialization index:  {index:.2f} (0 = parallel, 1 = serial){RESET}\n")
+
+
+# ==================== STAND-IN DELAY SWEEP ====================
+
+def run_sweep(delays: List[float], rounds: int, connections: int, days: int, timeout: float, seed: int) -> Dict:
+    """Probe an in-process stand-in with increasing upstream delay on every metrics route"""
+    from standin_server import LatencyModel, load_routes, run_in_thread
+
+    table = load_routes(seed=seed)
+    metrics_routes = [r for r in table.routes if r.path.startswith('/api/metrics/')]
+    base_specs = {id(r): dict(r.latency.spec) for r in metrics_routes}
+    server, _ = run_in_thread(table)
+
+    steps = []
+    for delay in delays:
+        for route in metrics_routes:
+            route.latency = LatencyModel({**base_specs[id(route)], 'offset_ms': delay})
+        print(f"{CYAN}Injected upstream delay: {delay:g}ms{RESET}")
+        summary = summarize_loads(asyncio.run(probe(server.base_url, rounds, connections, days, timeout)))
+        print(f"  time to all loaded p50 {summary['total_ms']['p50']:.0f}ms | "
+              f"serialization {summary['serialization_p50']:.2f}")
+        steps.append({'delay_ms': delay, **summary})
+
+    growth = {}
+    for route in METRICS_ROUTES + ['total']:
+        ys = [s['total_ms']['p50'] if route == 'total' else s['routes'][route]['latency_ms']['p50'] for s in steps]
+        growth[route] = round(slope(delays, ys), 3) if len(delays) > 1 else None
+    return {'steps': steps, 'growth_ms_per_ms': growth}
+
+
+def print_sweep(sweep: Dict) -> None:
+    """Print p50 latency per route for each injected delay"""
+    steps = sweep['steps']
+    header = ''.join(f"{s['delay_ms']:>8.0f}ms" for s in steps)
+    print(f"\n{CYAN}{BOLD}p50 latency by injected delay{RESET}")
+    print(f"{'Route':<10}{header}  {'Growth':>8}")
+    for route in METRICS_ROUTES + ['total']:
+        values = [s['total_ms']['p50'] if route == 'total' else s['routes'][route]['latency_ms']['p50']
+                  for s in steps]
+        growth = sweep['growth_ms_per_ms'][route]
+        label = f"{BOLD}{route:<10}{RESET}" if route == 'total' else f"{route:<10}"
+        growth_text = f"{growth:>7.2f}x" if growth is not None else f"{'-':>8}"
+        print(f"{label}{''.join(f'{v:>8.0f}ms' for v in values)}  {growth_text}")
+    print(f"\nGrowth is ms of latency per ms of injected delay: about 1x per route and for the total "
+          f"when the routes run in parallel, about {len(METRICS_ROUTES)}x for the total when they are serialized.\n")
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Probe the admin metrics endpoints the way the dashboard loads them")
+    parser.add_argument('--base-url', default=BASE_URL)
+    parser.add_argument('--rounds', type=int, default=5, help="Dashboard loads to simulate")
+    parser.add_argument('--connections', type=int, default=BROWSER_CONNECTIONS, help="Connection pool size")
+    parser.add_argument('--days', type=int, default=7, help="Date range requested from the routes")
+    parser.add_argument('--timeout', type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument('--sweep', help="Comma-separated upstream delays (ms) to inject on an in-process stand-in")
+    parser.add_argument('--seed', type=int, default=42, help="Stand-in latency seed for --sweep")
+    parser.add_argument('--output', default=REPORT_FILE)
+    args = parser.parse_args()
+
+    target = "in-process stand-in" if args.sweep else args.base_url
+    print(f"\n{BLUE}{BOLD}{'='*80}")
+    print("Lab Essentials E-Commerce - Metrics Dashboard Fan-Out Probe")
+    print(f"Testing against: {target}")
+    print(f"Routes: {', '.join(METRICS_ROUTES)} | Rounds: {args.rounds} | Connections: {args.connections}")
+    print(f"{'='*80}{RESET}\n")
+
+    report = {'timestamp': datetime.now().isoformat(), 'target': target,
+              'settings': {k: v for k, v in vars(args).items() if k != 'output'}}
+    try:
+        if args.sweep:
+            delays = [float(v) for v in args.sweep.split(',') if v.strip()]
+            sweep = run_sweep(delays, args.rounds, args.connections, args.days, args.timeout, args.seed)
+            print_sweep(sweep)
+            report['sweep'] = sweep
+        else:
+            summary = summarize_loads(asyncio.run(
+                probe(args.base_url, args.rounds, args.connections, args.days, args.timeout)))
+            print_summary(summary)
+            report['summary'] = summary
+    except KeyboardInterrupt:
+        print(f"\n{YELLOW}Probe interrupted by user{RESET}")
+        sys.exit(1)
+    except (OSError, ValueError) as e:
+        print(f"{RED}Error: {e}{RESET}")
+        sys.exit(1)
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"{BLUE}JSON report saved to: {args.output}{RESET}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Full-Catalog Pagination Benchmark for Bulk Consumers
+
+Sitemap generation, feeds and sync scripts walk whole listings, not one
+page. This walks /api/products, /api/collections and
+/api/collection-products to the end for several page sizes, in two modes:
+- sequential: fetch a page, process it, then fetch the next
+- prefetch:   request the next page as soon as its cursor is known and
+  process the current page while it is in flight
+
+Pages are followed the way handle_crawler does: the page size goes in
+`limit` (`first` for collection-products) and, while the response carries
+pageInfo.hasNextPage, pageInfo.endCursor is sent back as `after`. A route
+without pageInfo is a single page; the report then shows how many items
+it returns for each requested size, i.e. whether bulk consumers can walk
+it at all.
+
+Per walk: total time, items per second, per-page latency and its drift
+with depth (ms per page), and integrity: items repeated within the walk
+and items skipped (seen by another walk of the same listing but not this
+one). A single-page listing is only expected to match itself at the same
+page size; the items a smaller page size leaves out are reported as
+truncated, not skipped.
+
+Usage:
+    python3 testsprite_tests/pagination_bench.py
+    python3 testsprite_tests/pagination_bench.py --page-sizes 10,50,250 --process-ms 2 --collections microscopes
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from aio_client import AsyncHTTPClient, ClientError
+from comprehensive_api_tests import BASE_URL, GREEN, RED, YELLOW, BLUE, CYAN, BOLD, RESET
+from perf_stats import percentile, slope
+
+REPORT_FILE = "testsprite_tests/pagination_bench_report.json"
+
+# Same safety cap as handle_crawler's listing walk
+MAX_PAGES = 200
+
+MODES = ('sequential', 'prefetch')
+
+# name -> (path, list key, page-size parameter)
+LISTINGS: Dict[str, Tuple[str, str, str]] = {
+    'products': ('/api/products', 'products', 'limit'),
+    'collections': ('/api/collections', 'collections', 'limit'),
+    'collection-products': ('/api/collection-products', 'products', 'first'),
+}
+
+
+@dataclass
+class Page:
+    """One fetched page"""
+    latency_ms: float
+    ids: List[str]
+    next_cursor: Optional[str]
+    paginated: bool
+
+
+@dataclass
+class Walk:
+    """One walk of a listing to its end"""
+    listing: str
+    page_size: int
+    mode: str
+    pages: List[Page] = field(default_factory=list)
+    total_ms: float = 0.0
+    error: Optional[str] = None
+    skipped: int = 0
+    truncated: int = 0
+
+    @property
+    def ids(self) -> List[str]:
+        return [item for page in self.pages for item in page.ids]
+
+    @property
+    def repeated(self) -> int:
+        return len(self.ids) - len(set(self.ids))
+
+    def to_dict(self) -> Dict:
+        latencies = [page.latency_ms for page in self.pages]
+        items = len(self.ids)
+        return {
+            'listing': self.listing,
+            'page_size': self.page_size,
+            'mode': self.mode,
+            'pages': len(self.pages),
+            'items': items,
+            'unique_items': len(set(self.ids)),
+            'largest_page': max((len(page.ids) for page in self.pages), default=0),
+            'paginated': any(page.paginated for page in self.pages),
+            'total_ms': round(self.total_ms, 2),
+            'items_per_s': round(items / (self.total_ms / 1000), 2) if self.total_ms > 0 else 0.0,
+            'page_latency_ms': {
+                'p50': round(percentile(latencies, 50), 2) if latencies else 0.0,
+                'p95': round(percentile(latencies, 95), 2) if latencies else 0.0,
+                'all': [round(v, 2) for v in latencies],
+            },
+            'drift_ms_per_page': round(slope(range(len(latencies)), latencies), 3) if len(latencies) > 1 else None,
+            'repeated': self.repeated,
+            'skipped': self.skipped,
+            'truncated': self.truncated,
+            'error': self.error,
+        }
+
+
+async def fetch_page(client: AsyncHTTPClient, listing: str, page_size: int, cursor: Optional[str],
+                     params: Dict[str, str]) -> Page:
+    """Fetch one page and pull out item ids and the next cursor"""
+    path, key, size_param = LISTINGS[listing]
+    query = {**params, size_param: str(page_size)}
+    if cursor:
+        query['after'] = cursor
+    start = time.perf_counter()
+    response = await client.get(path, params=query)
+    latency = (time.perf_counter() - start) * 1000
+    if response.status != 200:
+        raise ClientError(f"{path} returned {response.status}")
+    data = response.json()
+    items = data.get(key)
+    if not isinstance(items, list):
+        raise ClientError(f"{path} response has no '{key}' list")
+    page_info = data.get('pageInfo')
+    next_cursor = None
+    if isinstance(page_info, dict) and page_info.get('hasNextPage'):
+        next_cursor = page_info.get('endCursor')
+    return Page(latency, [str(item.get('id') or item.get('handle')) for item in items], next_cursor,
+                isinstance(page_info, dict))
+
+
+async def walk_listing(client: AsyncHTTPClient, listing: str, page_size: int, mode: str, process_ms: float,
+                       params: Dict[str, str]) -> Walk:
+    """Walk a listing to the end; process_ms of simulated consumer work per item"""
+    walk = Walk(listing, page_size, mode)
+    cursors_seen = set()
+    start = time.perf_counter()
+    pending = asyncio.ensure_future(fetch_page(client, listing, page_size, None, params))
+    try:
+        while pending is not None:
+            page = await pending
+            walk.pages.append(page)
+            pending = None
+            cursor = page.next_cursor
+            if cursor in cursors_seen:
+                walk.error = f"cursor {cursor!r} returned twice"
+                cursor = None
+            elif len(walk.pages) >= MAX_PAGES and cursor:
+                walk.error = f"stopped after {MAX_PAGES} pages"
+                cursor = None
+            if cursor:
+                cursors_seen.add(cursor)
+            next_page = fetch_page(client, listing, page_size, cursor, params) if cursor else None
+            if next_page is not None and mode == 'prefetch':
+                pending = asyncio.ensure_future(next_page)
+            await asyncio.sleep(process_ms * len(page.ids) / 1000)
+            if next_page is not None and pending is None:
+                pending = asyncio.ensure_future(next_page)
+    except ClientError as e:
+        walk.error = str(e)
+    finally:
+        if pending is not None and not pending.done():
+            pending.cancel()
+    walk.total_ms = (time.perf_counter() - start) * 1000
+    return walk
+
+
+async def collection_handles(client: AsyncHTTPClient, limit: int) -> List[str]:
+    """Collection handles to walk collection-products for"""
+    response = await client.get('/api/collections')
+    if response.status != 200:
+        raise ClientError(f"/api/collections returned {response.status}")
+    return [c['handle'] for c in response.json().get('collections', []) if c.get('handle')][:limit]
+
+
+async def run_bench(base_url: str, listings: List[str], page_sizes: List[int], modes: List[str],
+                    process_ms: float, collections: Optional[List[str]], max_collections: int,
+                    timeout: float) -> List[Walk]:
+    """Every listing x page size x mode, with a warmup fetch per listing"""
+    walks: List[Walk] = []
+    async with AsyncHTTPClient(base_url, max_connections=2, timeout=timeout) as client:
+        targets: List[Tuple[str, str, Dict[str, str]]] = []
+        for listing in listings:
+            if listing == 'collection-products':
+                handles = collections or await collection_handles(client, max_collections)
+                targets += [(f"{listing}:{handle}", listing, {'handle': handle}) for handle in handles]
+            else:
+                targets.append((listing, listing, {}))
+
+        for label, listing, params in targets:
+            print(f"{CYAN}Walking {label}{RESET}")
+            try:
+                await fetch_page(client, listing, page_sizes[0], None, params)
+            except ClientError as e:
+                print(f"  {RED}Warmup failed: {e}{RESET}")
+            group = []
+            for page_size in page_sizes:
+                for mode in modes:
+                    walk = await walk_listing(client, listing, page_size, mode, process_ms, params)
+                    walk.listing = label
+                    group.append(walk)
+            mark_missing(group)
+            walks += group
+    return walks
+
+
+def mark_missing(group: List[Walk]) -> None:
+    """Count items each walk of one listing missed that another walk saw"""
+    reference = set().union(*(set(walk.ids) for walk in group))
+    if any(page.paginated for walk in group for page in walk.pages):
+        # Every walk of a paginated listing should reach every item
+        for walk in group:
+            walk.skipped = len(reference - set(walk.ids))
+        return
+    # A single page is capped by the requested size: only walks of the same size must agree
+    for walk in group:
+        same_size = set().union(*(set(w.ids) for w in group if w.page_size == walk.page_size))
+        walk.skipped = len(same_size - set(walk.ids))
+        walk.truncated = len(reference - same_size)
+
+
+def print_walks(walks: List[Walk]) -> None:
+    """One table per listing"""
+    by_listing: Dict[str, List[Dict]] = {}
+    for walk in walks:
+        by_listing.setdefault(walk.listing, []).append(walk.to_dict())
+    for listing, rows in by_listing.items():
+        print(f"\n{BOLD}{listing}{RESET}")
+        print(f"  {'Size':>5} {'Mode':<11} {'Pages':>5} {'Items':>6} {'Total':>9} {'Items/s':>9} "
+              f"{'Page p50':>9} {'Drift':>10} {'Rep':>4} {'Skip':>4}")
+        for row in rows:
+            drift = f"{row['drift_ms_per_page']:>+7.1f}ms" if row['drift_ms_per_page'] is not None else f"{'-':>9}"
+            bad = row['repeated'] or row['skipped'] or row['error']
+            color = RED if bad else ''
+            print(f"  {color}{row['page_size']:>5} {row['mode']:<11} {row['pages']:>5} {row['items']:>6} "
+                  f"{row['total_ms']:>7.0f}ms {row['items_per_s']:>9.1f} {row['page_latency_ms']['p50']:>7.0f}ms "
+                  f"{drift} {row['repeated']:>4} {row['skipped']:>4}{RESET if color else ''}")
+            if row['error']:
+                print(f"        {RED}{row['error']}{RESET}")
+        print(f"  {_recommend(rows)}")
+
+
+def _recommend(rows: List[Dict]) -> str:
+    """Page size bulk consumers should use for this listing"""
+    completed = [row for row in rows if not row['error']]
+    if not completed:
+        return f"{RED}Benchmark failed: every walk errored, so nothing is known about this listing{RESET}"
+    if not any(row['paginated'] for row in completed):
+        returned = ', '.join(f"{size} -> {largest}" for size, largest in
+                             sorted({(row['page_size'], row['largest_page']) for row in completed}))
+        truncated = max(row['truncated'] for row in completed)
+        note = f"; smaller sizes leave out up to {truncated} item(s)" if truncated else ""
+        return (f"{YELLOW}Not paginated: a single page per request (requested -> returned: {returned}){note}; "
+                f"bulk consumers cannot walk this listing through the API{RESET}")
+    clean = [row for row in rows if not (row['repeated'] or row['skipped'] or row['error'])]
+    if not clean:
+        return f"{RED}Every walk repeated, skipped or failed; no safe page size{RESET}"
+    best = max(clean, key=lambda row: row['items_per_s'])
+    return (f"{GREEN}Use page size {best['page_size']} ({best['mode']}): "
+            f"{best['items_per_s']:.0f} items/s, {best['pages']} pages{RESET}")
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Walk the catalog listings to the end for several page sizes")
+    parser.add_argument('--base-url', default=BASE_URL)
+    parser.add_argument('--listings', default=','.join(LISTINGS), help="Comma-separated listings to walk")
+    parser.add_argument('--page-sizes', default='5,10,20,50,100,250', help="Comma-separated page sizes")
+    parser.add_argument('--modes', default=','.join(MODES), help="sequential, prefetch or both")
+    parser.add_argument('--process-ms', type=float, default=1.0,
+                        help="Simulated consumer work per item (what prefetching overlaps)")
+    parser.add_argument('--collections', help="Comma-separated collection handles for collection-products")
+    parser.add_argument('--max-collections', type=int, default=3,
+                        help="Collections to walk when --collections is not given")
+    parser.add_argument('--timeout', type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument('--output', default=REPORT_FILE)
+    args = parser.parse_args()
+
+    listings = [name.strip() for name in args.listings.split(',') if name.strip()]
+    modes = [mode.strip() for mode in args.modes.split(',') if mode.strip()]
+    unknown = sorted(set(listings) - set(LISTINGS)) + sorted(set(modes) - set(MODES))
+    if unknown:
+        parser.error(f"unknown listing(s) or mode(s): {', '.join(unknown)}")
+    try:
+        page_sizes = [int(v) for v in args.page_sizes.split(',') if v.strip()]
+    except ValueError:
+        parser.error("--page-sizes must be comma-separated integers")
+    collections = [h.strip() for h in args.collections.split(',') if h.strip()] if args.collections else None
+
+    print(f"\n{BLUE}{BOLD}{'='*80}")
+    print("Lab Essentials E-Commerce - Pagination Walk Benchmark")
+    print(f"Testing against: {args.base_url}")
+    print(f"Listings: {', '.join(listings)} | Page sizes: {args.page_sizes} | Modes: {', '.join(modes)} | "
+          f"Processing: {args.process_ms:g}ms/item")
+    print(f"{'='*80}{RESET}\n")
+
+    try:
+        walks = asyncio.run(run_bench(args.base_url, listings, page_sizes, modes, args.process_ms,
+                                      collections, args.max_collections, args.timeout))
+    except KeyboardInterrupt:
+        print(f"\n{YELLOW}Benchmark interrupted by user{RESET}")
+        sys.exit(1)
+    except (ClientError, OSError, ValueError) as e:
+        print(f"{RED}Error: {e}{RESET}")
+        sys.exit(1)
+
+    print_walks(walks)
+    rows = [walk.to_dict() for walk in walks]
+    report = {'timestamp': datetime.now().isoformat(), 'base_url': args.base_url,
+              'settings': {k: v for k, v in vars(args).items() if k != 'output'}, 'walks': rows}
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n{BLUE}JSON report saved to: {args.output}{RESET}\n")
+    failed = any(row['repeated'] or row['skipped'] or row['error'] for row in rows)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Response Payload Size and Compression Audit
+
+Requests every audited endpoint twice, once with Accept-Encoding: identity
+and once with Accept-Encoding: gzip, br, and records:
+- Raw (decoded) and transfer (on the wire) body sizes and the compression ratio
+- What gzip would save when the server did not compress the response
+- JSON shape: field count, node count, depth and the largest subtrees
+  (array items are folded together, e.g. products[*].descriptionHtml)
+- Whether raw and transfer sizes fit the byte budgets declared for the
+  endpoint in testsprite_backend_test_plan.json (see perf_budgets.py)
+
+Each audit is appended to the run history next to the suites' latency
+runs (suite "payload_audit"); `perf_history.py sizes` shows the trend.
+
+Usage:
+    python3 testsprite_tests/payload_audit.py
+    python3 testsprite_tests/payload_audit.py --budget /api/products=raw:20000,transfer:4000 --top 8
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import sys
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import perf_budgets
+import perf_history
+from aio_client import AsyncHTTPClient, ClientError, decode_body
+from comprehensive_api_tests import BASE_URL, GREEN, RED, YELLOW, BLUE, CYAN, BOLD, RESET
+
+REPORT_FILE = "testsprite_tests/payload_audit_report.json"
+
+COMPRESSED_ENCODINGS = "gzip, br"
+
+# Endpoints audited: (label, path, query)
+AUDIT_ENDPOINTS: List[Tuple[str, str, Dict[str, str]]] = [
+    ("Health Check", "/api/health-check", {}),
+    ("Products", "/api/products", {"limit": "10"}),
+    ("Featured Products", "/api/featured-products", {}),
+    ("Collections", "/api/collections", {}),
+    ("Menu", "/api/menu", {}),
+    ("Collection Products", "/api/collection-products", {"handle": "microscopes"}),
+    ("Product by Handle", "/api/product-by-handle", {"handle": "revelation-series"}),
+    ("Cache Health", "/api/cache/health", {}),
+]
+
+
+# ==================== BUDGETS ====================
+
+def parse_budget_override(text: str) -> Tuple[str, Dict[str, int]]:
+    """Parse PATH=raw:BYTES,transfer:BYTES"""
+    path, _, spec = text.partition('=')
+    budget = {}
+    for item in spec.split(','):
+        kind, _, value = item.partition(':')
+        if kind not in ('raw', 'transfer'):
+            raise ValueError(f"Unknown budget kind '{kind}' (use raw or transfer)")
+        budget[f"{kind}_bytes"] = int(value)
+    return path, budget
+
+
+# ==================== JSON SHAPE ====================
+
+def _json_size(value: Any) -> int:
+    return len(json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+
+def measure_tree(data: Any) -> Dict:
+    """Field/node counts, depth, and compact-serialized bytes per path (array items folded)"""
+    path_bytes: Dict[str, int] = {}
+    counts = {'fields': 0, 'nodes': 0, 'arrays': 0, 'max_depth': 0}
+
+    def walk(node: Any, path: str, depth: int) -> int:
+        counts['nodes'] += 1
+        counts['max_depth'] = max(counts['max_depth'], depth)
+        if isinstance(node, dict):
+            counts['fields'] += len(node)
+            size = 2 + max(len(node) - 1, 0)
+            for key, value in node.items():
+                child = f"{path}.{key}" if path else key
+                size += _json_size(key) + 1 + walk(value, child, depth + 1)
+        elif isinstance(node, list):
+            counts['arrays'] += 1
+            size = 2 + max(len(node) - 1, 0)
+            for value in node:
+                size += walk(value, f"{path}[*]", depth + 1)
+        else:
+            size = _json_size(node)
+        if path:
+            path_bytes[path] = path_bytes.get(path, 0) + size
+        return size
+
+    total = walk(data, '', 0)
+    return {**counts, 'compact_bytes': total, 'path_bytes': path_bytes}
+
+
+def largest_subtrees(path_bytes: Dict[str, int], total: int, top: int) -> List[Dict]:
+    """Largest paths by bytes, skipping wrappers whose bytes are almost all one child's"""
+    def is_wrapper(path: str, size: int) -> bool:
+        return any(child != path and child.startswith(path) and child[len(path)] in '.['
+                   and child_size >= 0.9 * size for child, child_size in path_bytes.items())
+
+    ranked = sorted(((p, b) for p, b in path_bytes.items() if not is_wrapper(p, b)),
+                    key=lambda item: item[1], reverse=True)
+    return [{'path': path, 'bytes': size, 'share': round(size / total, 4) if total else 0.0}
+            for path, size in ranked[:top]]
+
+
+# ==================== AUDIT ====================
+
+async def audit_endpoint(client: AsyncHTTPClient, label: str, path: str, query: Dict[str, str],
+                         budget: Optional[Dict], top: int) -> Dict:
+    """Fetch one endpoint uncompressed and compressed and measure both"""
+    identity = await client.get(path, params=query, headers={'Accept-Encoding': 'identity'})
+    compressed = await client.get(path, params=query, headers={'Accept-Encoding': COMPRESSED_ENCODINGS})
+
+    raw_body = identity.body
+    if identity.headers.get('content-encoding'):
+        # Server compressed despite identity; measure the decoded body
+        raw_body = decode_body(identity.body, identity.headers['content-encoding'])
+    encoding = compressed.headers.get('content-encoding', 'identity')
+    raw_bytes, transfer_bytes = len(raw_body), compressed.wire_bytes
+
+    result = {
+        'label': label,
+        'path': path,
+        'query': query,
+        'status': identity.status,
+        'content_type': identity.headers.get('content-type', ''),
+        'raw_bytes': raw_bytes,
+        'transfer_bytes': transfer_bytes,
+        'encoding': encoding,
+        'ratio': round(transfer_bytes / raw_bytes, 4) if raw_bytes else 1.0,
+        'latency_ms': round(compressed.elapsed_ms, 2),
+    }
+    if encoding == 'identity' and raw_bytes:
+        # Size the body would have had under the server's default gzip level
+        result['gzip_potential_bytes'] = len(gzip.compress(raw_body, compresslevel=6, mtime=0))
+
+    try:
+        shape = measure_tree(json.loads(raw_body))
+        result['fields'] = shape['fields']
+        result['nodes'] = shape['nodes']
+        result['max_depth'] = shape['max_depth']
+        result['largest_subtrees'] = largest_subtrees(shape['path_bytes'], shape['compact_bytes'], top)
+    except ValueError:
+        result['fields'] = None
+
+    # Latency budgets are enforced by the test suite over repeated samples, not here
+    checks = perf_budgets.evaluate(budget, sizes={'raw_bytes': raw_bytes, 'transfer_bytes': transfer_bytes})
+    result['budget_checks'] = [check.to_dict() for check in checks]
+    result['violations'] = [perf_budgets.describe(check) for check in perf_budgets.breaches(checks)]
+    result['warnings'] = [perf_budgets.describe(check) for check in perf_budgets.breaches(checks, 'warn')]
+    return result
+
+
+async def run_audit(base_url: str, budgets: Dict[str, Dict], top: int, timeout: float) -> List[Dict]:
+    """Audit every endpoint in AUDIT_ENDPOINTS"""
+    results = []
+    async with AsyncHTTPClient(base_url, max_connections=1, timeout=timeout, decompress=False) as client:
+        for label, path, query in AUDIT_ENDPOINTS:
+            try:
+                results.append(await audit_endpoint(client, label, path, query, budgets.get(path), top))
+            except ClientError as e:
+                results.append({'label': label, 'path': path, 'query': query, 'error': str(e),
+                                'violations': [f"request failed: {e}"], 'warnings': []})
+    return results
+
+
+def print_results(results: List[Dict], top: int) -> None:
+    """Print the size table and the largest subtrees per endpoint"""
+    print(f"{'Endpoint':<22} {'Raw':>9} {'Transfer':>9} {'Enc':>8} {'Ratio':>6} {'Fields':>7} {'Depth':>5}  Budget")
+    for r in results:
+        if 'error' in r:
+            print(f"{r['label']:<22} {RED}{r['error']}{RESET}")
+            continue
+        if r['violations']:
+            verdict = f"{RED}✗ over{RESET}"
+        elif r['warnings']:
+            verdict = f"{YELLOW}! over (warn){RESET}"
+        elif r['budget_checks']:
+            verdict = f"{GREEN}✓ ok{RESET}"
+        else:
+            verdict = f"{YELLOW}- none{RESET}"
+        fields = r['fields'] if r['fields'] is not None else '-'
+        depth = r.get('max_depth', '-')
+        print(f"{r['label']:<22} {r['raw_bytes']:>8}B {r['transfer_bytes']:>8}B {r['encoding']:>8} "
+              f"{r['ratio']:>6.2f} {fields:>7} {depth:>5}  {verdict}")
+
+    uncompressed = [r for r in results if r.get('gzip_potential_bytes') and r['raw_bytes'] >= 1024]
+    if uncompressed:
+        print(f"\n{YELLOW}Served uncompressed (gzip would send):{RESET}")
+        for r in uncompressed:
+            print(f"  {r['label']:<22} {r['raw_bytes']:>8}B -> {r['gzip_potential_bytes']:>7}B")
+
+    for r in results:
+        if r.get('largest_subtrees'):
+            print(f"\n{CYAN}{r['label']} - largest subtrees{RESET}")
+            for subtree in r['largest_subtrees'][:top]:
+                print(f"  {subtree['path'][:56]:<56} {subtree['bytes']:>8}B {subtree['share']:>6.1%}")
+
+    violations = [(r['label'], v) for r in results for v in r['violations']]
+    if violations:
+        print(f"\n{RED}{BOLD}Budget violations ({len(violations)}){RESET}")
+        for label, violation in violations:
+            print(f"  {RED}✗{RESET} {label}: {violation}")
+    warnings = [(r['label'], w) for r in results for w in r['warnings']]
+    if warnings:
+        print(f"\n{YELLOW}{BOLD}Budget warnings ({len(warnings)}){RESET}")
+        for label, warning in warnings:
+            print(f"  {YELLOW}!{RESET} {label}: {warning}")
+    print()
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Audit API payload sizes and compression")
+    parser.add_argument('--base-url', default=BASE_URL)
+    parser.add_argument('--test-plan', default=perf_budgets.TEST_PLAN_FILE,
+                        help="Test plan holding per-endpoint budgets")
+    parser.add_argument('--budget', action='append', default=[], metavar='PATH=raw:BYTES,transfer:BYTES',
+                        help="Override a budget (repeatable)")
+    parser.add_argument('--top', type=int, default=5, help="Largest subtrees to list per endpoint")
+    parser.add_argument('--timeout', type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument('--no-history', action='store_true', help="Do not append this audit to the run history")
+    parser.add_argument('--output', default=REPORT_FILE)
+    args = parser.parse_args()
+
+    try:
+        budgets = perf_budgets.load_budgets(args.test_plan)
+        for item in args.budget:
+            path, budget = parse_budget_override(item)
+            budgets[path] = {**budgets.get(path, {}), **budget}
+    except (OSError, ValueError, KeyError) as e:
+        print(f"{RED}Error loading budgets: {e}{RESET}")
+        sys.exit(2)
+
+    print(f"\n{BLUE}{BOLD}{'='*80}")
+    print("Lab Essentials E-Commerce - Payload Size & Compression Audit")
+    print(f"Testing against: {args.base_url}")
+    print(f"Compressed request: Accept-Encoding: {COMPRESSED_ENCODINGS}")
+    print(f"{'='*80}{RESET}\n")
+
+    try:
+        results = asyncio.run(run_audit(args.base_url, budgets, args.top, args.timeout))
+    except KeyboardInterrupt:
+        print(f"\n{YELLOW}Audit interrupted by user{RESET}")
+        sys.exit(1)
+    except OSError as e:
+        print(f"{RED}Error: {e}{RESET}")
+        sys.exit(1)
+
+    print_results(results, args.top)
+
+    report = {'timestamp': datetime.now().isoformat(), 'base_url': args.base_url, 'endpoints': results}
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"{BLUE}JSON report saved to: {args.output}{RESET}")
+
+    if not args.no_history:
+        measured = [r for r in results if 'error' not in r]
+        run = perf_history.append_run(
+            'payload_audit', args.base_url,
+            {r['label']: [r['latency_ms']] for r in measured},
+            extra={'payload': {r['label']: {k: r[k] for k in ('raw_bytes', 'transfer_bytes', 'encoding', 'fields')}
+                               for r in measured}},
+        )
+        print(f"{BLUE}Run {run['run_id']} appended to {perf_history.HISTORY_FILE}{RESET}")
+    print()
+
+    sys.exit(1 if any(r['violations'] for r in results) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Performance Budgets Declared in the Test Plan
+
+Endpoint entries in testsprite_backend_test_plan.json may carry a budgets
+object; every key is optional:
+
+    "budgets": {
+      "latency_ms": {"p50": 800, "p95": 2000, "max": 4000},
+      "raw_bytes": 65536,
+      "transfer_bytes": 12288,
+      "on_breach": "warn"
+    }
+
+A breach fails the test unless on_breach is "warn" (or the runner is in
+warn mode). Every check records the budget, the measured value and the
+headroom left, so reports show how close a passing test came. A budgeted
+size that could not be measured (e.g. transfer_bytes of a compressed,
+chunked response) is reported as "unmeasured" rather than passed.
+"""
+
+import json
+import os
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Sequence
+
+from perf_stats import percentile
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+TEST_PLAN_FILE = os.path.join(SCRIPT_DIR, 'testsprite_backend_test_plan.json')
+
+BUDGET_MODES = ('fail', 'warn', 'off')
+LATENCY_METRICS = ('p50', 'p95', 'max')
+SIZE_METRICS = ('raw_bytes', 'transfer_bytes')
+
+
+@dataclass
+class BudgetCheck:
+    """One measured value compared against its budget"""
+    metric: str
+    budget: float
+    measured: Optional[float]
+    status: str  # ok | warn | fail | unmeasured
+
+    @property
+    def headroom(self) -> Optional[float]:
+        return self.budget - self.measured if self.measured is not None else None
+
+    @property
+    def headroom_pct(self) -> Optional[float]:
+        if self.measured is None:
+            return None
+        return self.headroom / self.budget * 100 if self.budget else 0.0
+
+    def to_dict(self) -> Dict:
+        if self.measured is None:
+            return {**asdict(self), 'headroom': None, 'headroom_pct': None}
+        return {**asdict(self), 'headroom': round(self.headroom, 2), 'headroom_pct': round(self.headroom_pct, 1)}
+
+
+def load_budgets(test_plan_file: str = TEST_PLAN_FILE) -> Dict[str, Dict]:
+    """Per-endpoint budgets from the test plan, keyed by endpoint path"""
+    with open(test_plan_file, 'r') as f:
+        plan = json.load(f)
+    return {entry['endpoint']: entry['budgets'] for entry in plan if entry.get('budgets')}
+
+
+def evaluate(budget: Optional[Dict], samples_ms: Sequence[float] = (),
+             sizes: Optional[Dict[str, int]] = None, mode: str = 'fail') -> List[BudgetCheck]:
+    """Check latency samples and response sizes against an endpoint's budget"""
+    if not budget or mode == 'off':
+        return []
+    breach = 'warn' if mode == 'warn' or budget.get('on_breach') == 'warn' else 'fail'
+
+    measured: Dict[str, float] = {}
+    if samples_ms:
+        for metric in LATENCY_METRICS:
+            measured[f"latency_{metric}_ms"] = max(samples_ms) if metric == 'max' else percentile(samples_ms, int(metric[1:]))
+    for metric in SIZE_METRICS:
+        if sizes and sizes.get(metric) is not None:
+            measured[metric] = sizes[metric]
+
+    limits = {f"latency_{metric}_ms": value for metric, value in budget.get('latency_ms', {}).items()}
+    limits.update({metric: budget[metric] for metric in SIZE_METRICS if metric in budget})
+
+    checks = []
+    for metric, limit in limits.items():
+        if metric in measured:
+            checks.append(BudgetCheck(metric, limit, round(measured[metric], 2),
+                                      'ok' if measured[metric] <= limit else breach))
+        elif metric in SIZE_METRICS:
+            # A size budget is never passed silently; latency is only skipped on purpose (replays)
+            checks.append(BudgetCheck(metric, limit, None, 'unmeasured'))
+    return checks
+
+
+def breaches(checks: Sequence[BudgetCheck], status: str = 'fail') -> List[BudgetCheck]:
+    """Checks with the given breach status"""
+    return [check for check in checks if check.status == status]
+
+
+def describe(check: BudgetCheck) -> str:
+    """Short human-readable line for a check"""
+    unit = 'B' if check.metric.endswith('bytes') else 'ms'
+    if check.measured is None:
+        return f"{check.metric} not measured vs budget {check.budget:.0f}{unit}"
+    return (f"{check.metric} {check.measured:.0f}{unit} vs budget {check.budget:.0f}{unit} "
+            f"(headroom {check.headroom:+.0f}{unit}, {check.headroom_pct:+.0f}%)")
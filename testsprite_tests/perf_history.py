@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Performance Run History and Regression Comparison
+
+Every suite run is appended to perf_history.jsonl (one JSON object per line,
+never rewritten) with the git commit, a timestamp and the latency samples
+recorded for each test. The compare command checks a current run against a
+baseline and fails when a test's p95 regresses past the threshold and a
+one-sided Mann-Whitney U test confirms the slowdown.
+
+Usage:
+    python3 testsprite_tests/perf_history.py list
+    python3 testsprite_tests/perf_history.py compare
+    python3 testsprite_tests/perf_history.py compare --baseline <run-id|commit> --current latest --threshold 10
+    python3 testsprite_tests/perf_history.py sizes
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from perf_stats import mann_whitney_u, percentile
+
+# Color codes for terminal output
+GREEN = '\033[92m'
+RED = '\033[91m'
+YELLOW = '\033[93m'
+BLUE = '\033[94m'
+BOLD = '\033[1m'
+RESET = '\033[0m'
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+HISTORY_FILE = os.path.join(SCRIPT_DIR, 'perf_history.jsonl')
+
+# Suite compared when --suite is not given
+DEFAULT_COMPARE_SUITE = 'comprehensive'
+
+
+def git_commit() -> str:
+    """Return the current git commit (with a -dirty suffix for local changes)"""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=SCRIPT_DIR,
+            capture_output=True, text=True, timeout=5, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ['git', 'status', '--porcelain', '--untracked-files=no'], cwd=SCRIPT_DIR,
+            capture_output=True, text=True, timeout=5
+        ).stdout.strip()
+        return f"{commit}-dirty" if dirty else commit
+    except (OSError, subprocess.SubprocessError):
+        return 'unknown'
+
+
+def append_run(suite: str, base_url: str, samples: Dict[str, List[float]],
+               history_file: str = HISTORY_FILE, extra: Optional[Dict] = None) -> Dict:
+    """Append one run to the history file and return the stored record"""
+    record = {
+        'run_id': uuid.uuid4().hex[:12],
+        'timestamp': datetime.now().isoformat(),
+        'git_commit': git_commit(),
+        'suite': suite,
+        'base_url': base_url,
+        'endpoints': {name: {'samples_ms': values} for name, values in samples.items()},
+    }
+    if extra:
+        record.update(extra)
+
+    with open(history_file, 'a') as f:
+        f.write(json.dumps(record, separators=(',', ':')) + "\n")
+    return record
+
+
+def load_runs(history_file: str = HISTORY_FILE, suite: Optional[str] = None) -> List[Dict]:
+    """Load all runs in file order, optionally filtered by suite"""
+    if not os.path.exists(history_file):
+        return []
+
+    runs = []
+    with open(history_file, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                run = json.loads(line)
+            except json.JSONDecodeError:
+                # A run interrupted mid-write leaves a partial line; skip it
+                continue
+            if suite is None or run.get('suite') == suite:
+                runs.append(run)
+    return runs
+
+
+def resolve_run(runs: List[Dict], ref: str) -> int:
+    """Resolve 'latest', 'previous', a run id or a commit prefix to an index in runs"""
+    if not runs:
+        raise ValueError("No runs recorded yet")
+    if ref == 'latest':
+        return len(runs) - 1
+    if ref == 'previous':
+        if len(runs) < 2:
+            raise ValueError("Need at least two runs for 'previous'")
+        return len(runs) - 2
+
+    for idx in range(len(runs) - 1, -1, -1):
+        run = runs[idx]
+        if run['run_id'] == ref or run.get('git_commit', '').startswith(ref):
+            return idx
+    raise ValueError(f"No run matches '{ref}'")
+
+
+def pooled_samples(runs: List[Dict]) -> Dict[str, List[float]]:
+    """Merge per-endpoint samples across several runs"""
+    pooled: Dict[str, List[float]] = {}
+    for run in runs:
+        for name, entry in run.get('endpoints', {}).items():
+            pooled.setdefault(name, []).extend(entry.get('samples_ms', []))
+    return pooled
+
+
+def compare(baseline: Dict[str, List[float]], current: Dict[str, List[float]],
+            threshold_pct: float, alpha: float, min_samples: int) -> List[Dict]:
+    """Compare p95 latency per endpoint; each row carries a verdict"""
+    rows = []
+    for name in sorted(set(baseline) | set(current)):
+        base, cur = baseline.get(name, []), current.get(name, [])
+        if not base or not cur:
+            rows.append({'name': name, 'verdict': 'missing', 'baseline_p95': None,
+                         'current_p95': None, 'change_pct': None, 'p_value': None})
+            continue
+
+        base_p95, cur_p95 = percentile(base, 95), percentile(cur, 95)
+        change_pct = ((cur_p95 - base_p95) / base_p95 * 100) if base_p95 > 0 else 0.0
+        _, p_value = mann_whitney_u(base, cur)
+
+        if change_pct <= threshold_pct:
+            verdict = 'ok'
+        elif len(base) < min_samples or len(cur) < min_samples:
+            verdict = 'insufficient'
+        elif p_value < alpha:
+            verdict = 'regression'
+        else:
+            verdict = 'noise'
+
+        rows.append({'name': name, 'verdict': verdict, 'baseline_p95': base_p95,
+                     'current_p95': cur_p95, 'change_pct': change_pct, 'p_value': p_value,
+                     'baseline_n': len(base), 'current_n': len(cur)})
+    return rows
+
+
+def cmd_list(args) -> int:
+    """Print the recorded runs"""
+    runs = load_runs(args.history, args.suite)
+    if not runs:
+        print(f"{YELLOW}No runs recorded in {args.history}{RESET}")
+        return 0
+
+    print(f"{'Run':<14} {'Timestamp':<21} {'Commit':<14} {'Suite':<14} {'Tests':>5}")
+    for run in runs[-args.limit:]:
+        print(f"{run['run_id']:<14} {run['timestamp'][:19]:<21} {run.get('git_commit', '')[:12]:<14} "
+              f"{run.get('suite', ''):<14} {len(run.get('endpoints', {})):>5}")
+    return 0
+
+
+def cmd_compare(args) -> int:
+    """Compare the current run against a baseline; returns the exit code"""
+    # Never mix suites: payload audits record one sample per label under their own names
+    suite = args.suite or DEFAULT_COMPARE_SUITE
+    runs = load_runs(args.history, suite)
+    try:
+        current_idx = resolve_run(runs, args.current)
+        if args.baseline:
+            base_idx = resolve_run(runs, args.baseline)
+            baseline_runs = [runs[base_idx]]
+        else:
+            # Default baseline: the runs immediately preceding the current one
+            baseline_runs = runs[max(0, current_idx - args.baseline_runs):current_idx]
+            if not baseline_runs:
+                raise ValueError("No earlier runs to use as a baseline")
+    except ValueError as e:
+        print(f"{RED}Error: {e}{RESET}")
+        return 2
+
+    current_run = runs[current_idx]
+    rows = compare(pooled_samples(baseline_runs), pooled_samples([current_run]),
+                   args.threshold, args.alpha, args.min_samples)
+
+    print(f"\n{BLUE}{BOLD}{'='*80}")
+    print("API Latency Regression Check")
+    print(f"Suite:    {suite}")
+    print(f"Current:  {current_run['run_id']} ({current_run.get('git_commit', '')[:12]})")
+    print(f"Baseline: {', '.join(r['run_id'] for r in baseline_runs)}")
+    print(f"p95 threshold: +{args.threshold:.0f}% | alpha: {args.alpha}")
+    print(f"{'='*80}{RESET}\n")
+
+    colors = {'ok': GREEN, 'regression': RED, 'noise': YELLOW, 'insufficient': YELLOW, 'missing': YELLOW}
+    print(f"{'Test':<36} {'Base p95':>9} {'Cur p95':>9} {'Change':>8} {'p':>7}  Verdict")
+    for row in rows:
+        color = colors[row['verdict']]
+        if row['verdict'] == 'missing':
+            print(f"{row['name']:<36} {'-':>9} {'-':>9} {'-':>8} {'-':>7}  {color}{row['verdict']}{RESET}")
+            continue
+        print(f"{row['name']:<36} {row['baseline_p95']:>7.0f}ms {row['current_p95']:>7.0f}ms "
+              f"{row['change_pct']:>+7.1f}% {row['p_value']:>7.3f}  {color}{row['verdict']}{RESET}")
+
+    if all(row['verdict'] == 'missing' for row in rows):
+        print(f"\n{RED}No test appears in both the baseline and the current run; nothing was compared{RESET}\n")
+        return 2
+
+    regressions = [row for row in rows if row['verdict'] == 'regression']
+    insufficient = [row for row in rows if row['verdict'] == 'insufficient']
+    print()
+    if insufficient:
+        print(f"{YELLOW}{len(insufficient)} test(s) slowed down but have fewer than {args.min_samples} samples "
+              f"on a side and cannot fail the check: record runs with --repeat {args.min_samples} or more{RESET}")
+    if regressions:
+        print(f"{RED}{BOLD}{len(regressions)} p95 regression(s) past +{args.threshold:.0f}%{RESET}\n")
+        return 1
+    print(f"{GREEN}No confirmed p95 regressions{RESET}\n")
+    return 0
+
+
+def cmd_sizes(args) -> int:
+    """Print the payload size trend recorded by payload_audit.py"""
+    runs = [run for run in load_runs(args.history, 'payload_audit') if run.get('payload')][-args.limit:]
+    if not runs:
+        print(f"{YELLOW}No payload audits recorded in {args.history}{RESET}")
+        return 0
+
+    endpoints = sorted({name for run in runs for name in run['payload']})
+    for name in endpoints:
+        print(f"\n{BOLD}{name}{RESET}")
+        print(f"  {'Run':<14} {'Timestamp':<21} {'Raw':>9} {'Transfer':>9} {'Enc':>8} {'Change':>8}")
+        previous = None
+        for run in runs:
+            sizes = run['payload'].get(name)
+            if not sizes:
+                continue
+            change = ''
+            if previous:
+                delta = (sizes['transfer_bytes'] - previous) / previous * 100
+                color = RED if delta > args.threshold else GREEN if delta < 0 else RESET
+                change = f"{color}{delta:>+7.1f}%{RESET}"
+            print(f"  {run['run_id']:<14} {run['timestamp'][:19]:<21} {sizes['raw_bytes']:>8}B "
+                  f"{sizes['transfer_bytes']:>8}B {sizes['encoding']:>8} {change:>8}")
+            previous = sizes['transfer_bytes'] or None
+    print()
+    return 0
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="API latency history and regression checks")
+    parser.add_argument('--history', default=HISTORY_FILE)
+    parser.add_argument('--suite', default=None,
+                        help=f"Only consider runs from this suite (compare defaults to {DEFAULT_COMPARE_SUITE})")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    list_parser = subparsers.add_parser('list', help="List recorded runs")
+    list_parser.add_argument('--limit', type=int, default=20)
+
+    compare_parser = subparsers.add_parser('compare', help="Compare a run against a baseline")
+    compare_parser.add_argument('--current', default='latest')
+    compare_parser.add_argument('--baseline', default=None,
+                                help="Run id or commit (default: pool the preceding runs)")
+    compare_parser.add_argument('--baseline-runs', type=int, default=5)
+    compare_parser.add_argument('--threshold', type=float, default=10.0,
+                                help="Allowed p95 increase in percent")
+    compare_parser.add_argument('--alpha', type=float, default=0.05)
+    compare_parser.add_argument('--min-samples', type=int, default=5,
+                                help="Samples needed on each side before a regression can fail the run "
+                                     "(run the suite with --repeat 5 to record five per test)")
+
+    sizes_parser = subparsers.add_parser('sizes', help="Show the payload size trend per endpoint")
+    sizes_parser.add_argument('--limit', type=int, default=10)
+    sizes_parser.add_argument('--threshold', type=float, default=10.0,
+                              help="Highlight transfer size growth above this percent")
+
+    args = parser.parse_args()
+    handler = {'list': cmd_list, 'compare': cmd_compare, 'sizes': cmd_sizes}[args.command]
+    sys.exit(handler(args))
+
+
+if __name__ == "__main__":
+    main()
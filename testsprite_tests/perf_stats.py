@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Latency Statistics Helpers for the API Test Tooling
+
+Pure-Python helpers shared by the suites and benchmark scripts:
+- Percentiles with linear interpolation
+- Robust repeated-sample summaries (median, MAD, trimmed mean, outliers)
+- Mergeable log-linear latency histogram for combining load workers exactly
+- Mann-Whitney U rank test (normal approximation with tie correction)
+- Least-squares slope for latency-vs-injected-delay sweeps
+"""
+
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Return the pct-th percentile (0-100) using linear interpolation"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return float(ordered[0])
+
+    rank = (len(ordered) - 1) * pct / 100.0
+    low = math.floor(rank)
+    high = math.ceil(rank)
+    if low == high:
+        return float(ordered[low])
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(values: Sequence[float]) -> Dict[str, float]:
+    """Return count/min/p50/p95/p99/max/mean for a list of latencies"""
+    if not values:
+        return {'count': 0, 'min': 0.0, 'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'max': 0.0, 'mean': 0.0}
+    return {
+        'count': len(values),
+        'min': float(min(values)),
+        'p50': percentile(values, 50),
+        'p95': percentile(values, 95),
+        'p99': percentile(values, 99),
+        'max': float(max(values)),
+        'mean': sum(values) / len(values),
+    }
+
+
+def trimmed_mean(values: Sequence[float], proportion: float = 0.1) -> float:
+    """Mean after dropping `proportion` of the samples from each end"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    cut = int(len(ordered) * proportion)
+    kept = ordered[cut:len(ordered) - cut] or ordered
+    return sum(kept) / len(kept)
+
+
+def median_abs_deviation(values: Sequence[float]) -> float:
+    """Median absolute deviation from the median (unscaled)"""
+    if not values:
+        return 0.0
+    median = percentile(values, 50)
+    return percentile([abs(v - median) for v in values], 50)
+
+
+def outliers(values: Sequence[float], threshold: float = 3.5) -> List[int]:
+    """
+    Indexes of samples whose modified z-score exceeds the threshold.
+
+    Uses 0.6745 * (x - median) / MAD (Iglewicz and Hoaglin), which, unlike
+    a mean/stddev z-score, is not dragged along by the outliers themselves.
+    """
+    mad = median_abs_deviation(values)
+    if mad == 0:
+        return []
+    median = percentile(values, 50)
+    return [i for i, v in enumerate(values) if abs(0.6745 * (v - median) / mad) > threshold]
+
+
+def robust_summary(values: Sequence[float], trim: float = 0.1) -> Dict:
+    """Return count/median/MAD/min/trimmed mean and the outlier samples"""
+    flagged = outliers(values)
+    return {
+        'count': len(values),
+        'median': percentile(values, 50),
+        'mad': median_abs_deviation(values),
+        'min': float(min(values)) if values else 0.0,
+        'trimmed_mean': trimmed_mean(values, trim),
+        'outliers': [values[i] for i in flagged],
+    }
+
+
+class LatencyHistogram:
+    """
+    Log-linear latency histogram in microseconds (HDR-histogram style).
+
+    Values below 2**SUB_BUCKET_BITS us are counted exactly; above that every
+    power of two is split into 2**(SUB_BUCKET_BITS - 1) equal buckets, so a
+    reported value is within 0.4% of the recorded one. Bucket boundaries do
+    not depend on the data, so histograms from different workers merge
+    exactly by adding counts; percentiles of the merge equal percentiles
+    of one histogram that had recorded every sample.
+    """
+
+    SUB_BUCKET_BITS = 8
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total_ms = 0.0
+        self.min_ms: Optional[float] = None
+        self.max_ms: Optional[float] = None
+
+    @classmethod
+    def _index(cls, micros: int) -> int:
+        if micros < (1 << cls.SUB_BUCKET_BITS):
+            return micros
+        shift = micros.bit_length() - cls.SUB_BUCKET_BITS
+        return (shift << (cls.SUB_BUCKET_BITS - 1)) + (micros >> shift)
+
+    @classmethod
+    def _midpoint_ms(cls, index: int) -> float:
+        """Representative value (bucket midpoint) of a bucket index, in ms"""
+        half = 1 << (cls.SUB_BUCKET_BITS - 1)
+        if index < (half << 1):
+            return index / 1000.0
+        shift = (index >> (cls.SUB_BUCKET_BITS - 1)) - 1
+        top = index - (shift << (cls.SUB_BUCKET_BITS - 1))
+        return ((top << shift) + (1 << shift) / 2) / 1000.0
+
+    def record(self, value_ms: float) -> None:
+        index = self._index(max(int(round(value_ms * 1000)), 0))
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total_ms += value_ms
+        self.min_ms = value_ms if self.min_ms is None else min(self.min_ms, value_ms)
+        self.max_ms = value_ms if self.max_ms is None else max(self.max_ms, value_ms)
+
+    def merge(self, other: 'LatencyHistogram') -> 'LatencyHistogram':
+        """Add another histogram's counts into this one"""
+        for index, n in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + n
+        self.count += other.count
+        self.total_ms += other.total_ms
+        if other.min_ms is not None:
+            self.min_ms = other.min_ms if self.min_ms is None else min(self.min_ms, other.min_ms)
+            self.max_ms = other.max_ms if self.max_ms is None else max(self.max_ms, other.max_ms)
+        return self
+
+    def percentile(self, pct: float) -> float:
+        """Value at or below which pct percent of the samples fall"""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(self.count * pct / 100.0))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(max(self._midpoint_ms(index), self.min_ms), self.max_ms)
+        return self.max_ms
+
+    def count_at_or_below(self, value_ms: float) -> int:
+        """Samples whose bucket lies at or below value_ms (cumulative histogram bucket)"""
+        return sum(n for index, n in self.counts.items() if self._midpoint_ms(index) <= value_ms)
+
+    def summary(self) -> Dict[str, float]:
+        """Same keys as summarize()"""
+        if not self.count:
+            return summarize([])
+        return {
+            'count': self.count,
+            'min': self.min_ms,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+            'max': self.max_ms,
+            'mean': self.total_ms / self.count,
+        }
+
+    def to_dict(self) -> Dict:
+        return {'counts': {str(k): v for k, v in self.counts.items()}, 'count': self.count,
+                'total_ms': self.total_ms, 'min_ms': self.min_ms, 'max_ms': self.max_ms}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'LatencyHistogram':
+        histogram = cls()
+        histogram.counts = {int(k): v for k, v in data['counts'].items()}
+        histogram.count = data['count']
+        histogram.total_ms = data['total_ms']
+        histogram.min_ms = data['min_ms']
+        histogram.max_ms = data['max_ms']
+        return histogram
+
+
+def slope(xs: Sequence[float], ys: Sequence[float]) -> float:
+    """Least-squares slope of ys against xs"""
+    mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+    denominator = sum((x - mean_x) ** 2 for x in xs)
+    if denominator == 0:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / denominator
+
+
+def _normal_sf(z: float) -> float:
+    """Survival function of the standard normal distribution"""
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def mann_whitney_u(baseline: Sequence[float], current: Sequence[float]) -> Tuple[float, float]:
+    """
+    One-sided Mann-Whitney U test that current latencies are larger than baseline.
+
+    Returns (U statistic for current, p-value). The p-value uses the normal
+    approximation with tie and continuity corrections, so it is only
+    meaningful with a handful of samples on each side.
+    """
+    n1, n2 = len(baseline), len(current)
+    if n1 == 0 or n2 == 0:
+        return 0.0, 1.0
+
+    # Rank the pooled samples, averaging ranks across ties
+    pooled: List[Tuple[float, int]] = [(v, 0) for v in baseline] + [(v, 1) for v in current]
+    pooled.sort(key=lambda item: item[0])
+
+    ranks = [0.0] * len(pooled)
+    tie_term = 0.0
+    i = 0
+    while i < len(pooled):
+        j = i
+        while j + 1 < len(pooled) and pooled[j + 1][0] == pooled[i][0]:
+            j += 1
+        average_rank = (i + j) / 2 + 1
+        for k in range(i, j + 1):
+            ranks[k] = average_rank
+        tied = j - i + 1
+        tie_term += tied ** 3 - tied
+        i = j + 1
+
+    rank_sum_current = sum(rank for rank, (_, group) in zip(ranks, pooled) if group == 1)
+    u_current = rank_sum_current - n2 * (n2 + 1) / 2
+
+    n = n1 + n2
+    mean_u = n1 * n2 / 2
+    variance = n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1))) if n > 1 else 0.0
+    if variance <= 0:
+        return u_current, 1.0
+
+    z = (u_current - mean_u - 0.5) / math.sqrt(variance)
+    return u_current, _normal_sf(z)
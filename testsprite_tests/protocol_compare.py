@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+HTTP/1.1 Connection Pool vs Multiplexed HTTP/2 Load Comparison
+
+Browsers reach the storefront over HTTP/2, where concurrent API calls
+share one connection as streams; our load tools default to an HTTP/1.1
+pool. This runs the same workload over each protocol and reports:
+- Throughput, latency p50/p99 and connections opened
+- Queueing: time a request waited for a pooled connection (HTTP/1.1) or
+  a free stream slot (HTTP/2) before it was sent
+- Head-of-line effect: how much a small request (the health check) slows
+  down when it is issued behind a burst of large responses, relative to
+  the same request on an idle client
+
+HTTP/1.1 defaults to a browser-sized pool of 6 connections. HTTP/2 needs
+the optional h2 package and a server speaking HTTP/2 (TLS with ALPN, or
+h2c prior knowledge on http:// such as the stand-in server).
+
+Usage:
+    python3 testsprite_tests/protocol_compare.py --requests 500 --concurrency 50
+    python3 testsprite_tests/protocol_compare.py --protocols h1,h2 --h1-connections 6 --max-streams 100
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List
+
+import aio_client
+from aio_client import ClientError, open_client
+from comprehensive_api_tests import BASE_URL, GREEN, RED, YELLOW, BLUE, CYAN, BOLD, RESET
+from metrics_probe import BROWSER_CONNECTIONS
+from perf_stats import percentile, summarize
+
+REPORT_FILE = "testsprite_tests/protocol_compare_report.json"
+
+DEFAULT_PATHS = ['/api/products', '/api/featured-products', '/api/collections', '/api/menu', '/api/health-check']
+SMALL_PATH = '/api/health-check'
+LARGE_PATH = '/api/products'
+
+
+async def run_workload(client, paths: List[str], total: int, concurrency: int) -> Dict:
+    """Issue `total` requests over the path mix from `concurrency` concurrent callers"""
+    queue = [paths[i % len(paths)] for i in range(total)]
+    queue.reverse()
+    latencies: List[float] = []
+    waits: List[float] = []
+    statuses: Dict[str, int] = {}
+
+    async def caller() -> None:
+        while queue:
+            path = queue.pop()
+            start = time.perf_counter()
+            try:
+                response = await client.get(path)
+                status = str(response.status)
+                total_ms = (time.perf_counter() - start) * 1000
+                latencies.append(total_ms)
+                # elapsed_ms starts once a connection or stream slot was free
+                waits.append(max(total_ms - response.elapsed_ms, 0.0))
+            except ClientError:
+                status = 'error'
+            statuses[status] = statuses.get(status, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(caller() for _ in range(concurrency)))
+    wall_s = time.perf_counter() - start
+    return {
+        'requests': total,
+        'wall_s': round(wall_s, 3),
+        'throughput_rps': round(len(latencies) / wall_s, 2) if wall_s > 0 else 0.0,
+        'latency_ms': {k: round(v, 2) for k, v in summarize(latencies).items()},
+        'queue_ms': {k: round(v, 2) for k, v in summarize(waits).items()},
+        'statuses': statuses,
+        'errors': statuses.get('error', 0),
+    }
+
+
+async def hol_probe(client, samples: int, burst: int) -> Dict:
+    """Small-request latency alone vs issued together with a burst of large responses"""
+    alone = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        await client.get(SMALL_PATH)
+        alone.append((time.perf_counter() - start) * 1000)
+
+    behind = []
+    for _ in range(samples):
+        large = [asyncio.ensure_future(client.get(LARGE_PATH)) for _ in range(burst)]
+        await asyncio.sleep(0)
+        start = time.perf_counter()
+        await client.get(SMALL_PATH)
+        behind.append((time.perf_counter() - start) * 1000)
+        await asyncio.gather(*large, return_exceptions=True)
+
+    alone_p50, behind_p50 = percentile(alone, 50), percentile(behind, 50)
+    return {
+        'alone_p50_ms': round(alone_p50, 2),
+        'behind_burst_p50_ms': round(behind_p50, 2),
+        'behind_burst_p99_ms': round(percentile(behind, 99), 2),
+        'inflation': round(behind_p50 / alone_p50, 2) if alone_p50 > 0 else None,
+    }
+
+
+async def compare_protocol(base_url: str, protocol: str, concurrency_limit: int, paths: List[str], total: int,
+                           callers: int, hol_samples: int, timeout: float) -> Dict:
+    """Warm up, run the workload and the head-of-line probe on one client"""
+    async with open_client(base_url, protocol, concurrency_limit, timeout) as client:
+        await client.get(SMALL_PATH)
+        result = await run_workload(client, paths, total, callers)
+        result['hol'] = await hol_probe(client, hol_samples, callers)
+        result['connections_opened'] = client.connections_opened
+        if protocol == 'h2':
+            result['peak_streams'] = client.peak_streams
+    return result
+
+
+def print_comparison(results: Dict[str, Dict]) -> None:
+    """Side-by-side table, one row per protocol"""
+    print(f"\n{CYAN}{BOLD}{'Protocol':<10} {'Conns':>6} {'Req/s':>8} {'p50':>8} {'p99':>8} "
+          f"{'Queue p50':>10} {'Queue p99':>10} {'HOL x':>7} {'Errors':>7}{RESET}")
+    for protocol, result in results.items():
+        latency, queue, hol = result['latency_ms'], result['queue_ms'], result['hol']
+        errors = f"{RED}{result['errors']:>7}{RESET}" if result['errors'] else f"{0:>7}"
+        inflation = f"{hol['inflation']:>6.2f}x" if hol['inflation'] is not None else f"{'-':>7}"
+        print(f"{protocol:<10} {result['connections_opened']:>6} {result['throughput_rps']:>8.1f} "
+              f"{latency['p50']:>6.0f}ms {latency['p99']:>6.0f}ms {queue['p50']:>8.0f}ms {queue['p99']:>8.0f}ms "
+              f"{inflation} {errors}")
+    print(f"\nHOL x: health-check p50 behind a burst of {LARGE_PATH} responses / p50 on an idle client")
+    if len(results) == 2:
+        h1, h2_result = results['h1'], results['h2']
+        ratio = h2_result['throughput_rps'] / h1['throughput_rps'] if h1['throughput_rps'] else 0
+        color = GREEN if ratio >= 1 else YELLOW
+        print(f"{color}HTTP/2 throughput: {ratio:.2f}x HTTP/1.1 over {h1['connections_opened']} connection(s) "
+              f"vs {h2_result['connections_opened']}{RESET}")
+    print()
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Compare an HTTP/1.1 pool with multiplexed HTTP/2")
+    parser.add_argument('--base-url', default=BASE_URL)
+    parser.add_argument('--protocols', default='h1,h2', help="Comma-separated: h1, h2")
+    parser.add_argument('--requests', type=int, default=300, help="Requests per protocol")
+    parser.add_argument('--concurrency', type=int, default=32, help="Concurrent callers")
+    parser.add_argument('--h1-connections', type=int, default=BROWSER_CONNECTIONS,
+                        help="HTTP/1.1 pool size (browsers use 6 per host)")
+    parser.add_argument('--max-streams', type=int, default=100, help="HTTP/2 concurrent stream limit")
+    parser.add_argument('--paths', default=','.join(DEFAULT_PATHS), help="Comma-separated path mix")
+    parser.add_argument('--hol-samples', type=int, default=10, help="Head-of-line probe samples")
+    parser.add_argument('--timeout', type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument('--output', default=REPORT_FILE)
+    args = parser.parse_args()
+
+    protocols = [p.strip() for p in args.protocols.split(',') if p.strip()]
+    unknown = sorted(set(protocols) - set(aio_client.PROTOCOLS))
+    if unknown:
+        parser.error(f"unknown protocol(s): {', '.join(unknown)}")
+    paths = [p.strip() for p in args.paths.split(',') if p.strip()]
+
+    print(f"\n{BLUE}{BOLD}{'='*80}")
+    print("Lab Essentials E-Commerce - HTTP/1.1 vs HTTP/2 Load Comparison")
+    print(f"Testing against: {args.base_url}")
+    print(f"Requests: {args.requests} | Callers: {args.concurrency} | "
+          f"HTTP/1.1 pool: {args.h1_connections} | HTTP/2 streams: {args.max_streams}")
+    print(f"{'='*80}{RESET}\n")
+
+    results: Dict[str, Dict] = {}
+    skipped: Dict[str, str] = {}
+    try:
+        for protocol in protocols:
+            if protocol == 'h2' and aio_client.h2 is None:
+                skipped[protocol] = "h2 package not installed (pip install h2)"
+                print(f"{YELLOW}Skipping HTTP/2: {skipped[protocol]}{RESET}")
+                continue
+            limit = args.h1_connections if protocol == 'h1' else args.max_streams
+            print(f"{CYAN}Running {protocol} ...{RESET}")
+            try:
+                results[protocol] = asyncio.run(compare_protocol(
+                    args.base_url, protocol, limit, paths, args.requests, args.concurrency,
+                    args.hol_samples, args.timeout))
+            except (ClientError, OSError) as e:
+                skipped[protocol] = str(e)
+                print(f"{RED}{protocol} failed: {e}{RESET}")
+    except KeyboardInterrupt:
+        print(f"\n{YELLOW}Comparison interrupted by user{RESET}")
+        sys.exit(1)
+
+    if results:
+        print_comparison(results)
+    report = {'timestamp': datetime.now().isoformat(), 'base_url': args.base_url,
+              'settings': {k: v for k, v in vars(args).items() if k != 'output'},
+              'results': results, 'skipped': skipped}
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"{BLUE}JSON report saved to: {args.output}{RESET}\n")
+    sys.exit(0 if results and not any(r['errors'] for r in results.values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Quiz Event Ingestion Throughput Benchmark
+
+Drives /api/quiz/completion and /api/quiz/action with realistic payloads at
+increasing arrival rates to find the highest rate the quiz endpoints sustain:
+- Answers come from the quiz-testing/quiz_test_cases.csv columns (q1-q7),
+  results from the quiz scoring engine run against products_export.json
+- Completions follow the QuizCompletion shape in src/lib/quiz-logger.ts;
+  each completion is followed by a number of user actions
+- Arrivals are open-loop: requests are sent on schedule whether or not
+  earlier ones have returned, and latency is measured from the scheduled
+  send time, so a saturated server shows up as growing latency
+- A step is sustained when achieved throughput, error rate and p95 latency
+  all stay within the configured limits
+
+Note: the real endpoints append to quiz-testing/data/*.jsonl. Generated
+session IDs start with 'quiz_load_' so they can be filtered out afterwards.
+
+Usage:
+    python3 testsprite_tests/quiz_load.py
+    python3 testsprite_tests/quiz_load.py --start-rate 20 --step-rate 20 --max-rate 400 --step-duration 15
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from aio_client import AsyncHTTPClient, ClientError
+from comprehensive_api_tests import BASE_URL, GREEN, RED, YELLOW, BLUE, CYAN, BOLD, RESET
+from perf_stats import summarize
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+QUIZ_DIR = os.path.join(SCRIPT_DIR, '..', 'quiz-testing')
+sys.path.insert(0, QUIZ_DIR)
+
+from quiz_validator import Product, QuizEngine  # noqa: E402
+
+TEST_CASES_FILE = os.path.join(QUIZ_DIR, 'quiz_test_cases.csv')
+PRODUCTS_FILE = os.path.join(QUIZ_DIR, 'products_export.json')
+REPORT_FILE = "testsprite_tests/quiz_load_report.json"
+
+# QuizCompletion['userAction'] values and how often shoppers take them
+USER_ACTIONS = [
+    ('viewed_product', 0.55),
+    ('added_to_cart', 0.15),
+    ('purchased', 0.05),
+    ('restarted', 0.15),
+    ('exited', 0.10),
+]
+
+
+@dataclass
+class StepResult:
+    """Measurements for one arrival-rate step"""
+    target_rate: float
+    duration_s: float
+    sent: int = 0
+    errors: int = 0
+    dropped: int = 0
+    latencies: List[float] = field(default_factory=list)
+    by_endpoint: Dict[str, List[float]] = field(default_factory=dict)
+    error_samples: Dict[str, int] = field(default_factory=dict)
+    completed_s: float = 0.0
+
+
+# ==================== PAYLOADS ====================
+
+def answers_from_case(case: Dict[str, str]) -> Dict:
+    """Map a quiz_test_cases.csv row to the QuizCompletion answers (q1-q7)"""
+    return {
+        'q1': case['sample_type'],
+        'q2': case['sample_opacity'],
+        'q3': case['camera_need'] == 'yes',
+        'q4': int(case['magnification']),
+        'q5': case['persona'],
+        'q6': int(case['budget']),
+        'q7': [f.strip() for f in case['special_features'].split('|') if f.strip()],
+    }
+
+
+def _match(product: Product, score: float) -> Dict:
+    return {
+        'productId': product.id,
+        'productHandle': product.handle,
+        'productTitle': product.title,
+        'score': round(score, 4),
+    }
+
+
+class PayloadFactory:
+    """Builds completion and action payloads from the quiz test cases"""
+
+    def __init__(self, seed: int, test_cases_file: str = TEST_CASES_FILE, products_file: str = PRODUCTS_FILE):
+        with open(test_cases_file, 'r') as f:
+            cases = list(csv.DictReader(f))
+        with open(products_file, 'r') as f:
+            products = [Product(item) for item in json.load(f)]
+
+        # Score every case once; payload generation then only copies the ranking
+        engine = QuizEngine()
+        self.cases: List[Tuple[Dict, Dict]] = []
+        for case in cases:
+            ranked = sorted(((p, engine.score_product(p, case)) for p in products),
+                            key=lambda item: item[1], reverse=True)
+            results = {
+                'topMatch': _match(*ranked[0]),
+                'otherMatches': [_match(p, s) for p, s in ranked[1:3]],
+            }
+            self.cases.append((answers_from_case(case), results))
+
+        self.rng = random.Random(seed)
+        self._actions = [name for name, _ in USER_ACTIONS]
+        self._action_weights = [weight for _, weight in USER_ACTIONS]
+        self._counter = 0
+
+    def session_id(self) -> str:
+        self._counter += 1
+        return f"quiz_load_{int(time.time() * 1000)}_{self._counter:09d}"
+
+    def completion(self) -> Dict:
+        answers, results = self.rng.choice(self.cases)
+        return {
+            'sessionId': self.session_id(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'answers': answers,
+            'results': results,
+        }
+
+    def action(self, completion: Dict) -> Dict:
+        action = self.rng.choices(self._actions, self._action_weights)[0]
+        payload = {
+            'sessionId': completion['sessionId'],
+            'action': action,
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+        }
+        if action in ('viewed_product', 'added_to_cart', 'purchased'):
+            other = completion['results']['otherMatches']
+            # Some shoppers pick one of the other matches instead of the top one
+            if other and self.rng.random() < 0.3:
+                payload['selectedProduct'] = self.rng.choice(other)['productHandle']
+        return payload
+
+    def events(self, actions_per_completion: float):
+        """Endless stream of (path, payload): a completion, then its actions"""
+        while True:
+            completion = self.completion()
+            yield "/api/quiz/completion", completion
+            count = int(actions_per_completion)
+            if self.rng.random() < actions_per_completion - count:
+                count += 1
+            for _ in range(count):
+                yield "/api/quiz/action", self.action(completion)
+
+
+# ==================== LOAD STEPS ====================
+
+async def _send(client: AsyncHTTPClient, path: str, payload: Optional[Dict], scheduled: float,
+                step: StepResult, in_flight: List[int]) -> None:
+    """Send one event (or GET when there is no payload) and record latency from its scheduled time"""
+    try:
+        if payload is None:
+            response = await client.get(path)
+        else:
+            response = await client.post(path, json_body=payload)
+        ok = response.status == 200
+        error = None if ok else f"{path} -> {response.status}"
+    except ClientError as e:
+        ok, error = False, f"{path} -> {e}"
+    finally:
+        in_flight[0] -= 1
+
+    latency = (time.perf_counter() - scheduled) * 1000
+    step.latencies.append(latency)
+    step.by_endpoint.setdefault(path, []).append(latency)
+    if not ok:
+        step.errors += 1
+        step.error_samples[error] = step.error_samples.get(error, 0) + 1
+
+
+async def run_step(client: AsyncHTTPClient, events, rate: float, duration: float, max_in_flight: int,
+                   analytics_every: int) -> StepResult:
+    """Send events at a fixed arrival rate for one step"""
+    step = StepResult(rate, duration)
+    in_flight = [0]
+    tasks = []
+    interval = 1.0 / rate
+    total = int(rate * duration)
+    start = time.perf_counter()
+
+    for index in range(total):
+        scheduled = start + index * interval
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if in_flight[0] >= max_in_flight:
+            # The client cannot keep up; count the arrival as lost instead of delaying the schedule
+            step.dropped += 1
+            continue
+
+        if analytics_every and index % analytics_every == analytics_every - 1:
+            # The analytics read re-parses every logged event, so it slows as ingestion grows
+            path, payload = "/api/quiz/analytics", None
+        else:
+            path, payload = next(events)
+        in_flight[0] += 1
+        step.sent += 1
+        tasks.append(asyncio.ensure_future(_send(client, path, payload, scheduled, step, in_flight)))
+
+    await asyncio.gather(*tasks)
+    step.completed_s = time.perf_counter() - start
+    return step
+
+
+def evaluate_step(step: StepResult, max_error_rate: float, p95_slo: float, min_throughput: float) -> Dict:
+    """Summarize a step and decide whether it was sustained"""
+    attempted = step.sent + step.dropped
+    achieved = (step.sent - step.errors) / step.completed_s if step.completed_s > 0 else 0.0
+    error_rate = (step.errors + step.dropped) / attempted if attempted else 0.0
+    latency = summarize(step.latencies)
+
+    reasons = []
+    if achieved < step.target_rate * min_throughput:
+        reasons.append(f"throughput {achieved:.1f}/s < {min_throughput:.0%} of target")
+    if error_rate > max_error_rate:
+        reasons.append(f"error rate {error_rate:.1%} > {max_error_rate:.1%}")
+    if latency['p95'] > p95_slo:
+        reasons.append(f"p95 {latency['p95']:.0f}ms > {p95_slo:.0f}ms")
+
+    return {
+        'target_rate': step.target_rate,
+        'sent': step.sent,
+        'dropped': step.dropped,
+        'errors': step.errors,
+        'achieved_rate': round(achieved, 2),
+        'error_rate': round(error_rate, 4),
+        'latency_ms': {k: round(v, 2) for k, v in latency.items()},
+        'endpoints': {path: {k: round(v, 2) for k, v in summarize(samples).items()}
+                      for path, samples in sorted(step.by_endpoint.items())},
+        'error_samples': step.error_samples,
+        'sustained': not reasons,
+        'reasons': reasons,
+    }
+
+
+async def run_benchmark(args) -> List[Dict]:
+    """Raise the arrival rate step by step until the endpoints stop keeping up"""
+    factory = PayloadFactory(args.seed)
+    events = factory.events(args.actions_per_completion)
+    steps = []
+    failures_in_a_row = 0
+
+    async with AsyncHTTPClient(args.base_url, max_connections=args.connections, timeout=args.timeout) as client:
+        rate = args.start_rate
+        while rate <= args.max_rate + 1e-9:
+            print(f"{CYAN}Step: {rate:g} events/s for {args.step_duration:g}s{RESET}")
+            step = await run_step(client, events, rate, args.step_duration, args.max_in_flight,
+                                  args.analytics_every)
+            result = evaluate_step(step, args.max_error_rate, args.p95_slo, args.min_throughput)
+            steps.append(result)
+
+            latency = result['latency_ms']
+            icon = f"{GREEN}✓ sustained{RESET}" if result['sustained'] else f"{RED}✗ saturated{RESET}"
+            print(f"  {icon} - achieved {result['achieved_rate']:.1f}/s | p50 {latency['p50']:.0f}ms | "
+                  f"p95 {latency['p95']:.0f}ms | errors {result['error_rate']:.1%} | dropped {result['dropped']}")
+            for reason in result['reasons']:
+                print(f"    {YELLOW}{reason}{RESET}")
+
+            failures_in_a_row = 0 if result['sustained'] else failures_in_a_row + 1
+            if failures_in_a_row >= args.patience:
+                break
+            if args.cooldown > 0:
+                await asyncio.sleep(args.cooldown)
+            rate += args.step_rate
+
+    return steps
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Find the sustainable quiz event ingestion rate")
+    parser.add_argument('--base-url', default=BASE_URL)
+    parser.add_argument('--start-rate', type=float, default=10.0, help="First step, events per second")
+    parser.add_argument('--step-rate', type=float, default=10.0, help="Rate increase per step")
+    parser.add_argument('--max-rate', type=float, default=200.0, help="Last step, events per second")
+    parser.add_argument('--step-duration', type=float, default=10.0, help="Seconds per step")
+    parser.add_argument('--cooldown', type=float, default=2.0, help="Pause between steps in seconds")
+    parser.add_argument('--actions-per-completion', type=float, default=1.5,
+                        help="Average /api/quiz/action events after each completion")
+    parser.add_argument('--analytics-every', type=int, default=0,
+                        help="Replace every Nth event with a GET /api/quiz/analytics (0 = never)")
+    parser.add_argument('--max-error-rate', type=float, default=0.01, help="Highest sustainable error rate")
+    parser.add_argument('--p95-slo', type=float, default=500.0, help="Highest sustainable p95 latency (ms)")
+    parser.add_argument('--min-throughput', type=float, default=0.95,
+                        help="Lowest sustainable achieved/target ratio")
+    parser.add_argument('--patience', type=int, default=2, help="Stop after this many unsustained steps in a row")
+    parser.add_argument('--connections', type=int, default=200, help="Connection pool size")
+    parser.add_argument('--max-in-flight', type=int, default=1000, help="Arrivals beyond this are dropped")
+    parser.add_argument('--timeout', type=float, default=10.0, help="Per-request timeout in seconds")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=REPORT_FILE)
+    args = parser.parse_args()
+
+    print(f"\n{BLUE}{BOLD}{'='*80}")
+    print("Lab Essentials E-Commerce - Quiz Ingestion Throughput")
+    print(f"Testing against: {args.base_url}")
+    print(f"Rates: {args.start_rate:g} -> {args.max_rate:g} events/s (+{args.step_rate:g}) | "
+          f"p95 SLO: {args.p95_slo:g}ms | Max errors: {args.max_error_rate:.1%}")
+    print(f"{'='*80}{RESET}\n")
+
+    try:
+        steps = asyncio.run(run_benchmark(args))
+    except KeyboardInterrupt:
+        print(f"\n{YELLOW}Benchmark interrupted by user{RESET}")
+        sys.exit(1)
+    except (ClientError, OSError, ValueError) as e:
+        print(f"{RED}Error: {e}{RESET}")
+        sys.exit(1)
+
+    sustained = [s for s in steps if s['sustained']]
+    max_sustained = max((s['target_rate'] for s in sustained), default=0.0)
+    first_saturated = next((s['target_rate'] for s in steps if not s['sustained']), None)
+
+    print(f"\n{BOLD}Summary{RESET}")
+    print(f"Steps run:              {len(steps)}")
+    print(f"{GREEN}Max sustained rate:     {max_sustained:g} events/s{RESET}")
+    if first_saturated is not None:
+        print(f"{RED}First saturated step:   {first_saturated:g} events/s{RESET}")
+    else:
+        print(f"{YELLOW}No saturation up to {args.max_rate:g} events/s; raise --max-rate{RESET}")
+
+    report = {
+        'timestamp': datetime.now().isoformat(),
+        'base_url': args.base_url,
+        'settings': {k: v for k, v in vars(args).items() if k not in ('base_url', 'output')},
+        'max_sustained_rate': max_sustained,
+        'first_saturated_rate': first_saturated,
+        'steps': steps,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n{BLUE}JSON report saved to: {args.output}{RESET}\n")
+
+
+if __name__ == "__main__":
+    main()
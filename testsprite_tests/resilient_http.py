@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Resilient requests.Session for the Synchronous API Suites
+
+A plain requests call has no timeout, so one hung endpoint blocks a whole
+run. ResilientSession is a drop-in requests.Session that adds:
+- Separate connect and read timeouts on every request (unless the caller
+  passes its own)
+- Retries with jittered exponential backoff for idempotent methods (GET,
+  HEAD, OPTIONS) on connection errors, timeouts and 502/503/504
+- A circuit breaker per endpoint path: after `breaker_threshold`
+  consecutive failed requests the endpoint fails fast with
+  CircuitOpenError until `breaker_reset_s` has passed, then one trial
+  request decides whether it closes again
+
+Worst case per request is max_request_s(): every attempt hitting its
+timeouts plus the longest backoffs. The read timeout bounds each wait for
+bytes, not the whole body, so a server dripping bytes can exceed it.
+
+Cassette adapters mount on it like on any session.
+"""
+
+import random
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+
+CONNECT_TIMEOUT_S = 3.05
+READ_TIMEOUT_S = 10.0
+RETRIES = 2
+BACKOFF_BASE_S = 0.25
+BACKOFF_MAX_S = 2.0
+BREAKER_THRESHOLD = 3
+BREAKER_RESET_S = 30.0
+
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS')
+RETRY_STATUSES = (502, 503, 504)
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised instead of sending a request to an endpoint whose circuit is open"""
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed -> open -> half-open (one trial) -> closed or open"""
+
+    def __init__(self, threshold: int = BREAKER_THRESHOLD, reset_s: float = BREAKER_RESET_S):
+        self.threshold = threshold
+        self.reset_s = reset_s
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        return 'half-open' if time.monotonic() - self.opened_at >= self.reset_s else 'open'
+
+    def allow(self) -> bool:
+        """Whether a request may go out now (claims the single half-open trial)"""
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half-open' and not self.trial_running:
+                self.trial_running = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.trial_running or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+            self.trial_running = False
+
+
+def backoff_delay(attempt: int, base_s: float = BACKOFF_BASE_S, max_s: float = BACKOFF_MAX_S) -> float:
+    """Full-jitter exponential backoff before retry number attempt + 1"""
+    return random.uniform(0, min(max_s, base_s * 2 ** attempt))
+
+
+class ResilientSession(requests.Session):
+    """requests.Session with default timeouts, GET retries and per-endpoint circuit breakers"""
+
+    def __init__(self, connect_timeout: float = CONNECT_TIMEOUT_S, read_timeout: float = READ_TIMEOUT_S,
+                 retries: int = RETRIES, backoff_base_s: float = BACKOFF_BASE_S,
+                 backoff_max_s: float = BACKOFF_MAX_S, breaker_threshold: int = BREAKER_THRESHOLD,
+                 breaker_reset_s: float = BREAKER_RESET_S):
+        super().__init__()
+        self.timeout: Tuple[float, float] = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        self.breaker_threshold = breaker_threshold
+        self.breaker_reset_s = breaker_reset_s
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.counters = {'requests': 0, 'retries': 0, 'timeouts': 0, 'fast_failed': 0}
+
+    def breaker(self, url: str) -> CircuitBreaker:
+        path = urlsplit(url).path or '/'
+        if path not in self.breakers:
+            self.breakers[path] = CircuitBreaker(self.breaker_threshold, self.breaker_reset_s)
+        return self.breakers[path]
+
+    def max_request_s(self) -> float:
+        """Upper bound on one idempotent request: all attempts time out, longest backoffs"""
+        attempts = self.retries + 1
+        backoff = sum(min(self.backoff_max_s, self.backoff_base_s * 2 ** attempt) for attempt in range(self.retries))
+        return attempts * sum(self.timeout) + backoff
+
+    def request(self, method, url, *args, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        breaker = self.breaker(url)
+        if not breaker.allow():
+            self.counters['fast_failed'] += 1
+            raise CircuitOpenError(f"circuit open for {urlsplit(url).path} after {breaker.failures} "
+                                   f"consecutive failures; not sending")
+
+        attempts = self.retries + 1 if method.upper() in IDEMPOTENT_METHODS else 1
+        for attempt in range(attempts):
+            self.counters['requests'] += 1
+            last_attempt = attempt == attempts - 1
+            try:
+                response = super().request(method, url, *args, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if isinstance(e, requests.Timeout):
+                    self.counters['timeouts'] += 1
+                if last_attempt:
+                    breaker.record_failure()
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    breaker.record_success()
+                    return response
+                if last_attempt:
+                    breaker.record_failure()
+                    return response
+                response.close()
+            self.counters['retries'] += 1
+            time.sleep(backoff_delay(attempt, self.backoff_base_s, self.backoff_max_s))
+
+    def summary(self) -> Dict:
+        """Counters plus the endpoints whose circuit is not closed"""
+        return {
+            **self.counters,
+            'timeout_s': {'connect': self.timeout[0], 'read': self.timeout[1]},
+            'max_request_s': round(self.max_request_s(), 2),
+            'open_circuits': {path: breaker.state for path, breaker in self.breakers.items()
+                              if breaker.state != 'closed'},
+        }
@@ -4,15 +4,23 @@ API Test Script for Lab Essentials E-Commerce Platform
 This script tests the backend APIs based on the TestSprite test plan schemas
 """
 
+import argparse
 import requests
 import json
 import sys
 from typing import Dict, Any, List, Tuple
 
+import cassette
+import resilient_http
+
 # Configuration
 BASE_URL = "http://localhost:3000"
 HEADERS = {"Accept": "application/json"}
 
+# Shared HTTP session with timeouts, GET retries and per-endpoint circuit breakers
+# (a cassette adapter can be mounted on it)
+SESSION = resilient_http.ResilientSession()
+
 # Color codes for terminal output
 GREEN = '\033[92m'
 RED = '\033[91m'
@@ -23,7 +31,7 @@ RESET = '\033[0m'
 def test_health_check() -> Tuple[bool, str]:
     """Test the health check endpoint"""
     try:
-        response = requests.get(f"{BASE_URL}/api/health-check", headers=HEADERS)
+        response = SESSION.get(f"{BASE_URL}/api/health-check", headers=HEADERS)
         
         # Check status code
         if response.status_code != 200:
@@ -44,7 +52,7 @@ def test_health_check() -> Tuple[bool, str]:
 def test_products_api() -> Tuple[bool, str]:
     """Test the products API endpoint"""
     try:
-        response = requests.get(f"{BASE_URL}/api/products", headers=HEADERS, params={"limit": "10"})
+        response = SESSION.get(f"{BASE_URL}/api/products", headers=HEADERS, params={"limit": "10"})
         
         # Check status code
         if response.status_code != 200:
@@ -88,7 +96,7 @@ def test_products_api() -> Tuple[bool, str]:
 def test_featured_products_api() -> Tuple[bool, str]:
     """Test the featured products API endpoint"""
     try:
-        response = requests.get(f"{BASE_URL}/api/featured-products", headers=HEADERS)
+        response = SESSION.get(f"{BASE_URL}/api/featured-products", headers=HEADERS)
         
         # Check status code
         if response.status_code != 200:
@@ -115,7 +123,7 @@ def test_featured_products_api() -> Tuple[bool, str]:
 def test_collections_api() -> Tuple[bool, str]:
     """Test the collections API endpoint"""
     try:
-        response = requests.get(f"{BASE_URL}/api/collections", headers=HEADERS)
+        response = SESSION.get(f"{BASE_URL}/api/collections", headers=HEADERS)
         
         # Check status code
         if response.status_code != 200:
@@ -146,7 +154,7 @@ def test_collections_api() -> Tuple[bool, str]:
 def test_menu_api() -> Tuple[bool, str]:
     """Test the menu API endpoint"""
     try:
-        response = requests.get(f"{BASE_URL}/api/menu", headers=HEADERS)
+        response = SESSION.get(f"{BASE_URL}/api/menu", headers=HEADERS)
         
         # Check status code
         if response.status_code != 200:
@@ -181,9 +189,9 @@ def test_menu_api() -> Tuple[bool, str]:
 def test_product_by_handle() -> Tuple[bool, str]:
     """Test the product by handle API endpoint"""
     try:
-        response = requests.get(f"{BASE_URL}/api/product-by-handle", 
-                                headers=HEADERS, 
-                                params={"handle": "test-product"})
+        response = SESSION.get(f"{BASE_URL}/api/product-by-handle", 
+                               headers=HEADERS, 
+                               params={"handle": "test-product"})
         
         # Check status code (can be 200 or 404)
         if response.status_code not in [200, 404]:
@@ -212,7 +220,7 @@ def test_product_by_handle() -> Tuple[bool, str]:
 def test_cache_health() -> Tuple[bool, str]:
     """Test the cache health API endpoint"""
     try:
-        response = requests.get(f"{BASE_URL}/api/cache/health", headers=HEADERS)
+        response = SESSION.get(f"{BASE_URL}/api/cache/health", headers=HEADERS)
         
         # Check status code
         if response.status_code != 200:
@@ -294,10 +302,21 @@ def run_all_tests():
     sys.exit(0 if failed == 0 else 1)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simple API test script")
+    cassette.add_arguments(parser)
+    args = parser.parse_args()
+
     try:
-        # Check if server is running
-        response = requests.get(BASE_URL, timeout=5)
-        run_all_tests()
+        recorder = cassette.install(SESSION, args.cassette, args.cassette_mode) if args.cassette else None
+
+        # Check if server is running (nothing to check when replaying a cassette)
+        if recorder is None or recorder.mode != 'replay':
+            response = requests.get(BASE_URL, timeout=5)
+        try:
+            run_all_tests()
+        finally:
+            if recorder is not None:
+                cassette.finish(recorder)
     except requests.ConnectionError:
         print(f"{RED}Error: Cannot connect to {BASE_URL}")
         print(f"Make sure the development server is running with: npm run dev{RESET}")
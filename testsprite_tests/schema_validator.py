@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Compiled Schema Validators for the Lab Essentials API Test Suites
+
+Schemas used by APITestSuite are compiled once into validator closures:
+- Regex patterns are precompiled
+- Type checks go through a dispatch table instead of an if/elif chain
+- Array items are validated by a single pre-built item validator
+
+A compiled validator returns None when the data is valid, or the same
+error message the original interpreted validator produced.
+"""
+
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Validator signature: data -> error message (None when valid)
+Validator = Callable[[Any], Optional[str]]
+
+# Type name -> accepted Python types (bool is intentionally a number, as before)
+TYPE_DISPATCH: Dict[str, Tuple[type, ...]] = {
+    'string': (str,),
+    'number': (int, float),
+    'boolean': (bool,),
+    'array': (list,),
+    'object': (dict,),
+}
+
+# Cache of compiled validators keyed by schema identity
+_COMPILED: Dict[int, Tuple[Dict, Validator]] = {}
+
+
+def _compile_type_check(field: str, expected_type: Any) -> Optional[Callable[[Any], Optional[str]]]:
+    """Build the type check for a field (None if the type is not checked)"""
+    if not isinstance(expected_type, str) or expected_type not in TYPE_DISPATCH:
+        return None
+
+    accepted = TYPE_DISPATCH[expected_type]
+    prefix = f"Field '{field}' should be {expected_type}, got "
+
+    def check_type(value: Any) -> Optional[str]:
+        if not isinstance(value, accepted):
+            return prefix + type(value).__name__
+        return None
+
+    return check_type
+
+
+def _compile_enum_check(field: str, allowed: List) -> Callable[[Any], Optional[str]]:
+    """Build the enum check for a field"""
+    try:
+        allowed_lookup = frozenset(allowed)
+    except TypeError:
+        allowed_lookup = None
+
+    def check_enum(value: Any) -> Optional[str]:
+        try:
+            found = value in allowed_lookup if allowed_lookup is not None else value in allowed
+        except TypeError:
+            # Unhashable value: fall back to the list scan
+            found = value in allowed
+        if not found:
+            return f"Field '{field}' value '{value}' not in allowed values: {allowed}"
+        return None
+
+    return check_enum
+
+
+def _compile_field(field: str, rules: Dict) -> Optional[Callable[[Any], Optional[str]]]:
+    """Compile the rules for one property into a single check (None if no rules apply)"""
+    checks: List[Callable[[Any], Optional[str]]] = []
+
+    if 'type' in rules:
+        type_check = _compile_type_check(field, rules['type'])
+        if type_check is not None:
+            checks.append(type_check)
+
+    if 'enum' in rules:
+        checks.append(_compile_enum_check(field, rules['enum']))
+
+    if 'pattern' in rules:
+        pattern = rules['pattern']
+        match = re.compile(pattern).match
+
+        def check_pattern(value: Any) -> Optional[str]:
+            if isinstance(value, str) and not match(value):
+                return f"Field '{field}' value '{value}' doesn't match pattern: {pattern}"
+            return None
+
+        checks.append(check_pattern)
+
+    if 'minimum' in rules:
+        minimum = rules['minimum']
+
+        def check_minimum(value: Any) -> Optional[str]:
+            if isinstance(value, (int, float)) and value < minimum:
+                return f"Field '{field}' value {value} below minimum {minimum}"
+            return None
+
+        checks.append(check_minimum)
+
+    if 'maximum' in rules:
+        maximum = rules['maximum']
+
+        def check_maximum(value: Any) -> Optional[str]:
+            if isinstance(value, (int, float)) and value > maximum:
+                return f"Field '{field}' value {value} above maximum {maximum}"
+            return None
+
+        checks.append(check_maximum)
+
+    if 'minItems' in rules or 'maxItems' in rules or 'items' in rules:
+        checks.append(_compile_array_check(field, rules))
+
+    if not checks:
+        return None
+    if len(checks) == 1:
+        return checks[0]
+
+    def check_field(value: Any) -> Optional[str]:
+        for check in checks:
+            error = check(value)
+            if error is not None:
+                return error
+        return None
+
+    return check_field
+
+
+def _compile_array_check(field: str, rules: Dict) -> Callable[[Any], Optional[str]]:
+    """Compile minItems/maxItems/items rules for an array property"""
+    min_items = rules.get('minItems')
+    max_items = rules.get('maxItems')
+    item_validator = compile_schema(rules['items']) if 'items' in rules else None
+
+    def check_array(value: Any) -> Optional[str]:
+        if not isinstance(value, list):
+            return None
+        if min_items is not None and len(value) < min_items:
+            return f"Field '{field}' has {len(value)} items, minimum is {min_items}"
+        if max_items is not None and len(value) > max_items:
+            return f"Field '{field}' has {len(value)} items, maximum is {max_items}"
+        if item_validator is not None:
+            for idx, item in enumerate(value):
+                error = item_validator(item)
+                if error is not None:
+                    return f"Array item {idx} validation failed: {error}"
+        return None
+
+    return check_array
+
+
+def compile_schema(schema: Dict) -> Validator:
+    """Compile a schema into a validator closure"""
+    required = tuple(schema.get('required', ()))
+    properties = []
+    for field, rules in schema.get('properties', {}).items():
+        check = _compile_field(field, rules)
+        if check is not None:
+            properties.append((field, check))
+    properties = tuple(properties)
+
+    def validate(data: Any) -> Optional[str]:
+        for field in required:
+            if field not in data:
+                return f"Missing required field: {field}"
+        for field, check in properties:
+            if field in data:
+                error = check(data[field])
+                if error is not None:
+                    return error
+        return None
+
+    return validate
+
+
+def get_validator(schema: Dict) -> Validator:
+    """Return the compiled validator for a schema, compiling it on first use"""
+    entry = _COMPILED.get(id(schema))
+    if entry is None or entry[0] is not schema:
+        # Keep a reference to the schema so its id cannot be reused
+        entry = (schema, compile_schema(schema))
+        _COMPILED[id(schema)] = entry
+    return entry[1]
+
+
+def validate(data: Any, schema: Dict) -> Tuple[bool, str]:
+    """Validate data against a schema using its cached compiled validator"""
+    error = get_validator(schema)(data)
+    if error is not None:
+        return False, error
+    return True, "Valid"
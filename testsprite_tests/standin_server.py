@@ -0,0 +1,526 @@
+#!/usr/bin/env python3
+"""
+Local Stand-In Server for the Lab Essentials API
+
+A lightweight asyncio HTTP/1.1 server that replays recorded API responses
+from fixtures/standin_routes.json, so the suites and load tools can run on an
+isolated machine without `npm run dev` or a live Shopify backend.
+
+Each route can inject latency and errors:
+- fixed:     {"model": "fixed", "ms": 20}
+- normal:    {"model": "normal", "mean_ms": 45, "stddev_ms": 10}
+- lognormal: {"model": "lognormal", "median_ms": 35, "sigma": 0.6}   (long tail)
+- pareto:    {"model": "pareto", "scale_ms": 20, "alpha": 1.5, "cap_ms": 5000}   (heavy tail)
+- offset_ms (any model): constant added to every sample, e.g. an upstream delay
+- error_rate / error_status: fraction of requests answered with an error
+
+JSON and text responses of 1 KB or more are gzip-compressed when the client
+sends Accept-Encoding: gzip, as the Next.js server does (--no-compress turns
+this off).
+
+Clients that open with the HTTP/2 connection preface (h2c prior knowledge)
+are served over HTTP/2 when the optional h2 package is installed, with each
+stream answered concurrently.
+
+A route may also set "match_json" to only answer POST bodies whose top-level
+fields equal the given values (e.g. a known cartId), and "verify_hmac" to
+check a Shopify-style base64 HMAC-SHA256 header against --webhook-secret the
+way the real webhook handler does before any injected latency.
+
+Every route draws from its own RNG seeded from --seed, so a given request
+sequence always sees the same latencies and errors.
+
+Usage:
+    python3 testsprite_tests/standin_server.py --port 3000
+    python3 testsprite_tests/standin_server.py --latency /api/products=lognormal:80,0.8 --error-rate /api/checkout=0.05
+"""
+
+import argparse
+import asyncio
+import base64
+import gzip
+import hashlib
+import hmac
+import json
+import math
+import os
+import random
+import sys
+import threading
+import zlib
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+try:
+    import h2.config
+    import h2.connection
+    import h2.events
+    import h2.exceptions
+    import h2.settings
+except ImportError:
+    h2 = None
+
+# Color codes for terminal output
+GREEN = '\033[92m'
+RED = '\033[91m'
+YELLOW = '\033[93m'
+BLUE = '\033[94m'
+BOLD = '\033[1m'
+RESET = '\033[0m'
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_FIXTURES = os.path.join(SCRIPT_DIR, 'fixtures', 'standin_routes.json')
+
+REASONS = {
+    200: 'OK', 201: 'Created', 204: 'No Content', 400: 'Bad Request', 401: 'Unauthorized',
+    404: 'Not Found', 405: 'Method Not Allowed', 429: 'Too Many Requests',
+    500: 'Internal Server Error', 502: 'Bad Gateway', 503: 'Service Unavailable', 504: 'Gateway Timeout',
+}
+
+MAX_HEADER_BYTES = 64 * 1024
+
+DEFAULT_WEBHOOK_SECRET = 'standin-webhook-secret'
+
+# Same threshold as the compression middleware used by next start
+COMPRESS_MIN_BYTES = 1024
+
+# What a client sends after "PRI * HTTP/2.0\r\n\r\n" to open an HTTP/2 connection
+H2_PREFACE_TAIL = b'SM\r\n\r\n'
+H2_MAX_STREAMS = 128
+
+
+class LatencyModel:
+    """Samples injected latency (in seconds) from a configured distribution"""
+
+    def __init__(self, spec: Dict):
+        self.spec = spec
+        self.model = spec.get('model', 'fixed')
+        if self.model not in ('fixed', 'normal', 'lognormal', 'pareto'):
+            raise ValueError(f"Unknown latency model: {self.model}")
+
+    def sample(self, rng: random.Random) -> float:
+        """Return one latency sample in seconds"""
+        spec = self.spec
+        if self.model == 'fixed':
+            ms = spec.get('ms', 0)
+        elif self.model == 'normal':
+            ms = rng.gauss(spec.get('mean_ms', 0), spec.get('stddev_ms', 0))
+        elif self.model == 'lognormal':
+            ms = rng.lognormvariate(math.log(max(spec.get('median_ms', 1), 1e-3)), spec.get('sigma', 0.5))
+        else:
+            ms = spec.get('scale_ms', 1) * rng.paretovariate(spec.get('alpha', 1.5))
+        if 'cap_ms' in spec:
+            ms = min(ms, spec['cap_ms'])
+        return (max(ms, 0) + spec.get('offset_ms', 0)) / 1000.0
+
+    # Parameter order of the CLI shorthand for each model
+    PARAMS = {
+        'fixed': ['ms'],
+        'normal': ['mean_ms', 'stddev_ms'],
+        'lognormal': ['median_ms', 'sigma'],
+        'pareto': ['scale_ms', 'alpha', 'cap_ms'],
+    }
+
+    @classmethod
+    def parse(cls, text: str) -> 'LatencyModel':
+        """Parse the CLI shorthand: fixed:MS | normal:MEAN,SD | lognormal:MEDIAN,SIGMA | pareto:SCALE,ALPHA[,CAP]"""
+        model, _, params = text.partition(':')
+        values = [float(v) for v in params.split(',') if v]
+        if model not in cls.PARAMS:
+            raise ValueError(f"Unknown latency model: {model}")
+        return cls({'model': model, **dict(zip(cls.PARAMS[model], values))})
+
+    def shorthand(self) -> str:
+        """The CLI shorthand parse() accepts, e.g. lognormal:120,0.6"""
+        values = [f"{self.spec[name]:g}" for name in self.PARAMS[self.model] if name in self.spec]
+        return f"{self.model}:{','.join(values)}"
+
+
+@dataclass
+class Route:
+    """One recorded response and its fault-injection settings"""
+    method: str
+    path: str
+    status: int
+    body: bytes
+    headers: Dict[str, str]
+    query: Dict[str, str] = field(default_factory=dict)
+    match_json: Dict = field(default_factory=dict)
+    verify_hmac: Optional[str] = None
+    latency: Optional[LatencyModel] = None
+    error_rate: float = 0.0
+    error_status: int = 503
+    rng: random.Random = field(default_factory=random.Random)
+    hits: int = 0
+    errors: int = 0
+
+
+def _route_from_fixture(entry: Dict, defaults: Dict, seed: int) -> Route:
+    """Build a Route from a fixture entry"""
+    headers = dict(entry.get('headers', {}))
+    if 'body' in entry:
+        body = json.dumps(entry['body'], separators=(',', ':')).encode()
+        headers.setdefault('Content-Type', 'application/json')
+    else:
+        body = entry.get('text', '').encode()
+        headers.setdefault('Content-Type', 'text/plain; charset=utf-8')
+
+    method = entry.get('method', 'GET').upper()
+    query = {k: str(v) for k, v in entry.get('query', {}).items()}
+    match_json = entry.get('match_json', {})
+    key = f"{method} {entry['path']} {sorted(query.items())} {sorted(match_json.items())}"
+    return Route(
+        method=method,
+        path=entry['path'],
+        status=entry.get('status', 200),
+        body=body,
+        headers=headers,
+        query=query,
+        match_json=match_json,
+        verify_hmac=entry.get('verify_hmac'),
+        latency=LatencyModel(entry.get('latency', defaults.get('latency', {'model': 'fixed', 'ms': 0}))),
+        error_rate=entry.get('error_rate', defaults.get('error_rate', 0.0)),
+        error_status=entry.get('error_status', defaults.get('error_status', 503)),
+        rng=random.Random(seed ^ zlib.crc32(key.encode())),
+    )
+
+
+class RouteTable:
+    """Route lookup by method and path, most specific query/body match first"""
+
+    def __init__(self, routes: List[Route]):
+        self.routes = routes
+        self._index: Dict[Tuple[str, str], List[Route]] = {}
+        for route in routes:
+            self._index.setdefault((route.method, route.path), []).append(route)
+        for candidates in self._index.values():
+            candidates.sort(key=lambda r: len(r.query) + len(r.match_json), reverse=True)
+
+    def match(self, method: str, path: str, query: Dict[str, str], payload: Optional[Dict] = None) -> Optional[Route]:
+        """Return the first route whose query and JSON body constraints are satisfied"""
+        payload = payload if isinstance(payload, dict) else {}
+        for route in self._index.get((method, path), ()):
+            if (all(query.get(k) == v for k, v in route.query.items())
+                    and all(payload.get(k) == v for k, v in route.match_json.items())):
+                return route
+        return None
+
+    def paths(self) -> List[str]:
+        """Distinct paths served"""
+        return sorted({route.path for route in self.routes})
+
+
+def load_routes(fixtures_file: str = DEFAULT_FIXTURES, seed: int = 0) -> RouteTable:
+    """Load the fixture file into a route table"""
+    with open(fixtures_file, 'r') as f:
+        doc = json.load(f)
+    defaults = doc.get('defaults', {})
+    return RouteTable([_route_from_fixture(entry, defaults, seed) for entry in doc['routes']])
+
+
+def apply_overrides(table: RouteTable, latencies: List[str], error_rates: List[str]) -> None:
+    """Apply PATH=SPEC overrides from the command line ('*' matches every path)"""
+    for item in latencies:
+        path, _, spec = item.partition('=')
+        model = LatencyModel.parse(spec)
+        for route in table.routes:
+            if path in ('*', route.path):
+                route.latency = model
+    for item in error_rates:
+        path, _, rate = item.partition('=')
+        rate_value, _, status = rate.partition(':')
+        for route in table.routes:
+            if path in ('*', route.path):
+                route.error_rate = float(rate_value)
+                if status:
+                    route.error_status = int(status)
+
+
+class StandInServer:
+    """asyncio HTTP/1.1 server replaying the route table"""
+
+    def __init__(self, table: RouteTable, host: str = '127.0.0.1', port: int = 3000, quiet: bool = True,
+                 webhook_secret: str = DEFAULT_WEBHOOK_SECRET, compress: bool = True):
+        self.table = table
+        self.host = host
+        self.port = port
+        self.quiet = quiet
+        self.webhook_secret = webhook_secret
+        self.compress = compress
+        self.requests_served = 0
+        self._server: Optional[asyncio.base_events.Server] = None
+
+    async def start(self) -> None:
+        """Bind the listening socket (port 0 picks a free port)"""
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        """Start (if needed) and serve until cancelled"""
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve requests on one keep-alive connection"""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                if len(head) > MAX_HEADER_BYTES:
+                    break
+
+                lines = head.decode('latin-1').split('\r\n')
+                try:
+                    method, target, version = lines[0].split(' ', 2)
+                except ValueError:
+                    break
+                if method == 'PRI' and version == 'HTTP/2.0':
+                    if h2 is not None and await reader.readexactly(len(H2_PREFACE_TAIL)) == H2_PREFACE_TAIL:
+                        await self._serve_h2(reader, writer, head + H2_PREFACE_TAIL)
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    if ':' in line:
+                        name, _, value = line.partition(':')
+                        headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get('content-length', 0) or 0)
+                request_body = await reader.readexactly(length) if length else b''
+
+                keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+                status, response_headers, body = await self.respond(method.upper(), target, request_body, headers)
+                if self.compress:
+                    response_headers, body = self._compress(response_headers, body, headers.get('accept-encoding', ''))
+
+                writer.write(self._serialize(status, response_headers, body, keep_alive))
+                await writer.drain()
+                self.requests_served += 1
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+
+    async def _serve_h2(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, preface: bytes) -> None:
+        """Serve one HTTP/2 connection; every stream is answered by its own task"""
+        conn = h2.connection.H2Connection(config=h2.config.H2Configuration(client_side=False,
+                                                                           header_encoding='utf-8'))
+        conn.initiate_connection()
+        conn.update_settings({h2.settings.SettingCodes.MAX_CONCURRENT_STREAMS: H2_MAX_STREAMS})
+        pending: Dict[int, Tuple[Dict[str, str], bytearray]] = {}
+        tasks: Dict[int, asyncio.Task] = {}
+        window_changed = asyncio.Event()
+
+        async def answer(stream_id: int, headers: Dict[str, str], request_body: bytes) -> None:
+            status, response_headers, body = await self.respond(
+                headers.get(':method', 'GET').upper(), headers.get(':path', '/'), request_body, headers)
+            if self.compress:
+                response_headers, body = self._compress(response_headers, body, headers.get('accept-encoding', ''))
+            fields = [(':status', str(status))]
+            fields += [(name.lower(), value) for name, value in response_headers.items()
+                       if name.lower() not in ('content-length', 'connection', 'transfer-encoding')]
+            fields.append(('content-length', str(len(body))))
+            try:
+                conn.send_headers(stream_id, fields, end_stream=not body)
+                sent = 0
+                while sent < len(body):
+                    window = min(conn.local_flow_control_window(stream_id), conn.max_outbound_frame_size)
+                    if window <= 0:
+                        window_changed.clear()
+                        await window_changed.wait()
+                        continue
+                    chunk = body[sent:sent + window]
+                    sent += len(chunk)
+                    conn.send_data(stream_id, chunk, end_stream=sent >= len(body))
+                    writer.write(conn.data_to_send())
+                writer.write(conn.data_to_send())
+                self.requests_served += 1
+            except h2.exceptions.StreamClosedError:
+                pass
+            finally:
+                tasks.pop(stream_id, None)
+
+        try:
+            events = conn.receive_data(preface)
+            while True:
+                for event in events:
+                    if isinstance(event, h2.events.RequestReceived):
+                        pending[event.stream_id] = ({name.lower(): value for name, value in event.headers},
+                                                    bytearray())
+                    elif isinstance(event, h2.events.DataReceived):
+                        if event.stream_id in pending:
+                            pending[event.stream_id][1].extend(event.data)
+                        conn.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+                    elif isinstance(event, h2.events.StreamEnded) and event.stream_id in pending:
+                        headers, request_body = pending.pop(event.stream_id)
+                        tasks[event.stream_id] = asyncio.ensure_future(
+                            answer(event.stream_id, headers, bytes(request_body)))
+                    elif isinstance(event, h2.events.StreamReset):
+                        pending.pop(event.stream_id, None)
+                        task = tasks.pop(event.stream_id, None)
+                        if task:
+                            task.cancel()
+                    elif isinstance(event, h2.events.ConnectionTerminated):
+                        return
+                    if isinstance(event, (h2.events.WindowUpdated, h2.events.RemoteSettingsChanged)):
+                        window_changed.set()
+                writer.write(conn.data_to_send())
+                await writer.drain()
+                data = await reader.read(65536)
+                if not data:
+                    return
+                events = conn.receive_data(data)
+        except (ConnectionError, h2.exceptions.ProtocolError):
+            pass
+        finally:
+            for task in tasks.values():
+                task.cancel()
+
+    async def respond(self, method: str, target: str, request_body: bytes = b'',
+                      request_headers: Optional[Dict[str, str]] = None) -> Tuple[int, Dict[str, str], bytes]:
+        """Resolve a request to (status, headers, body), sleeping for the injected latency"""
+        parts = urlsplit(target)
+        query = dict(parse_qsl(parts.query, keep_blank_values=True))
+        payload = None
+        if request_body:
+            try:
+                payload = json.loads(request_body)
+            except ValueError:
+                payload = None
+        route = self.table.match(method, parts.path, query, payload)
+
+        if route is None:
+            if not self.quiet:
+                print(f"{YELLOW}No fixture for {method} {target}{RESET}")
+            body = json.dumps({'error': f'No stand-in fixture for {method} {parts.path}'}).encode()
+            return 404, {'Content-Type': 'application/json'}, body
+
+        route.hits += 1
+        if route.verify_hmac:
+            rejection = self._check_hmac(request_body, (request_headers or {}).get(route.verify_hmac.lower()))
+            if rejection is not None:
+                status, error = rejection
+                return status, {'Content-Type': 'application/json'}, json.dumps({'error': error}).encode()
+
+        delay = route.latency.sample(route.rng) if route.latency else 0.0
+        failed = route.error_rate > 0 and route.rng.random() < route.error_rate
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if failed:
+            route.errors += 1
+            body = json.dumps({'error': 'Injected stand-in failure'}).encode()
+            return route.error_status, {'Content-Type': 'application/json'}, body
+
+        if not self.quiet:
+            print(f"{GREEN}{method} {target}{RESET} -> {route.status} ({delay * 1000:.0f}ms)")
+        return route.status, route.headers, route.body
+
+    def _check_hmac(self, body: bytes, signature: Optional[str]) -> Optional[Tuple[int, str]]:
+        """Mirror the webhook handler's signature check; returns (status, error) on rejection"""
+        if not signature:
+            return 401, 'Missing HMAC header'
+        expected = base64.b64encode(hmac.new(self.webhook_secret.encode(), body, hashlib.sha256).digest())
+        if len(expected) != len(signature.encode()):
+            # crypto.timingSafeEqual throws on a length mismatch, which the handler reports as a 500
+            return 500, 'Webhook processing failed'
+        if not hmac.compare_digest(expected, signature.encode()):
+            return 401, 'Invalid signature'
+        return None
+
+    @staticmethod
+    def _compress(headers: Dict[str, str], body: bytes, accept_encoding: str) -> Tuple[Dict[str, str], bytes]:
+        """gzip the body when the client accepts it and it is worth compressing"""
+        accepted = {token.split(';')[0].strip().lower() for token in accept_encoding.split(',')}
+        content_type = headers.get('Content-Type', '')
+        if ('gzip' not in accepted or len(body) < COMPRESS_MIN_BYTES
+                or not content_type.startswith(('application/json', 'text/'))):
+            return headers, body
+        headers = {**headers, 'Content-Encoding': 'gzip', 'Vary': 'Accept-Encoding'}
+        return headers, gzip.compress(body, compresslevel=6, mtime=0)
+
+    @staticmethod
+    def _serialize(status: int, headers: Dict[str, str], body: bytes, keep_alive: bool) -> bytes:
+        """Encode an HTTP/1.1 response"""
+        lines = [f"HTTP/1.1 {status} {REASONS.get(status, 'Unknown')}"]
+        for name, value in headers.items():
+            if name.lower() not in ('content-length', 'connection', 'transfer-encoding'):
+                lines.append(f"{name}: {value}")
+        lines.append(f"Content-Length: {len(body)}")
+        lines.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body
+
+
+def run_in_thread(table: RouteTable, host: str = '127.0.0.1', port: int = 0) -> Tuple[StandInServer, threading.Thread]:
+    """Start a stand-in server on a background event loop thread (for benchmarks)"""
+    server = StandInServer(table, host, port)
+    started = threading.Event()
+
+    def run() -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(server.start())
+        started.set()
+        loop.run_until_complete(server.serve_forever())
+
+    thread = threading.Thread(target=run, name='standin-server', daemon=True)
+    thread.start()
+    started.wait()
+    return server, thread
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Serve recorded API fixtures with injected latency")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=3000)
+    parser.add_argument('--fixtures', default=DEFAULT_FIXTURES)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--latency', action='append', default=[], metavar='PATH=MODEL:PARAMS',
+                        help="Override latency, e.g. /api/products=normal:120,30 or '*=fixed:0'")
+    parser.add_argument('--error-rate', action='append', default=[], metavar='PATH=RATE[:STATUS]',
+                        help="Inject errors, e.g. /api/checkout=0.05:502")
+    parser.add_argument('--webhook-secret', default=DEFAULT_WEBHOOK_SECRET,
+                        help="Secret for routes with verify_hmac (the real server's SHOPIFY_WEBHOOK_SECRET)")
+    parser.add_argument('--no-compress', action='store_true', help="Never gzip responses")
+    parser.add_argument('--verbose', action='store_true', help="Log every request")
+    args = parser.parse_args()
+
+    try:
+        table = load_routes(args.fixtures, args.seed)
+        apply_overrides(table, args.latency, args.error_rate)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"{RED}Error loading fixtures: {e}{RESET}")
+        sys.exit(1)
+
+    server = StandInServer(table, args.host, args.port, quiet=not args.verbose,
+                           webhook_secret=args.webhook_secret, compress=not args.no_compress)
+
+    async def run() -> None:
+        await server.start()
+        print(f"{BLUE}{BOLD}Lab Essentials API stand-in listening on {server.base_url}{RESET}")
+        print(f"Serving {len(table.routes)} fixtures across {len(table.paths())} paths (seed {args.seed})")
+        await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        print(f"\n{YELLOW}Stand-in stopped after {server.requests_served} requests{RESET}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Streaming Schema Validation for Large API Payloads
+
+Opt-in alternative to response.json() + validate_response_structure for
+catalog-sized listings. The response body is parsed incrementally and each
+element of a top-level array property is validated as soon as it has been
+read, so:
+- Memory is bounded by one network chunk plus the largest single element
+- The first violation stops the download (the connection is closed early)
+
+Rule messages are the ones produced by schema_validator, but violations are
+reported in document order. Because the body is not fully read, a maxItems
+violation reports the count seen when it tripped, and a missing required
+field is only reported once the object has closed.
+
+Usage:
+    python3 testsprite_tests/stream_validator.py
+    python3 testsprite_tests/stream_validator.py --endpoint /api/products --query limit=250 --schema products
+"""
+
+import argparse
+import codecs
+import json
+import re
+import sys
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import requests
+
+import resilient_http
+import schema_validator
+from comprehensive_api_tests import (
+    BASE_URL, HEADERS, GREEN, RED, YELLOW, BLUE, CYAN, BOLD, RESET,
+    PRODUCTS_SCHEMA, FEATURED_PRODUCTS_SCHEMA, COLLECTIONS_SCHEMA, MENU_SCHEMA,
+)
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# Schemas selectable from the command line
+SCHEMAS: Dict[str, Dict] = {
+    'products': PRODUCTS_SCHEMA,
+    'featured-products': FEATURED_PRODUCTS_SCHEMA,
+    'collections': COLLECTIONS_SCHEMA,
+    'menu': MENU_SCHEMA,
+}
+
+# Listing endpoints checked when no --endpoint is given: (path, query, schema name)
+DEFAULT_TARGETS: List[Tuple[str, Dict[str, str], str]] = [
+    ("/api/products", {"limit": "250"}, 'products'),
+    ("/api/featured-products", {}, 'featured-products'),
+    ("/api/collections", {"limit": "250"}, 'collections'),
+    ("/api/menu", {}, 'menu'),
+]
+
+_DECODER = json.JSONDecoder()
+_NUMBER_TAIL = re.compile(r'[0-9.eE+-]*')
+
+
+@dataclass
+class StreamStats:
+    """Counters collected while validating one response body"""
+    bytes_read: int = 0
+    items_checked: int = 0
+    peak_buffer_chars: int = 0
+
+
+class _JSONStream:
+    """Incremental reader over a stream of UTF-8 encoded JSON chunks"""
+
+    def __init__(self, chunks: Iterable[bytes], stats: StreamStats):
+        self._chunks: Iterator[bytes] = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+        self._stats = stats
+
+    def _fill(self) -> bool:
+        """Append the next chunk to the buffer; False once the stream is exhausted"""
+        if self._eof:
+            return False
+
+        # Drop the consumed prefix so the buffer stays bounded
+        if self._pos:
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+
+        for chunk in self._chunks:
+            if not chunk:
+                continue
+            self._stats.bytes_read += len(chunk)
+            text = self._decoder.decode(chunk)
+            if text:
+                self._buf += text
+                self._stats.peak_buffer_chars = max(self._stats.peak_buffer_chars, len(self._buf))
+                return True
+
+        self._buf += self._decoder.decode(b'', final=True)
+        self._eof = True
+        return False
+
+    def peek(self) -> str:
+        """Return the next non-whitespace character without consuming it ('' at end)"""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in ' \t\r\n':
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char: str) -> None:
+        """Consume a structural character"""
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"expected '{char}' at offset {self._stats.bytes_read}, got '{found or 'EOF'}'")
+        self._pos += 1
+
+    def skip_value(self) -> None:
+        """Consume the next value without materializing containers as a whole"""
+        opener = self.peek()
+        if opener not in ('[', '{'):
+            self.read_value()
+            return
+
+        closer = ']' if opener == '[' else '}'
+        self.expect(opener)
+        if self.peek() == closer:
+            self.expect(closer)
+            return
+        while True:
+            if opener == '{':
+                self.read_value()
+                self.expect(':')
+            self.skip_value()
+            if self.peek() == closer:
+                self.expect(closer)
+                return
+            self.expect(',')
+
+    def read_value(self) -> Any:
+        """Decode the next complete JSON value, pulling more chunks as needed"""
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self._buf, self._pos)
+                # A number running up to the buffer edge may still be truncated ("12" of "12.5")
+                if self._eof or _NUMBER_TAIL.match(self._buf, end).end() < len(self._buf):
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            # Grow the pending text geometrically so a large value is not re-parsed per chunk
+            target = 2 * (len(self._buf) - self._pos)
+            while self._fill() and len(self._buf) - self._pos < target:
+                pass
+
+
+class _StreamPlan:
+    """Per-schema validators prepared once for streaming"""
+
+    def __init__(self, schema: Dict):
+        self.required = tuple(schema.get('required', ()))
+        self.fields: Dict[str, schema_validator.Validator] = {}
+        self.arrays: Dict[str, Tuple[Optional[int], Optional[int], schema_validator.Validator]] = {}
+
+        for field, rules in schema.get('properties', {}).items():
+            self.fields[field] = schema_validator.compile_schema({'properties': {field: rules}})
+            if rules.get('type') == 'array' and 'items' in rules and 'enum' not in rules:
+                self.arrays[field] = (
+                    rules.get('minItems'),
+                    rules.get('maxItems'),
+                    schema_validator.compile_schema(rules['items']),
+                )
+
+
+_PLANS: Dict[int, Tuple[Dict, _StreamPlan]] = {}
+
+
+def _get_plan(schema: Dict) -> _StreamPlan:
+    """Return the cached streaming plan for a schema"""
+    entry = _PLANS.get(id(schema))
+    if entry is None or entry[0] is not schema:
+        entry = (schema, _StreamPlan(schema))
+        _PLANS[id(schema)] = entry
+    return entry[1]
+
+
+def _validate_array(stream: _JSONStream, field: str, plan: Tuple, stats: StreamStats) -> Optional[str]:
+    """Validate a top-level array property element by element"""
+    min_items, max_items, item_validator = plan
+    stream.expect('[')
+
+    count = 0
+    if stream.peek() == ']':
+        stream.expect(']')
+    else:
+        while True:
+            item = stream.read_value()
+            if max_items is not None and count + 1 > max_items:
+                return f"Field '{field}' has at least {count + 1} items, maximum is {max_items}"
+            error = item_validator(item)
+            stats.items_checked += 1
+            if error is not None:
+                return f"Array item {count} validation failed: {error}"
+            count += 1
+
+            separator = stream.peek()
+            if separator == ']':
+                stream.expect(']')
+                break
+            stream.expect(',')
+
+    if min_items is not None and count < min_items:
+        return f"Field '{field}' has {count} items, minimum is {min_items}"
+    return None
+
+
+def validate_stream(chunks: Iterable[bytes], schema: Dict,
+                    stats: Optional[StreamStats] = None) -> Tuple[bool, str]:
+    """Validate a JSON body delivered as byte chunks against a schema"""
+    stats = stats if stats is not None else StreamStats()
+    stream = _JSONStream(chunks, stats)
+    plan = _get_plan(schema)
+
+    try:
+        if stream.peek() != '{':
+            # Not an object: nothing to stream, fall back to whole-value validation
+            return schema_validator.validate(stream.read_value(), schema)
+
+        stream.expect('{')
+        seen = set()
+        if stream.peek() == '}':
+            stream.expect('}')
+        else:
+            while True:
+                key = stream.read_value()
+                stream.expect(':')
+                seen.add(key)
+
+                if key in plan.arrays and stream.peek() == '[':
+                    error = _validate_array(stream, key, plan.arrays[key], stats)
+                elif key in plan.fields:
+                    error = plan.fields[key]({key: stream.read_value()})
+                else:
+                    stream.skip_value()
+                    error = None
+                if error is not None:
+                    return False, error
+
+                if stream.peek() == '}':
+                    stream.expect('}')
+                    break
+                stream.expect(',')
+
+        for field in plan.required:
+            if field not in seen:
+                return False, f"Missing required field: {field}"
+
+        if stream.peek() != '':
+            return False, "Invalid JSON: unexpected data after top-level object"
+    except (ValueError, UnicodeDecodeError) as e:
+        # json.JSONDecodeError is a ValueError subclass
+        return False, f"Invalid JSON: {e}"
+
+    return True, "Valid"
+
+
+def validate_response_stream(response: requests.Response, schema: Dict,
+                             chunk_size: int = DEFAULT_CHUNK_SIZE,
+                             stats: Optional[StreamStats] = None) -> Tuple[bool, str]:
+    """Validate a response opened with stream=True, closing it on the first failure"""
+    try:
+        return validate_stream(response.iter_content(chunk_size=chunk_size), schema, stats)
+    finally:
+        response.close()
+
+
+def run_targets(base_url: str, targets: List[Tuple[str, Dict[str, str], str]], chunk_size: int) -> int:
+    """Stream-validate each target and print a summary; returns the failure count"""
+    print(f"\n{BLUE}{BOLD}{'='*80}")
+    print("Lab Essentials E-Commerce - Streaming Payload Validation")
+    print(f"Testing against: {base_url}")
+    print(f"Chunk size: {chunk_size} bytes")
+    print(f"{'='*80}{RESET}\n")
+
+    session = resilient_http.ResilientSession()
+    failed = 0
+    for path, query, schema_name in targets:
+        print(f"{CYAN}Streaming: {path} {query or ''} [{schema_name}]{RESET}")
+        stats = StreamStats()
+        try:
+            start_time = datetime.now()
+            response = session.get(f"{base_url}{path}", headers=HEADERS, params=query, stream=True)
+            if response.status_code != 200:
+                response.close()
+                success, message = False, f"Expected status 200, got {response.status_code}"
+            else:
+                success, message = validate_response_stream(response, SCHEMAS[schema_name], chunk_size, stats)
+            elapsed = (datetime.now() - start_time).total_seconds() * 1000
+        except Exception as e:
+            success, message, elapsed = False, f"Error: {str(e)}", 0.0
+
+        status_icon = f"{GREEN}✓ PASS{RESET}" if success else f"{RED}✗ FAIL{RESET}"
+        print(f"  {status_icon} - {message}")
+        print(f"  Items checked: {stats.items_checked} | Bytes read: {stats.bytes_read} | "
+              f"Peak buffer: {stats.peak_buffer_chars} chars | Time: {elapsed:.0f}ms\n")
+        if not success:
+            failed += 1
+
+    total = len(targets)
+    print(f"{BOLD}Streamed {total} responses: {GREEN}{total - failed} passed{RESET}, "
+          f"{RED if failed else GREEN}{failed} failed{RESET}\n")
+    return failed
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Stream-validate large API listings")
+    parser.add_argument('--base-url', default=BASE_URL)
+    parser.add_argument('--endpoint', help="Path to validate (default: all listing endpoints)")
+    parser.add_argument('--query', action='append', default=[], metavar='KEY=VALUE',
+                        help="Query parameter for --endpoint (repeatable)")
+    parser.add_argument('--schema', choices=sorted(SCHEMAS), default='products',
+                        help="Schema for --endpoint")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    if args.endpoint:
+        query = dict(item.split('=', 1) for item in args.query)
+        targets = [(args.endpoint, query, args.schema)]
+    else:
+        targets = DEFAULT_TARGETS
+
+    try:
+        failed = run_targets(args.base_url, targets, args.chunk_size)
+        sys.exit(0 if failed == 0 else 1)
+    except KeyboardInterrupt:
+        print(f"\n{YELLOW}Validation interrupted by user{RESET}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
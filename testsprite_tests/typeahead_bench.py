@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+Typeahead Query-Replay Benchmark for Search and Predictive Search
+
+Predictive search fires while the shopper types, so its latency is felt per
+keystroke. This replays typed queries against /api/search/predictive (or
+/api/search) with realistic inter-key timing and compares two client
+strategies:
+- keystroke: a request for every keystroke from the second character on
+- debounce:  what SearchModal does today, one request 300 ms after the
+  last keystroke (from 2 characters, query trimmed)
+
+With cancellation (the default) a keystroke aborts the requests still in
+flight, like an AbortController would. The API routes do not observe the
+abort, so a cancelled request still costs a Shopify call: "Sent" is the
+server load either way.
+
+Queries are product titles, product types and distinctive title words from
+quiz-testing/products_export.json (or a text file, one query per line).
+Inter-key intervals are lognormal around --key-ms; each typist draws the
+same schedule for every strategy, so strategies see identical typing.
+
+Reports per strategy:
+- Request latency by prefix length (p50/p95) and how many were cancelled
+- Wasted-request ratio: cancelled requests plus responses that arrived
+  after the shopper had typed the next key
+- Keystrokes answered within the budget (default 100 ms): results for
+  exactly that prefix on screen within the budget of the keystroke
+- Final results latency: last keystroke to results for the full query
+- Out-of-order responses: an older prefix answered after a newer one,
+  which overwrites fresher results in a client that does not guard for it
+
+Usage:
+    python3 testsprite_tests/typeahead_bench.py
+    python3 testsprite_tests/typeahead_bench.py --users 20 --key-ms 150 --strategies keystroke,debounce --budget-ms 100
+    python3 testsprite_tests/typeahead_bench.py --endpoint search --corpus queries.txt --no-cancel
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from aio_client import PROTOCOLS, ClientError, open_client
+from comprehensive_api_tests import BASE_URL, GREEN, RED, YELLOW, BLUE, CYAN, BOLD, RESET
+from metrics_probe import BROWSER_CONNECTIONS
+from perf_stats import percentile, summarize
+
+REPORT_FILE = "testsprite_tests/typeahead_bench_report.json"
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PRODUCTS_EXPORT = os.path.join(SCRIPT_DIR, '..', 'quiz-testing', 'products_export.json')
+
+ENDPOINTS = {'predictive': '/api/search/predictive', 'search': '/api/search'}
+STRATEGIES = ('keystroke', 'debounce')
+
+# Client behaviour in SearchModal / useSearch
+MIN_CHARS = 2
+DEBOUNCE_MS = 300
+PREDICTIVE_LIMIT = 10
+SEARCH_FIRST = 20
+
+KEYSTROKE_BUDGET_MS = 100.0
+KEY_SIGMA = 0.45
+KEY_MIN_MS, KEY_MAX_MS = 30.0, 2000.0
+
+# Prefixes this long or longer share one row of the by-length table
+PREFIX_BUCKET_MAX = 12
+
+
+@dataclass
+class SentRequest:
+    """One search request and what became of it"""
+    prefix: str
+    key_index: int
+    sent_ms: float
+    latency_ms: Optional[float] = None
+    outcome: str = 'pending'  # answered, late, cancelled, error
+    out_of_order: bool = False
+
+
+@dataclass
+class Session:
+    """One query typed by one typist under one strategy"""
+    query: str
+    key_times: List[float]
+    requests: List[SentRequest] = field(default_factory=list)
+    answered: Dict[int, float] = field(default_factory=dict)  # key index -> ms until its results showed
+
+    def eligible_keys(self) -> List[int]:
+        """Keystrokes after which the client searches"""
+        return [i for i in range(len(self.query)) if _searchable(self.query[:i + 1])]
+
+
+def _searchable(prefix: str) -> bool:
+    return bool(prefix.strip()) and len(prefix) >= MIN_CHARS
+
+
+# ==================== CORPUS AND TYPING ====================
+
+def build_corpus(products: List[Dict]) -> List[str]:
+    """Queries shoppers would type: titles, product types and distinctive title words"""
+    corpus: List[str] = []
+    seen = set()
+
+    def add(text: str) -> None:
+        query = ' '.join(text.lower().split())
+        if len(query) >= MIN_CHARS and query not in seen:
+            seen.add(query)
+            corpus.append(query)
+
+    for product in products:
+        add(product.get('title') or '')
+        add(product.get('productType') or '')
+    for product in products:
+        for word in re.findall(r"[a-z0-9][a-z0-9+-]{3,}", (product.get('title') or '').lower()):
+            add(word)
+    return corpus
+
+
+def load_corpus(path: str) -> List[str]:
+    """A products export (.json) or a text file with one query per line"""
+    with open(path, 'r') as f:
+        if path.endswith('.json'):
+            return build_corpus(json.load(f))
+        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+
+def typing_schedule(query: str, rng: random.Random, key_ms: float) -> List[float]:
+    """Keystroke offsets in ms from the first key, lognormal intervals around key_ms"""
+    times = [0.0]
+    for _ in query[1:]:
+        interval = rng.lognormvariate(math.log(key_ms), KEY_SIGMA)
+        times.append(times[-1] + min(max(interval, KEY_MIN_MS), KEY_MAX_MS))
+    return times
+
+
+def request_plan(query: str, key_times: List[float], strategy: str, debounce_ms: float) -> List[Tuple[float, int]]:
+    """(send offset, keystroke index) of every request the strategy sends"""
+    plan = []
+    for i, key_time in enumerate(key_times):
+        if not _searchable(query[:i + 1]):
+            continue
+        if strategy == 'keystroke':
+            plan.append((key_time, i))
+        elif i + 1 == len(key_times) or key_times[i + 1] - key_time >= debounce_ms:
+            plan.append((key_time + debounce_ms, i))
+    return plan
+
+
+# ==================== REPLAY ====================
+
+def _payload(endpoint: str, prefix: str) -> Dict:
+    if endpoint == 'search':
+        return {'query': prefix, 'first': SEARCH_FIRST}
+    return {'query': prefix, 'limit': PREDICTIVE_LIMIT}
+
+
+async def type_query(client, endpoint: str, query: str, key_times: List[float], strategy: str,
+                     debounce_ms: float, cancel: bool) -> Session:
+    """Type one query, sending and cancelling requests as the strategy would"""
+    session = Session(query, key_times)
+    path = ENDPOINTS[endpoint]
+    start = time.perf_counter()
+    inflight: List[Tuple[SentRequest, asyncio.Task]] = []
+    shown_key = -1  # newest keystroke whose results are on screen
+
+    def now() -> float:
+        return (time.perf_counter() - start) * 1000
+
+    async def send(req: SentRequest) -> None:
+        nonlocal shown_key
+        try:
+            response = await client.post(path, json_body=_payload(endpoint, req.prefix))
+        except ClientError:
+            req.outcome = 'error'
+            return
+        done = now()
+        req.latency_ms = done - req.sent_ms
+        if response.status != 200:
+            req.outcome = 'error'
+            return
+        req.out_of_order = req.key_index < shown_key
+        shown_key = max(shown_key, req.key_index)
+        next_key = key_times[req.key_index + 1] if req.key_index + 1 < len(key_times) else None
+        if next_key is not None and done > next_key:
+            req.outcome = 'late'
+        else:
+            req.outcome = 'answered'
+            session.answered[req.key_index] = done - key_times[req.key_index]
+
+    # Keystrokes sort before sends at the same instant so a key cancels, then sends
+    events = sorted([(t, 0, i) for i, t in enumerate(key_times)] +
+                    [(t, 1, i) for t, i in request_plan(query, key_times, strategy, debounce_ms)])
+    for at, kind, key_index in events:
+        delay = at - now()
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        if kind == 0:
+            if cancel and key_index > 0:
+                for req, task in inflight:
+                    if not task.done():
+                        task.cancel()
+                        req.outcome = 'cancelled'
+            continue
+        req = SentRequest(query[:key_index + 1].strip(), key_index, now())
+        session.requests.append(req)
+        inflight.append((req, asyncio.ensure_future(send(req))))
+    await asyncio.gather(*(task for _, task in inflight), return_exceptions=True)
+    return session
+
+
+async def run_typists(base_url: str, endpoint: str, protocol: str, schedules: List[List[Tuple[str, List[float]]]],
+                      strategy: str, debounce_ms: float, cancel: bool, pause_ms: float,
+                      timeout: float) -> List[Session]:
+    """Every typist types its queries concurrently with the others, each on its own client"""
+    sessions: List[Session] = []
+
+    async def typist(queries: List[Tuple[str, List[float]]]) -> None:
+        async with open_client(base_url, protocol, BROWSER_CONNECTIONS, timeout) as client:
+            # Warm connection, as a browser on the storefront already has one
+            await client.post(ENDPOINTS[endpoint], json_body=_payload(endpoint, queries[0][0][:MIN_CHARS]))
+            for query, key_times in queries:
+                sessions.append(await type_query(client, endpoint, query, key_times, strategy, debounce_ms, cancel))
+                await asyncio.sleep(pause_ms / 1000)
+
+    await asyncio.gather(*(typist(queries) for queries in schedules if queries))
+    return sessions
+
+
+# ==================== REPORT ====================
+
+def _round(stats: Dict[str, float]) -> Dict[str, float]:
+    return {k: round(v, 2) for k, v in stats.items()}
+
+
+def summarize_sessions(sessions: List[Session], budget_ms: float) -> Dict:
+    """Aggregate one strategy's sessions"""
+    requests = [req for session in sessions for req in session.requests]
+    outcomes = {name: sum(1 for req in requests if req.outcome == name)
+                for name in ('answered', 'late', 'cancelled', 'error')}
+    eligible = sum(len(session.eligible_keys()) for session in sessions)
+    within = sum(1 for session in sessions for ms in session.answered.values() if ms <= budget_ms)
+    finals = [session.answered[len(session.query) - 1] for session in sessions
+              if len(session.query) - 1 in session.answered]
+    wasted = outcomes['cancelled'] + outcomes['late']
+
+    by_length: Dict[str, Dict] = {}
+    for length in sorted({min(len(req.prefix), PREFIX_BUCKET_MAX) for req in requests}):
+        group = [req for req in requests if min(len(req.prefix), PREFIX_BUCKET_MAX) == length]
+        latencies = [req.latency_ms for req in group if req.latency_ms is not None]
+        by_length[f"{length}+" if length == PREFIX_BUCKET_MAX else str(length)] = {
+            'sent': len(group),
+            'cancelled': sum(1 for req in group if req.outcome == 'cancelled'),
+            'p50_ms': round(percentile(latencies, 50), 2) if latencies else None,
+            'p95_ms': round(percentile(latencies, 95), 2) if latencies else None,
+        }
+
+    keystrokes = sum(len(session.query) for session in sessions)
+    return {
+        'sessions': len(sessions),
+        'keystrokes': keystrokes,
+        'searchable_keystrokes': eligible,
+        'requests_sent': len(requests),
+        'requests_per_keystroke': round(len(requests) / keystrokes, 3) if keystrokes else 0.0,
+        'outcomes': outcomes,
+        'wasted': wasted,
+        'wasted_ratio': round(wasted / len(requests), 4) if requests else 0.0,
+        'out_of_order': sum(1 for req in requests if req.out_of_order),
+        'within_budget_pct': round(100 * within / eligible, 2) if eligible else 0.0,
+        'answered_keystrokes_pct': round(100 * sum(len(s.answered) for s in sessions) / eligible, 2) if eligible else 0.0,
+        'request_latency_ms': _round(summarize([req.latency_ms for req in requests if req.latency_ms is not None])),
+        'final_results_ms': _round(summarize(finals)),
+        'by_prefix_length': by_length,
+    }
+
+
+def print_summary(results: Dict[str, Dict], budget_ms: float) -> None:
+    """Strategy comparison, then latency by prefix length per strategy"""
+    print(f"\n{CYAN}{BOLD}{'Strategy':<10} {'Sent':>6} {'Req/key':>8} {'Cancel':>7} {'Late':>5} {'Wasted':>7} "
+          f"{'OoO':>4} {f'<={budget_ms:g}ms':>8} {'Final p50':>10} {'Final p95':>10} {'Errors':>7}{RESET}")
+    for strategy, summary in results.items():
+        outcomes, final = summary['outcomes'], summary['final_results_ms']
+        errors = f"{RED}{outcomes['error']:>7}{RESET}" if outcomes['error'] else f"{0:>7}"
+        within = summary['within_budget_pct']
+        color = GREEN if within >= 90 else YELLOW if within >= 50 else RED
+        print(f"{strategy:<10} {summary['requests_sent']:>6} {summary['requests_per_keystroke']:>8.2f} "
+              f"{outcomes['cancelled']:>7} {outcomes['late']:>5} {summary['wasted_ratio'] * 100:>6.1f}% "
+              f"{summary['out_of_order']:>4} {color}{within:>7.1f}%{RESET} {final['p50']:>8.0f}ms "
+              f"{final['p95']:>8.0f}ms {errors}")
+
+    for strategy, summary in results.items():
+        print(f"\n{BOLD}{strategy}: request latency by prefix length{RESET}")
+        print(f"  {'Chars':>5} {'Sent':>6} {'Cancel':>7} {'p50':>8} {'p95':>8}")
+        for length, row in summary['by_prefix_length'].items():
+            p50 = f"{row['p50_ms']:>6.0f}ms" if row['p50_ms'] is not None else f"{'-':>8}"
+            p95 = f"{row['p95_ms']:>6.0f}ms" if row['p95_ms'] is not None else f"{'-':>8}"
+            print(f"  {length:>5} {row['sent']:>6} {row['cancelled']:>7} {p50} {p95}")
+    print(f"\nWasted: cancelled + answered after the next keystroke. <={budget_ms:g}ms: searchable keystrokes "
+          f"whose own results showed within the budget. OoO: older prefix answered after a newer one.")
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Replay typed search queries against predictive search")
+    parser.add_argument('--base-url', default=BASE_URL)
+    parser.add_argument('--endpoint', choices=sorted(ENDPOINTS), default='predictive')
+    parser.add_argument('--corpus', default=PRODUCTS_EXPORT,
+                        help="products_export.json or a text file with one query per line")
+    parser.add_argument('--strategies', default=','.join(STRATEGIES), help="keystroke, debounce or both")
+    parser.add_argument('--users', type=int, default=4, help="Concurrent typists")
+    parser.add_argument('--sessions', type=int, help="Queries typed in total (default: the whole corpus)")
+    parser.add_argument('--key-ms', type=float, default=180.0, help="Median time between keystrokes")
+    parser.add_argument('--pause-ms', type=float, default=500.0, help="Pause between a typist's queries")
+    parser.add_argument('--debounce-ms', type=float, default=DEBOUNCE_MS, help="Debounce delay (SearchModal: 300)")
+    parser.add_argument('--budget-ms', type=float, default=KEYSTROKE_BUDGET_MS,
+                        help="Keystroke-to-results budget")
+    parser.add_argument('--no-cancel', action='store_true', help="Let superseded requests run to completion")
+    parser.add_argument('--protocol', choices=PROTOCOLS, default='h1')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--timeout', type=float, default=10.0, help="Per-request timeout in seconds")
+    parser.add_argument('--output', default=REPORT_FILE)
+    args = parser.parse_args()
+
+    strategies = [s.strip() for s in args.strategies.split(',') if s.strip()]
+    unknown = sorted(set(strategies) - set(STRATEGIES))
+    if unknown:
+        parser.error(f"unknown strategy(ies): {', '.join(unknown)}")
+    if args.users < 1:
+        parser.error("--users must be at least 1")
+    try:
+        corpus = load_corpus(args.corpus)
+    except (OSError, ValueError) as e:
+        parser.error(f"cannot read corpus {args.corpus}: {e}")
+    if not corpus:
+        parser.error(f"no queries in {args.corpus}")
+
+    rng = random.Random(args.seed)
+    total = args.sessions or len(corpus)
+    queries = [corpus[i % len(corpus)] for i in range(total)]
+    rng.shuffle(queries)
+    schedules: List[List[Tuple[str, List[float]]]] = [[] for _ in range(args.users)]
+    for i, query in enumerate(queries):
+        schedules[i % args.users].append((query, typing_schedule(query, rng, args.key_ms)))
+
+    print(f"\n{BLUE}{BOLD}{'='*80}")
+    print("Lab Essentials E-Commerce - Typeahead Query-Replay Benchmark")
+    print(f"Testing against: {args.base_url}{ENDPOINTS[args.endpoint]}")
+    print(f"Queries: {total} ({len(corpus)} distinct) | Typists: {args.users} | Key interval: ~{args.key_ms:g}ms | "
+          f"Cancel superseded: {'no' if args.no_cancel else 'yes'}")
+    print(f"{'='*80}{RESET}\n")
+
+    results: Dict[str, Dict] = {}
+    try:
+        for strategy in strategies:
+            print(f"{CYAN}Replaying with {strategy} ...{RESET}")
+            sessions = asyncio.run(run_typists(args.base_url, args.endpoint, args.protocol, schedules, strategy,
+                                               args.debounce_ms, not args.no_cancel, args.pause_ms, args.timeout))
+            results[strategy] = summarize_sessions(sessions, args.budget_ms)
+    except KeyboardInterrupt:
+        print(f"\n{YELLOW}Benchmark interrupted by user{RESET}")
+        sys.exit(1)
+    except (ClientError, OSError, ValueError) as e:
+        print(f"{RED}Error: {e}{RESET}")
+        sys.exit(1)
+
+    print_summary(results, args.budget_ms)
+    report = {'timestamp': datetime.now().isoformat(), 'base_url': args.base_url,
+              'endpoint': ENDPOINTS[args.endpoint],
+              'settings': {k: v for k, v in vars(args).items() if k != 'output'},
+              'results': results}
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n{BLUE}JSON report saved to: {args.output}{RESET}\n")
+    sys.exit(1 if any(r['outcomes']['error'] for r in results.values()) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Signed Shopify Order Webhook Replay Load Tester
+
+Generates orders/create webhook payloads, signs them the way Shopify does
+(base64 HMAC-SHA256 of the raw body in X-Shopify-Hmac-Sha256) with a local
+test secret, and replays them against /api/webhooks/shopify/orders at a
+configured rate and concurrency:
+- Valid deliveries measure acceptance latency; any over Shopify's delivery
+  timeout would be retried, i.e. processed twice
+- A share of deliveries carries a bad signature (tampered, missing or
+  truncated) to time the fast-reject path and count rejections by status
+
+By default the deliveries go to an in-process stand-in server. Every valid
+delivery to the real handler sends a GA4 and a Taboola purchase conversion,
+so --base-url requires --i-understand-side-effects, and the target should
+run with GA4_MEASUREMENT_ID and TABOOLA_ADVERTISER_ID unset. It must also
+run with SHOPIFY_WEBHOOK_SECRET set to the --secret passed here (the secret
+is never read from this environment).
+
+Usage:
+    python3 testsprite_tests/webhook_load.py --count 2000 --rate 0 --concurrency 100 --invalid-ratio 0.1
+    python3 testsprite_tests/webhook_load.py --base-url http://localhost:3000 --secret test-secret \
+        --i-understand-side-effects
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Tuple
+
+from aio_client import AsyncHTTPClient, ClientError, TokenBucket
+from comprehensive_api_tests import GREEN, RED, YELLOW, BLUE, CYAN, BOLD, RESET
+from perf_stats import summarize
+from standin_server import DEFAULT_WEBHOOK_SECRET, load_routes, run_in_thread
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PRODUCTS_EXPORT = os.path.join(SCRIPT_DIR, '..', 'quiz-testing', 'products_export.json')
+REPORT_FILE = "testsprite_tests/webhook_load_report.json"
+
+WEBHOOK_PATH = "/api/webhooks/shopify/orders"
+SHOP_DOMAIN = "labessentials.myshopify.com"
+API_VERSION = "2024-10"
+
+# Shopify gives up on a delivery (and retries it later) after 5 seconds
+SHOPIFY_TIMEOUT_MS = 5000.0
+
+# Kinds of bad signature sent to exercise the reject path
+INVALID_KINDS = ('tampered', 'missing', 'truncated')
+
+
+def sign(secret: str, body: bytes) -> str:
+    """Shopify webhook signature: base64 HMAC-SHA256 of the raw body"""
+    return base64.b64encode(hmac.new(secret.encode(), body, hashlib.sha256).digest()).decode()
+
+
+# ==================== PAYLOADS ====================
+
+class OrderFactory:
+    """Generates orders/create payloads from the exported catalog"""
+
+    def __init__(self, seed: int, products_file: str = PRODUCTS_EXPORT):
+        with open(products_file, 'r') as f:
+            self.products = json.load(f)
+        self.rng = random.Random(seed)
+        self.next_id = 5_100_000_000_000 + self.rng.randrange(1_000_000)
+        self.next_number = 1001
+
+    def order(self) -> Dict:
+        rng = self.rng
+        self.next_id += 1
+        self.next_number += 1
+        line_items = []
+        for product in rng.sample(self.products, k=min(len(self.products), rng.randint(1, 4))):
+            product_id = int(product['id'].rsplit('/', 1)[-1])
+            line_items.append({
+                'id': rng.randrange(10**13, 10**14),
+                'product_id': product_id,
+                'variant_id': product_id * 10 + 1,
+                'name': product['title'],
+                'price': f"{float(product.get('price') or 0):.2f}",
+                'quantity': rng.randint(1, 3),
+                'sku': product['handle'].upper()[:24],
+            })
+        subtotal = sum(float(item['price']) * item['quantity'] for item in line_items)
+        tax = round(subtotal * 0.07, 2)
+        customer_id = rng.randrange(10**12, 10**13)
+        created = datetime.now(timezone.utc) - timedelta(seconds=rng.randint(0, 3600))
+        return {
+            'id': self.next_id,
+            'order_number': self.next_number,
+            'email': f"buyer{customer_id % 100000}@example.com",
+            'total_price': f"{subtotal + tax:.2f}",
+            'subtotal_price': f"{subtotal:.2f}",
+            'total_tax': f"{tax:.2f}",
+            'currency': 'USD',
+            'line_items': line_items,
+            'customer': {'id': customer_id, 'email': f"buyer{customer_id % 100000}@example.com",
+                         'first_name': 'Load', 'last_name': 'Test'},
+            'created_at': created.isoformat(),
+        }
+
+
+def build_delivery(factory: OrderFactory, secret: str, kind: str) -> Tuple[bytes, Dict[str, str]]:
+    """Serialize an order and sign it (kind: 'valid' or one of INVALID_KINDS)"""
+    body = json.dumps(factory.order(), separators=(',', ':')).encode()
+    headers = {
+        'Content-Type': 'application/json',
+        'X-Shopify-Topic': 'orders/create',
+        'X-Shopify-Shop-Domain': SHOP_DOMAIN,
+        'X-Shopify-API-Version': API_VERSION,
+        'X-Shopify-Webhook-Id': str(uuid.UUID(int=factory.rng.getrandbits(128))),
+    }
+    signature = sign(secret, body)
+    if kind == 'tampered':
+        # Same length, different digest: rejected by the comparison itself
+        signature = sign(secret + '-wrong', body)
+    elif kind == 'truncated':
+        signature = signature[:-4]
+    if kind != 'missing':
+        headers['X-Shopify-Hmac-Sha256'] = signature
+    return body, headers
+
+
+# ==================== REPLAY ====================
+
+async def replay(base_url: str, secret: str, count: int, rate: float, burst: float, concurrency: int,
+                 invalid_ratio: float, seed: int, timeout: float) -> Tuple[List[Dict], float]:
+    """Send the deliveries; returns per-delivery records and the wall time"""
+    factory = OrderFactory(seed)
+    kinds = ['valid' if factory.rng.random() >= invalid_ratio else INVALID_KINDS[i % len(INVALID_KINDS)]
+             for i in range(count)]
+    # Sign everything up front so HMAC work does not skew the send schedule
+    deliveries = [(kind, *build_delivery(factory, secret, kind)) for kind in kinds]
+
+    bucket = TokenBucket(rate, burst)
+    slots = asyncio.Semaphore(concurrency)
+    records: List[Dict] = []
+
+    async with AsyncHTTPClient(base_url, max_connections=concurrency, timeout=timeout) as client:
+        async def deliver(kind: str, body: bytes, headers: Dict[str, str]):
+            await bucket.acquire()
+            async with slots:
+                start = time.perf_counter()
+                try:
+                    response = await client.post(WEBHOOK_PATH, body=body, headers=headers)
+                except ClientError as e:
+                    records.append({'kind': kind, 'status': None, 'latency_ms': None, 'error': str(e)})
+                    return
+                records.append({'kind': kind, 'status': response.status,
+                                'latency_ms': (time.perf_counter() - start) * 1000, 'error': None})
+
+        start = time.perf_counter()
+        await asyncio.gather(*(deliver(*delivery) for delivery in deliveries))
+        wall_s = time.perf_counter() - start
+    return records, wall_s
+
+
+def build_report(records: List[Dict], wall_s: float, settings: Dict, retry_after_ms: float) -> Dict:
+    """Group latencies and status codes by signature kind"""
+    kinds = {}
+    for kind in ('valid',) + INVALID_KINDS:
+        subset = [r for r in records if r['kind'] == kind]
+        if not subset:
+            continue
+        statuses: Dict[str, int] = {}
+        for r in subset:
+            key = str(r['status']) if r['status'] is not None else 'error'
+            statuses[key] = statuses.get(key, 0) + 1
+        latencies = [r['latency_ms'] for r in subset if r['latency_ms'] is not None]
+        expected = 200 if kind == 'valid' else 401
+        kinds[kind] = {
+            'sent': len(subset),
+            'expected_status': expected,
+            'as_expected': sum(1 for r in subset if r['status'] == expected),
+            'statuses': statuses,
+            'latency_ms': {k: round(v, 2) for k, v in summarize(latencies).items()},
+        }
+
+    accepted = [r for r in records if r['kind'] == 'valid' and r['status'] == 200]
+    over_timeout = sum(1 for r in accepted if r['latency_ms'] > retry_after_ms)
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'settings': settings,
+        'summary': {
+            'deliveries': len(records),
+            'accepted': len(accepted),
+            'rejected': sum(1 for r in records if r['status'] in (401, 403)),
+            'server_errors': sum(1 for r in records if r['status'] is not None and r['status'] >= 500),
+            'transport_errors': sum(1 for r in records if r['status'] is None),
+            'wall_time_s': round(wall_s, 3),
+            'deliveries_per_second': round(len(records) / wall_s, 2) if wall_s > 0 else 0.0,
+            'over_shopify_timeout': over_timeout,
+        },
+        'kinds': kinds,
+    }
+
+
+def print_report(report: Dict, retry_after_ms: float) -> None:
+    """Print latency and status counts per signature kind"""
+    print(f"{CYAN}{BOLD}Deliveries by signature{RESET}")
+    print(f"{'Kind':<10} {'Sent':>6} {'As exp.':>8} {'p50':>9} {'p95':>9} {'Max':>9}  Statuses")
+    for kind, stats in report['kinds'].items():
+        lat = stats['latency_ms']
+        color = GREEN if stats['as_expected'] == stats['sent'] else RED
+        statuses = ', '.join(f"{status}: {n}" for status, n in sorted(stats['statuses'].items()))
+        print(f"{kind:<10} {stats['sent']:>6} {color}{stats['as_expected']:>8}{RESET} {lat['p50']:>7.0f}ms "
+              f"{lat['p95']:>7.0f}ms {lat['max']:>7.0f}ms  {statuses}")
+
+    if 'truncated' in report['kinds'] and report['kinds']['truncated']['statuses'].get('500'):
+        print(f"\n{YELLOW}Truncated signatures return 500, not 401: crypto.timingSafeEqual throws when "
+              f"the lengths differ{RESET}")
+
+    valid = report['kinds'].get('valid')
+    invalid = [stats for kind, stats in report['kinds'].items() if kind != 'valid']
+    if valid and invalid and valid['latency_ms']['p50'] > 0:
+        reject_p50 = max(stats['latency_ms']['p50'] for stats in invalid)
+        print(f"\nFast-reject p50 is {reject_p50 / valid['latency_ms']['p50']:.1%} of the acceptance p50")
+
+    summary = report['summary']
+    print(f"\n{BOLD}Summary{RESET}")
+    print(f"Deliveries:       {summary['deliveries']} in {summary['wall_time_s']:.2f}s "
+          f"({summary['deliveries_per_second']:.1f}/s)")
+    print(f"{GREEN}Accepted:         {summary['accepted']}{RESET}")
+    print(f"Rejected:         {summary['rejected']}")
+    print(f"{RED}Server errors:    {summary['server_errors']}{RESET}")
+    print(f"{RED}Transport errors: {summary['transport_errors']}{RESET}")
+    color = RED if summary['over_shopify_timeout'] else GREEN
+    print(f"{color}Accepted after {retry_after_ms / 1000:g}s (Shopify would retry): "
+          f"{summary['over_shopify_timeout']}{RESET}\n")
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Replay signed Shopify order webhooks under load")
+    parser.add_argument('--base-url', help="Target server (default: an in-process stand-in)")
+    parser.add_argument('--secret', default=DEFAULT_WEBHOOK_SECRET,
+                        help="Signing secret, the target's SHOPIFY_WEBHOOK_SECRET (default: the stand-in's secret)")
+    parser.add_argument('--i-understand-side-effects', action='store_true',
+                        help="Allow --base-url: each valid delivery sends GA4 and Taboola purchase conversions "
+                             "unless the target runs with GA4_MEASUREMENT_ID and TABOOLA_ADVERTISER_ID unset")
+    parser.add_argument('--count', type=int, default=500, help="Number of deliveries")
+    parser.add_argument('--rate', type=float, default=50.0, help="Deliveries per second (0 = as fast as possible)")
+    parser.add_argument('--burst', type=float, default=10.0, help="Token bucket size")
+    parser.add_argument('--concurrency', type=int, default=20, help="Maximum deliveries in flight")
+    parser.add_argument('--invalid-ratio', type=float, default=0.2, help="Share of deliveries with a bad signature")
+    parser.add_argument('--retry-after', type=float, default=SHOPIFY_TIMEOUT_MS,
+                        help="Latency (ms) after which Shopify retries a delivery")
+    parser.add_argument('--timeout', type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=REPORT_FILE)
+    args = parser.parse_args()
+
+    if args.base_url and not args.i_understand_side_effects:
+        print(f"{RED}Refusing to send signed orders to {args.base_url}: the real handler reports every valid "
+              f"delivery to GA4 and Taboola as a purchase.{RESET}")
+        print(f"Unset GA4_MEASUREMENT_ID and TABOOLA_ADVERTISER_ID on the target, then rerun with "
+              f"--i-understand-side-effects, or drop --base-url to use the in-process stand-in.")
+        sys.exit(2)
+
+    target = args.base_url
+    if target is None:
+        server, _ = run_in_thread(load_routes(seed=args.seed))
+        server.webhook_secret = args.secret
+        target = server.base_url
+
+    print(f"\n{BLUE}{BOLD}{'='*80}")
+    print("Lab Essentials E-Commerce - Shopify Order Webhook Replay")
+    print(f"Testing against: {target}{WEBHOOK_PATH}" + ("" if args.base_url else " (in-process stand-in)"))
+    print(f"Deliveries: {args.count} | Rate: {args.rate or 'unlimited'}/s | Concurrency: {args.concurrency} | "
+          f"Invalid: {args.invalid_ratio:.0%}")
+    print(f"{'='*80}{RESET}\n")
+
+    try:
+        records, wall_s = asyncio.run(replay(target, args.secret, args.count, args.rate, args.burst,
+                                             args.concurrency, args.invalid_ratio, args.seed, args.timeout))
+    except KeyboardInterrupt:
+        print(f"\n{YELLOW}Replay interrupted by user{RESET}")
+        sys.exit(1)
+    except (OSError, ValueError) as e:
+        print(f"{RED}Error: {e}{RESET}")
+        sys.exit(1)
+
+    settings = {k: v for k, v in vars(args).items() if k not in ('secret', 'output')}
+    report = build_report(records, wall_s, settings, args.retry_after)
+    print_report(report, args.retry_after)
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"{BLUE}JSON report saved to: {args.output}{RESET}\n")
+
+    valid = report['kinds'].get('valid')
+    sys.exit(0 if valid is None or valid['as_expected'] == valid['sent'] else 1)
+
+
+if __name__ == "__main__":
+    main()